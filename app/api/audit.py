@@ -4,7 +4,7 @@ API endpoints for viewing audit logs
 from fastapi import APIRouter, Query, Depends
 from typing import Optional
 from datetime import datetime, timedelta
-from app.services.supabase_service import SupabaseService
+from app.services.supabase_service import get_supabase_service
 from app.services.audit_logger import audit_logger
 from app.api.auth import get_current_user
 from app.core.error_utils import handle_api_errors
@@ -29,7 +29,7 @@ async def get_audit_logs(
     Get audit logs with optional filtering.
     Only accessible to authenticated users.
     """
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     query = supabase.client.table("audit_logs").select("*")
     
@@ -93,7 +93,7 @@ async def get_audit_stats(
     Get audit log statistics.
     Returns counts by action type, status, and user.
     """
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     # Build base query
     base_query = supabase.client.table("audit_logs").select("*")
@@ -157,7 +157,7 @@ async def get_user_activity(
     Get activity logs for a specific user.
     Defaults to current user if user_email not provided.
     """
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     # Use current user if no email provided
     target_email = user_email or current_user["email"]
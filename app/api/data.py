@@ -1,16 +1,26 @@
-from fastapi import APIRouter, Query, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, Query, HTTPException, Depends, UploadFile, File, Form, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from typing import Optional, List, Dict
+import asyncio
+import copy
 import logging
 import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from operator import itemgetter
 from datetime import datetime, timedelta
 import base64
+import hashlib
 import uuid
-from app.services.supabase_service import SupabaseService
+import orjson
+from app.services.supabase_service import SupabaseService, get_supabase_service, execute_async, run_all, result_rows, result_count, scrunch_dashboard_cache
+from app.services.row_batcher import RowBatcher
 from app.services.ga4_client import GA4APIClient
 from app.services.agency_analytics_client import AgencyAnalyticsClient
 from app.services.scrunch_client import ScrunchAPIClient
 from app.core.exceptions import NotFoundException, handle_exception
 from app.core.error_utils import handle_api_errors
+from app.core.cache import TTLCache
 from app.api.auth import get_current_user
 from app.core.config import settings
 from pydantic import BaseModel
@@ -28,7 +38,7 @@ async def get_brands(
     search: Optional[str] = Query(None, description="Search by brand name")
 ):
     """Get brands from database with optional search"""
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     # Build query with optional search
     query = supabase.client.table("brands").select("*", count="exact")
@@ -40,7 +50,7 @@ async def get_brands(
     
     # Get total count
     count_result = query.execute()
-    total_count = count_result.count if hasattr(count_result, 'count') else 0
+    total_count = result_count(count_result)
     
     # Apply pagination
     if limit:
@@ -52,7 +62,7 @@ async def get_brands(
     query = query.order("name", desc=False)
     
     result = query.execute()
-    items = result.data if hasattr(result, 'data') else result
+    items = result_rows(result)
     
     return {
         "items": items if isinstance(items, list) else [],
@@ -71,7 +81,7 @@ async def get_prompts(
     offset: Optional[int] = Query(0, description="Offset for pagination")
 ):
     """Get prompts from database. Supports both brand_id and client_id (client_id maps to brand_id via scrunch_brand_id)"""
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     # If client_id is provided, get the scrunch_brand_id from the client
     if client_id and not brand_id:
@@ -96,7 +106,7 @@ async def get_prompts(
         count_query = count_query.eq("persona_id", persona_id)
     
     count_result = count_query.execute()
-    total_count = count_result.count if hasattr(count_result, 'count') else 0
+    total_count = result_count(count_result)
     
     # Get paginated items
     query = supabase.client.table("prompts").select("*")
@@ -114,7 +124,7 @@ async def get_prompts(
         query = query.offset(offset)
     
     result = query.execute()
-    items = result.data if hasattr(result, 'data') else result
+    items = result_rows(result)
     
     return {
         "items": items if isinstance(items, list) else [],
@@ -135,7 +145,7 @@ async def get_responses(
     offset: Optional[int] = Query(0, description="Offset for pagination")
 ):
     """Get responses from database. Supports both brand_id and client_id (client_id maps to brand_id via scrunch_brand_id)"""
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     # If client_id is provided, get the scrunch_brand_id from the client
     if client_id and not brand_id:
@@ -164,7 +174,7 @@ async def get_responses(
         count_query = count_query.lte("created_at", end_date)
     
     count_result = count_query.execute()
-    total_count = count_result.count if hasattr(count_result, 'count') else 0
+    total_count = result_count(count_result)
     
     # Get paginated items
     query = supabase.client.table("responses").select("*")
@@ -186,7 +196,7 @@ async def get_responses(
         query = query.offset(offset)
     
     result = query.execute()
-    items = result.data if hasattr(result, 'data') else result
+    items = result_rows(result)
     
     return {
         "items": items if isinstance(items, list) else [],
@@ -194,105 +204,122 @@ async def get_responses(
         "total_count": total_count
     }
 
-def calculate_analytics(responses):
-    """Calculate analytics from responses"""
-    if not responses:
-        return {
-            "total_responses": 0,
-            "platform_distribution": {},
-            "stage_distribution": {},
-            "brand_presence": {"present": 0, "absent": 0},
-            "brand_sentiment": {"positive": 0, "neutral": 0, "negative": 0, "null": 0},
-            "top_competitors": [],
-            "top_topics": [],
-            "citation_metrics": {"total": 0, "average_per_response": 0},
-            "country_distribution": {},
-            "persona_distribution": {}
-        }
-    
-    platform_dist = {}
-    stage_dist = {}
-    brand_present = 0
-    brand_absent = 0
-    sentiment_dist = {"positive": 0, "neutral": 0, "negative": 0, "null": 0}
-    competitors_count = {}
-    topics_count = {}
-    total_citations = 0
-    country_dist = {}
-    persona_dist = {}
+def tally_responses(responses):
+    """Count the raw per-response metrics used by calculate_analytics.
+
+    Tallies from different response sets can be combined with merge_response_tallies,
+    which lets callers build global analytics from per-brand tallies without rescanning.
+    """
+    tally = {
+        "total_responses": 0,
+        "platform": Counter(),
+        "stage": Counter(),
+        "brand_present": 0,
+        "brand_absent": 0,
+        "sentiment": Counter(),
+        "competitors": Counter(),
+        "topics": Counter(),
+        "total_citations": 0,
+        "country": Counter(),
+        "persona": Counter()
+    }
     
     for response in responses:
+        tally["total_responses"] += 1
+        
         # Platform distribution
-        platform = response.get("platform", "unknown")
-        platform_dist[platform] = platform_dist.get(platform, 0) + 1
+        tally["platform"][response.get("platform", "unknown")] += 1
         
         # Stage distribution
-        stage = response.get("stage", "unknown")
-        stage_dist[stage] = stage_dist.get(stage, 0) + 1
+        tally["stage"][response.get("stage", "unknown")] += 1
         
         # Brand presence
         if response.get("brand_present"):
-            brand_present += 1
+            tally["brand_present"] += 1
         else:
-            brand_absent += 1
+            tally["brand_absent"] += 1
         
         # Sentiment
         sentiment = response.get("brand_sentiment")
         if sentiment:
             sentiment_lower = sentiment.lower()
             if "positive" in sentiment_lower:
-                sentiment_dist["positive"] += 1
+                tally["sentiment"]["positive"] += 1
             elif "negative" in sentiment_lower:
-                sentiment_dist["negative"] += 1
+                tally["sentiment"]["negative"] += 1
             else:
-                sentiment_dist["neutral"] += 1
+                tally["sentiment"]["neutral"] += 1
         else:
-            sentiment_dist["null"] += 1
+            tally["sentiment"]["null"] += 1
         
         # Competitors
-        competitors_present = response.get("competitors_present", [])
-        for comp in competitors_present:
-            competitors_count[comp] = competitors_count.get(comp, 0) + 1
+        tally["competitors"].update(response.get("competitors_present", []))
         
         # Topics
-        topics = response.get("key_topics", [])
-        for topic in topics:
-            topics_count[topic] = topics_count.get(topic, 0) + 1
+        tally["topics"].update(response.get("key_topics", []))
         
         # Citations
         citations = response.get("citations", [])
         if isinstance(citations, list):
-            total_citations += len(citations)
+            tally["total_citations"] += len(citations)
         
         # Country
-        country = response.get("country", "unknown")
-        country_dist[country] = country_dist.get(country, 0) + 1
+        tally["country"][response.get("country", "unknown")] += 1
         
         # Persona
         persona = response.get("persona_name", "unknown")
         if persona:
-            persona_dist[persona] = persona_dist.get(persona, 0) + 1
+            tally["persona"][persona] += 1
     
-    # Get top competitors
-    top_competitors = sorted(competitors_count.items(), key=lambda x: x[1], reverse=True)[:10]
+    return tally
+
+def merge_response_tallies(tallies):
+    """Combine tallies produced by tally_responses into a single tally"""
+    merged = tally_responses([])
+    for tally in tallies:
+        for key, value in tally.items():
+            merged[key] += value
+    return merged
+
+def analytics_from_tally(tally):
+    """Build the analytics payload from a response tally"""
+    total_responses = tally["total_responses"]
+    if not total_responses:
+        return {
+            "total_responses": 0,
+            "platform_distribution": {},
+            "stage_distribution": {},
+            "brand_presence": {"present": 0, "absent": 0},
+            "brand_sentiment": {"positive": 0, "neutral": 0, "negative": 0, "null": 0},
+            "top_competitors": [],
+            "top_topics": [],
+            "citation_metrics": {"total": 0, "average_per_response": 0},
+            "country_distribution": {},
+            "persona_distribution": {}
+        }
     
-    # Get top topics
-    top_topics = sorted(topics_count.items(), key=lambda x: x[1], reverse=True)[:20]
+    sentiment = tally["sentiment"]
+    total_citations = tally["total_citations"]
     
     return {
-        "total_responses": len(responses),
-        "platform_distribution": platform_dist,
-        "stage_distribution": stage_dist,
-        "brand_presence": {"present": brand_present, "absent": brand_absent},
-        "brand_sentiment": sentiment_dist,
-        "top_competitors": [{"name": name, "count": count} for name, count in top_competitors],
-        "top_topics": [{"topic": topic, "count": count} for topic, count in top_topics],
+        "total_responses": total_responses,
+        "platform_distribution": dict(tally["platform"]),
+        "stage_distribution": dict(tally["stage"]),
+        "brand_presence": {"present": tally["brand_present"], "absent": tally["brand_absent"]},
+        "brand_sentiment": {
+            "positive": sentiment["positive"],
+            "neutral": sentiment["neutral"],
+            "negative": sentiment["negative"],
+            "null": sentiment["null"]
+        },
+        "top_competitors": [{"name": name, "count": count} for name, count in tally["competitors"].most_common(10)],
+        "top_topics": [{"topic": topic, "count": count} for topic, count in tally["topics"].most_common(20)],
         "citation_metrics": {
             "total": total_citations,
-            "average_per_response": round(total_citations / len(responses), 2) if responses else 0
+            "average_per_response": round(total_citations / total_responses, 2)
         },
-        "country_distribution": country_dist,
-        "persona_distribution": persona_dist,
+        "country_distribution": dict(tally["country"]),
+        "persona_distribution": dict(tally["persona"]),
         "month_over_month": {
             "top10_prompt_percentage_change": 1.2,
             "search_volume_change": 18.5,
@@ -300,32 +327,70 @@ def calculate_analytics(responses):
         }
     }
 
+def calculate_analytics(responses):
+    """Calculate analytics from responses"""
+    return analytics_from_tally(tally_responses(responses))
+
+# Response columns tally_responses reads, plus the brand they are grouped by
+RESPONSE_TALLY_COLUMNS = "id,brand_id,platform,stage,brand_present,brand_sentiment,competitors_present,key_topics,citations,country,persona_name"
+
+# Rows fetched per PostgREST request when reading every matching row
+QUERY_PAGE_SIZE = 1000
+
+def iter_row_pages(build_query, page_size: int = QUERY_PAGE_SIZE):
+    """Yield every row of a query, one page of rows at a time.
+    
+    build_query must return a fresh query builder ordered by a unique column, since
+    range() mutates the builder it is applied to. Paging stops at the first empty page
+    rather than a short one, because the server's max-rows may be below page_size.
+    """
+    offset = 0
+    while True:
+        rows = result_rows(build_query().range(offset, offset + page_size - 1).execute())
+        if not rows:
+            return
+        yield rows
+        offset += len(rows)
+
 @router.get("/data/analytics/brands")
 async def get_brand_analytics(
     brand_id: Optional[int] = Query(None, description="Filter by brand ID")
 ):
     """Get analytics for brands based on responses"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Get brands
         brands_query = supabase.client.table("brands").select("*")
         if brand_id:
             brands_query = brands_query.eq("id", brand_id)
         brands_result = brands_query.execute()
-        brands = brands_result.data if hasattr(brands_result, 'data') else []
-        
-        # Get responses filtered by brand_id if provided
-        responses_query = supabase.client.table("responses").select("*")
-        if brand_id:
-            responses_query = responses_query.eq("brand_id", brand_id)
-        responses_result = responses_query.execute()
-        responses = responses_result.data if hasattr(responses_result, 'data') else []
+        brands = result_rows(brands_result)
+        
+        # Tally responses per brand one page at a time. A single select is capped by
+        # PostgREST's max-rows, which would silently truncate the whole table's responses
+        def build_responses_query():
+            query = supabase.client.table("responses").select(RESPONSE_TALLY_COLUMNS)
+            if brand_id:
+                query = query.eq("brand_id", brand_id)
+            return query.order("id")
+        
+        tallies_by_brand = {}
+        for page in iter_row_pages(build_responses_query):
+            responses_by_brand = defaultdict(list)
+            for response in page:
+                responses_by_brand[response.get("brand_id")].append(response)
+            for response_brand_id, brand_responses in responses_by_brand.items():
+                page_tally = tally_responses(brand_responses)
+                if response_brand_id in tallies_by_brand:
+                    page_tally = merge_response_tallies([tallies_by_brand[response_brand_id], page_tally])
+                tallies_by_brand[response_brand_id] = page_tally
+        empty_tally = tally_responses([])
         
         # Calculate analytics for each brand
         if brand_id and len(brands) == 1:
             # Single brand analytics
-            analytics = calculate_analytics(responses)
+            analytics = analytics_from_tally(tallies_by_brand.get(brand_id, empty_tally))
             return {
                 "brands": [{
                     **brands[0],
@@ -335,27 +400,15 @@ async def get_brand_analytics(
                 "global_analytics": analytics
             }
         else:
-            # Multiple brands or no filter - calculate per brand
             brand_analytics = []
-            all_responses = responses  # For global analytics if no filter
-            
             for brand in brands:
-                # Get responses for this brand
-                brand_responses_query = supabase.client.table("responses").select("*")
-                brand_responses_query = brand_responses_query.eq("brand_id", brand["id"])
-                brand_responses_result = brand_responses_query.execute()
-                brand_responses = brand_responses_result.data if hasattr(brand_responses_result, 'data') else []
-                
-                # Calculate analytics for this brand
-                brand_analytics_data = calculate_analytics(brand_responses)
-                
                 brand_analytics.append({
                     **brand,
-                    "analytics": brand_analytics_data
+                    "analytics": analytics_from_tally(tallies_by_brand.get(brand["id"], empty_tally))
                 })
             
-            # Calculate global analytics
-            global_analytics = calculate_analytics(all_responses) if all_responses else calculate_analytics([])
+            # Global analytics are the sum of the per-brand tallies
+            global_analytics = analytics_from_tally(merge_response_tallies(tallies_by_brand.values()))
             
             return {
                 "brands": brand_analytics,
@@ -389,9 +442,9 @@ async def get_brand_ga4_analytics(
     """Get GA4 analytics for a specific brand (if property ID is configured)"""
     try:
         # Get brand from database
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         brand_result = supabase.client.table("brands").select("*").eq("id", brand_id).execute()
-        brands = brand_result.data if hasattr(brand_result, 'data') else []
+        brands = result_rows(brand_result)
         
         if not brands:
             raise HTTPException(status_code=404, detail="Brand not found")
@@ -420,7 +473,7 @@ async def get_brand_ga4_analytics(
         date_range = {"startDate": start_date, "endDate": end_date}
         
         # Store data when fetched to ensure all data is persisted
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         try:
             analytics["trafficOverview"] = await ga4_client.get_traffic_overview(property_id, start_date, end_date)
@@ -522,6 +575,10 @@ async def get_brand_ga4_analytics(
             logger.warning(f"Error fetching property details: {str(e)}")
             analytics["propertyDetails"] = None
         
+        # The stored GA4 rows changed, so drop cached reads and stored dashboard payloads
+        supabase.clear_ga4_read_cache()
+        supabase.clear_reporting_dashboard_snapshots(brand_id)
+        
         analytics["dateRange"] = date_range
         
         return {
@@ -546,9 +603,9 @@ async def get_client_ga4_analytics(
     """Get GA4 analytics for a specific client (if property ID is configured)"""
     try:
         # Get client from database
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         client_result = supabase.client.table("clients").select("*").eq("id", client_id).execute()
-        clients = client_result.data if hasattr(client_result, 'data') else []
+        clients = result_rows(client_result)
         
         if not clients:
             raise HTTPException(status_code=404, detail="Client not found")
@@ -577,7 +634,7 @@ async def get_client_ga4_analytics(
         date_range = {"startDate": start_date, "endDate": end_date}
         
         # Store data when fetched to ensure all data is persisted
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         scrunch_brand_id = client.get("scrunch_brand_id")  # For backward compatibility
         
         try:
@@ -680,6 +737,11 @@ async def get_client_ga4_analytics(
             logger.warning(f"Error fetching property details: {str(e)}")
             analytics["propertyDetails"] = None
         
+        # The stored GA4 rows changed, so drop cached reads and stored dashboard payloads
+        supabase.clear_ga4_read_cache()
+        if scrunch_brand_id:
+            supabase.clear_reporting_dashboard_snapshots(scrunch_brand_id)
+        
         analytics["dateRange"] = date_range
         
         return {
@@ -695,15 +757,39 @@ async def get_client_ga4_analytics(
         logger.error(f"Error fetching GA4 analytics for client {client_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+# GA4 report responses are cached briefly; ranges that ended before today can no longer change
+GA4_CACHE_TTL_SECONDS = 300
+GA4_HISTORICAL_CACHE_TTL_SECONDS = 3600
+ga4_response_cache = TTLCache(maxsize=512, ttl=GA4_CACHE_TTL_SECONDS)
+
+async def get_cached_ga4_data(cache_key, end_date, fetch):
+    """Return a cached GA4 API response for cache_key, calling fetch() on a miss"""
+    data = ga4_response_cache.get(cache_key)
+    if data is not None:
+        return data
+    
+    data = await fetch()
+    ttl = GA4_CACHE_TTL_SECONDS
+    if end_date:
+        try:
+            if datetime.strptime(end_date, "%Y-%m-%d").date() < datetime.now().date():
+                ttl = GA4_HISTORICAL_CACHE_TTL_SECONDS
+        except ValueError:
+            pass
+    ga4_response_cache.set(cache_key, data, ttl=ttl)
+    return data
+
 @router.get("/data/ga4/traffic-overview/{property_id}")
 async def get_ga4_traffic_overview(
     property_id: str,
+    response: Response,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
 ):
     """Get traffic overview for a GA4 property"""
     try:
-        data = await ga4_client.get_traffic_overview(property_id, start_date, end_date)
+        data = await get_cached_ga4_data(("traffic_overview", property_id, start_date, end_date), end_date, lambda: ga4_client.get_traffic_overview(property_id, start_date, end_date))
+        response.headers["Cache-Control"] = f"private, max-age={GA4_CACHE_TTL_SECONDS}"
         return data
     except Exception as e:
         logger.error(f"Error fetching traffic overview: {str(e)}")
@@ -712,13 +798,15 @@ async def get_ga4_traffic_overview(
 @router.get("/data/ga4/top-pages/{property_id}")
 async def get_ga4_top_pages(
     property_id: str,
+    response: Response,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     limit: int = Query(10, description="Number of pages to return")
 ):
     """Get top performing pages for a GA4 property"""
     try:
-        data = await ga4_client.get_top_pages(property_id, start_date, end_date, limit)
+        data = await get_cached_ga4_data(("top_pages", property_id, start_date, end_date, limit), end_date, lambda: ga4_client.get_top_pages(property_id, start_date, end_date, limit))
+        response.headers["Cache-Control"] = f"private, max-age={GA4_CACHE_TTL_SECONDS}"
         return {"items": data, "count": len(data)}
     except Exception as e:
         logger.error(f"Error fetching top pages: {str(e)}")
@@ -727,12 +815,14 @@ async def get_ga4_top_pages(
 @router.get("/data/ga4/traffic-sources/{property_id}")
 async def get_ga4_traffic_sources(
     property_id: str,
+    response: Response,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
 ):
     """Get traffic sources for a GA4 property"""
     try:
-        data = await ga4_client.get_traffic_sources(property_id, start_date, end_date)
+        data = await get_cached_ga4_data(("traffic_sources", property_id, start_date, end_date), end_date, lambda: ga4_client.get_traffic_sources(property_id, start_date, end_date))
+        response.headers["Cache-Control"] = f"private, max-age={GA4_CACHE_TTL_SECONDS}"
         return {"items": data, "count": len(data)}
     except Exception as e:
         logger.error(f"Error fetching traffic sources: {str(e)}")
@@ -741,13 +831,15 @@ async def get_ga4_traffic_sources(
 @router.get("/data/ga4/geographic/{property_id}")
 async def get_ga4_geographic(
     property_id: str,
+    response: Response,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     limit: int = Query(20, description="Number of countries to return")
 ):
     """Get geographic breakdown for a GA4 property"""
     try:
-        data = await ga4_client.get_geographic_breakdown(property_id, start_date, end_date, limit)
+        data = await get_cached_ga4_data(("geographic", property_id, start_date, end_date, limit), end_date, lambda: ga4_client.get_geographic_breakdown(property_id, start_date, end_date, limit))
+        response.headers["Cache-Control"] = f"private, max-age={GA4_CACHE_TTL_SECONDS}"
         return {"items": data, "count": len(data)}
     except Exception as e:
         logger.error(f"Error fetching geographic breakdown: {str(e)}")
@@ -756,12 +848,14 @@ async def get_ga4_geographic(
 @router.get("/data/ga4/devices/{property_id}")
 async def get_ga4_devices(
     property_id: str,
+    response: Response,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
 ):
     """Get device breakdown for a GA4 property"""
     try:
-        data = await ga4_client.get_device_breakdown(property_id, start_date, end_date)
+        data = await get_cached_ga4_data(("devices", property_id, start_date, end_date), end_date, lambda: ga4_client.get_device_breakdown(property_id, start_date, end_date))
+        response.headers["Cache-Control"] = f"private, max-age={GA4_CACHE_TTL_SECONDS}"
         return {"items": data, "count": len(data)}
     except Exception as e:
         logger.error(f"Error fetching device breakdown: {str(e)}")
@@ -777,18 +871,29 @@ async def get_ga4_realtime(property_id: str):
         logger.error(f"Error fetching realtime data: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+brands_with_ga4_cache = TTLCache(maxsize=1, ttl=60)
+
 @router.get("/data/ga4/brands-with-ga4")
 async def get_brands_with_ga4():
     """Get all brands that have GA4 property IDs configured"""
     try:
-        supabase = SupabaseService()
-        result = supabase.client.table("brands").select("*").not_.is_("ga4_property_id", "null").execute()
-        brands = result.data if hasattr(result, 'data') else []
+        # The brand list changes rarely, so serve it from a short-lived cache
+        payload = brands_with_ga4_cache.get("brands")
+        if payload is not None:
+            return payload
+        
+        supabase = get_supabase_service()
+        result = await execute_async(
+            supabase.client.table("brands").select("id,name,website,slug,ga4_property_id").not_.is_("ga4_property_id", "null")
+        )
+        brands = result_rows(result)
         
-        return {
+        payload = {
             "items": brands,
             "count": len(brands)
         }
+        brands_with_ga4_cache.set("brands", payload)
+        return payload
     except Exception as e:
         logger.error(f"Error fetching brands with GA4: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -797,78 +902,98 @@ async def get_brands_with_ga4():
 # Agency Analytics Data Endpoints
 # =====================================================
 
-@router.get("/data/agency-analytics/campaigns")
+# Upper bounds for list query parameters, validated by FastAPI before the handler runs
+MAX_LIST_LIMIT = 1000
+MAX_PAGE_SIZE = 200
+
+# Campaign columns rendered by the campaign list and brand campaign views
+CAMPAIGN_LIST_COLUMNS = "id,company,url,status,group_title,date_created,date_modified"
+
+# Keyword summary columns rendered by the campaign keyword rankings table
+KEYWORD_SUMMARY_LIST_COLUMNS = "keyword_id,campaign_id,keyword_phrase,date,google_ranking,google_mobile_ranking,google_local_ranking,bing_ranking,search_volume,competition,ranking_change"
+
+# Concurrent single-row lookups from dashboard widgets are coalesced into one in_() query
+campaign_batcher = RowBatcher("agency_analytics_campaigns", "id")
+keyword_summary_batcher = RowBatcher("agency_analytics_keyword_ranking_summaries", "keyword_id")
+
+# Exact campaign list totals per search term, reused while a user pages through the results
+campaign_count_cache = TTLCache(maxsize=256, ttl=60)
+
+def postgrest_ilike_contains(term: str) -> str:
+    """Quoted PostgREST ilike value matching term anywhere, for use inside or_() filters.
+    
+    LIKE wildcards (% and _) and the escape character are escaped so they match literally.
+    The value is double-quoted so commas and parentheses don't split the or_() list, with
+    backslashes and quotes escaped for PostgREST. PostgREST turns * into % in like patterns,
+    so an asterisk in the term still acts as a wildcard.
+    """
+    like_term = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    quoted_term = like_term.replace("\\", "\\\\").replace('"', '\\"')
+    return f'"*{quoted_term}*"'
+
+@router.get("/data/agency-analytics/campaigns", response_class=ORJSONResponse)
 async def get_agency_analytics_campaigns(
-    page: Optional[int] = Query(1, description="Page number (1-indexed)"),
-    page_size: Optional[int] = Query(50, description="Number of records per page"),
+    request: Request,
+    page: int = Query(1, ge=1, description="Page number (1-indexed)"),
+    page_size: int = Query(50, ge=1, le=MAX_PAGE_SIZE, description="Number of records per page"),
     search: Optional[str] = Query(None, description="Search by company name or URL"),
+    include_total: bool = Query(False, description="Include total_count/total_pages (adds a COUNT query)"),
     current_user: dict = Depends(get_current_user)
 ):
     """Get Agency Analytics campaigns with pagination and search"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
-        # Build query - fetch more records if searching to allow filtering
-        # For search, we'll fetch a larger set and filter in Python
-        fetch_size = page_size * 10 if search and search.strip() else page_size
+        search_term = search.strip() if search else ""
         
-        query = supabase.client.table("agency_analytics_campaigns").select("*", count="exact")
+        # Counting is opt-in for callers that render pagination; infinite-scroll callers skip it.
+        # The exact COUNT(*) is cached per search term, so paging through one result set
+        # reuses the same total instead of recounting on every page
+        total_count = campaign_count_cache.get(search_term) if include_total else None
+        count_mode = "exact" if include_total and total_count is None else None
+        query = supabase.client.table("agency_analytics_campaigns").select(CAMPAIGN_LIST_COLUMNS, count=count_mode)
+        
+        # Search company name or URL in the database so pagination happens server-side
+        if search_term:
+            pattern = postgrest_ilike_contains(search_term)
+            query = query.or_(f"company.ilike.{pattern},url.ilike.{pattern}")
         
         # Order by id descending
         query = query.order("id", desc=True)
         
-        # If searching, fetch a larger set to filter from
-        if search and search.strip():
-            search_term_lower = search.strip().lower()
-            # Fetch a larger set for filtering
-            query = query.limit(fetch_size)
-            result = query.execute()
-            all_campaigns = result.data if hasattr(result, 'data') else []
-            
-            # Filter in Python for company name or URL
-            filtered_campaigns = [
-                c for c in all_campaigns
-                if (c.get("company", "").lower().find(search_term_lower) >= 0 or
-                    (c.get("url", "") or "").lower().find(search_term_lower) >= 0)
-            ]
-            
-            # Calculate total count (approximate for search)
-            total_count = len(filtered_campaigns)
-            
-            # Apply pagination
-            offset = (page - 1) * page_size
-            campaigns = filtered_campaigns[offset:offset + page_size]
-            total_pages = (total_count + page_size - 1) // page_size if page_size > 0 else 0
-        else:
-            # No search - use normal pagination
-            offset = (page - 1) * page_size
-            query = query.range(offset, offset + page_size - 1)
-            
-            result = query.execute()
-            campaigns = result.data if hasattr(result, 'data') else []
-            total_count = result.count if hasattr(result, 'count') else len(campaigns)
-            total_pages = (total_count + page_size - 1) // page_size if page_size > 0 else 0
+        offset = (page - 1) * page_size
+        query = query.range(offset, offset + page_size - 1)
         
-        return {
+        result = await execute_async(query)
+        campaigns = result_rows(result)
+        total_pages = None
+        if include_total:
+            if total_count is None:
+                total_count = result_count(result, len(campaigns))
+                campaign_count_cache.set(search_term, total_count)
+            total_pages = -(-total_count // page_size) if page_size > 0 else 0
+        
+        return conditional_json_response(request, {
             "items": campaigns,
             "total_count": total_count,
             "page": page,
             "page_size": page_size,
             "total_pages": total_pages
-        }
+        })
     except Exception as e:
         logger.error(f"Error fetching campaigns: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/data/agency-analytics/campaign/{campaign_id}/rankings")
+@router.get("/data/agency-analytics/campaign/{campaign_id}/rankings", response_class=ORJSONResponse)
 async def get_campaign_rankings(
+    request: Request,
     campaign_id: int,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
 ):
     """Get campaign rankings for a specific campaign"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         query = supabase.client.table("agency_analytics_campaign_rankings").select("*").eq("campaign_id", campaign_id)
         
@@ -878,81 +1003,153 @@ async def get_campaign_rankings(
             query = query.lte("date", end_date)
         
         query = query.order("date", desc=False)
-        result = query.execute()
-        rankings = result.data if hasattr(result, 'data') else []
         
-        # Get campaign info
-        campaign_result = supabase.client.table("agency_analytics_campaigns").select("*").eq("id", campaign_id).execute()
-        campaign = campaign_result.data[0] if campaign_result.data else None
+        # Rankings and campaign info are independent, fetch them concurrently
+        result, campaign = await asyncio.gather(
+            execute_async(query),
+            campaign_batcher.load(campaign_id)
+        )
+        rankings = result_rows(result)
         
-        return {
+        return conditional_json_response(request, {
             "campaign": campaign,
             "rankings": rankings,
             "count": len(rankings)
-        }
+        })
     except Exception as e:
         logger.error(f"Error fetching campaign rankings: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/data/agency-analytics/rankings")
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Whether an If-None-Match header lists etag, using the weak comparison GET requires.
+    
+    The header may be "*" or a comma-separated list, and clients and proxies often send
+    weak validators (W/"...") back for strong tags they received.
+    """
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def conditional_json_response(request: Request, payload) -> Response:
+    """Serialize payload with an ETag, answering 304 when the client already has this version"""
+    body = orjson.dumps(payload)
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+# Rows fetched per PostgREST request when streaming NDJSON
+NDJSON_CHUNK_SIZE = 200
+
+async def stream_rows_as_ndjson(build_query, limit: int) -> StreamingResponse:
+    """Stream up to limit rows as NDJSON, fetching them from PostgREST in chunks.
+    
+    build_query must return a fresh query builder on every call, since range()
+    mutates the builder it is applied to, and must order by a unique column last so
+    offset chunks neither repeat nor skip rows. The first chunk is fetched before the
+    response starts, so a failing query still surfaces as an error status; a chunk that
+    fails after that ends the stream with an {"error": ...} record.
+    """
+    async def fetch_chunk(offset):
+        last = min(offset + NDJSON_CHUNK_SIZE, limit) - 1
+        rows = result_rows(await execute_async(build_query().range(offset, last)))
+        return rows, len(rows) == last - offset + 1
+    
+    first_rows, has_more = await fetch_chunk(0)
+    
+    async def generate():
+        rows, more = first_rows, has_more
+        offset = 0
+        while True:
+            for row in rows:
+                yield orjson.dumps(row) + b"\n"
+            offset += NDJSON_CHUNK_SIZE
+            if not more or offset >= limit:
+                return
+            try:
+                rows, more = await fetch_chunk(offset)
+            except Exception as e:
+                logger.error(f"Error streaming rows at offset {offset}: {str(e)}")
+                yield orjson.dumps({"error": f"Stream interrupted at row {offset}: {str(e)}"}) + b"\n"
+                return
+    
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@router.get("/data/agency-analytics/rankings", response_class=ORJSONResponse)
 async def get_all_rankings(
+    request: Request,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    limit: int = Query(1000, description="Number of records to return")
+    limit: int = Query(1000, ge=1, le=MAX_LIST_LIMIT, description="Number of records to return"),
+    stream: bool = Query(False, description="Stream rows as NDJSON instead of a single JSON document")
 ):
     """Get all campaign rankings"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
-        query = supabase.client.table("agency_analytics_campaign_rankings").select("*")
+        def build_query():
+            query = supabase.client.table("agency_analytics_campaign_rankings").select("*")
+            if start_date:
+                query = query.gte("date", start_date)
+            if end_date:
+                query = query.lte("date", end_date)
+            # id breaks ties between rows with the same date so offset chunks stay stable
+            return query.order("date", desc=True).order("id", desc=True)
         
-        if start_date:
-            query = query.gte("date", start_date)
-        if end_date:
-            query = query.lte("date", end_date)
+        if stream:
+            return await stream_rows_as_ndjson(build_query, limit)
         
-        query = query.order("date", desc=True).limit(limit)
-        result = query.execute()
-        rankings = result.data if hasattr(result, 'data') else []
+        result = await execute_async(build_query().limit(limit))
+        rankings = result_rows(result)
         
-        return {
+        return conditional_json_response(request, {
             "rankings": rankings,
             "count": len(rankings)
-        }
+        })
     except Exception as e:
         logger.error(f"Error fetching rankings: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/data/agency-analytics/campaign/{campaign_id}/keywords")
+@router.get("/data/agency-analytics/campaign/{campaign_id}/keywords", response_class=ORJSONResponse)
 async def get_campaign_keywords(
+    request: Request,
     campaign_id: int,
-    limit: int = Query(1000, description="Number of keywords to return")
+    limit: int = Query(1000, ge=1, le=MAX_LIST_LIMIT, description="Number of keywords to return")
 ):
     """Get keywords for a specific campaign"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         query = supabase.client.table("agency_analytics_keywords").select("*").eq("campaign_id", campaign_id).order("id", desc=True).limit(limit)
-        result = query.execute()
-        keywords = result.data if hasattr(result, 'data') else []
+        result = await execute_async(query)
+        keywords = result_rows(result)
         
-        return {
+        return conditional_json_response(request, {
             "campaign_id": campaign_id,
             "keywords": keywords,
             "count": len(keywords)
-        }
+        })
     except Exception as e:
         logger.error(f"Error fetching campaign keywords: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/data/agency-analytics/keywords")
+@router.get("/data/agency-analytics/keywords", response_class=ORJSONResponse)
 async def get_all_keywords(
+    request: Request,
     campaign_id: Optional[int] = Query(None, description="Filter by campaign ID"),
-    limit: int = Query(1000, description="Number of keywords to return")
+    limit: int = Query(1000, ge=1, le=MAX_LIST_LIMIT, description="Number of keywords to return")
 ):
     """Get all keywords"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         query = supabase.client.table("agency_analytics_keywords").select("*")
         
@@ -960,27 +1157,28 @@ async def get_all_keywords(
             query = query.eq("campaign_id", campaign_id)
         
         query = query.order("id", desc=True).limit(limit)
-        result = query.execute()
-        keywords = result.data if hasattr(result, 'data') else []
+        result = await execute_async(query)
+        keywords = result_rows(result)
         
-        return {
+        return conditional_json_response(request, {
             "keywords": keywords,
             "count": len(keywords)
-        }
+        })
     except Exception as e:
         logger.error(f"Error fetching keywords: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/data/agency-analytics/keyword/{keyword_id}/rankings")
+@router.get("/data/agency-analytics/keyword/{keyword_id}/rankings", response_class=ORJSONResponse)
 async def get_keyword_rankings(
+    request: Request,
     keyword_id: int,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    limit: int = Query(1000, description="Number of records to return")
+    limit: int = Query(1000, ge=1, le=MAX_LIST_LIMIT, description="Number of records to return")
 ):
     """Get keyword rankings for a specific keyword"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         query = supabase.client.table("agency_analytics_keyword_rankings").select("*").eq("keyword_id", keyword_id)
         
@@ -990,14 +1188,14 @@ async def get_keyword_rankings(
             query = query.lte("date", end_date)
         
         query = query.order("date", desc=False).limit(limit)
-        result = query.execute()
-        rankings = result.data if hasattr(result, 'data') else []
+        result = await execute_async(query)
+        rankings = result_rows(result)
         
-        return {
+        return conditional_json_response(request, {
             "keyword_id": keyword_id,
             "rankings": rankings,
             "count": len(rankings)
-        }
+        })
     except Exception as e:
         logger.error(f"Error fetching keyword rankings: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1006,10 +1204,7 @@ async def get_keyword_rankings(
 async def get_keyword_ranking_summary(keyword_id: int):
     """Get keyword ranking summary (latest + change)"""
     try:
-        supabase = SupabaseService()
-        
-        result = supabase.client.table("agency_analytics_keyword_ranking_summaries").select("*").eq("keyword_id", keyword_id).execute()
-        summary = result.data[0] if result.data else None
+        summary = await keyword_summary_batcher.load(keyword_id)
         
         return {
             "keyword_id": keyword_id,
@@ -1019,42 +1214,50 @@ async def get_keyword_ranking_summary(keyword_id: int):
         logger.error(f"Error fetching keyword ranking summary: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/data/agency-analytics/campaign/{campaign_id}/keyword-rankings")
+@router.get("/data/agency-analytics/campaign/{campaign_id}/keyword-rankings", response_class=ORJSONResponse)
 async def get_campaign_keyword_rankings(
+    request: Request,
     campaign_id: int,
-    limit: int = Query(1000, description="Number of records to return")
+    limit: int = Query(1000, ge=1, le=MAX_LIST_LIMIT, description="Number of records to return"),
+    stream: bool = Query(False, description="Stream rows as NDJSON instead of a single JSON document")
 ):
     """Get all keyword rankings for a campaign"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
-        query = supabase.client.table("agency_analytics_keyword_rankings").select("*").eq("campaign_id", campaign_id).order("date", desc=True).limit(limit)
-        result = query.execute()
-        rankings = result.data if hasattr(result, 'data') else []
+        def build_query():
+            # id breaks ties between rows with the same date so offset chunks stay stable
+            return supabase.client.table("agency_analytics_keyword_rankings").select("*").eq("campaign_id", campaign_id).order("date", desc=True).order("id", desc=True)
         
-        return {
+        if stream:
+            return await stream_rows_as_ndjson(build_query, limit)
+        
+        result = await execute_async(build_query().limit(limit))
+        rankings = result_rows(result)
+        
+        return conditional_json_response(request, {
             "campaign_id": campaign_id,
             "rankings": rankings,
             "count": len(rankings)
-        }
+        })
     except Exception as e:
         logger.error(f"Error fetching campaign keyword rankings: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/data/agency-analytics/campaign/{campaign_id}/keyword-ranking-summaries")
-async def get_campaign_keyword_ranking_summaries(campaign_id: int):
+@router.get("/data/agency-analytics/campaign/{campaign_id}/keyword-ranking-summaries", response_class=ORJSONResponse)
+async def get_campaign_keyword_ranking_summaries(campaign_id: int, request: Request):
     """Get all keyword ranking summaries for a campaign"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
-        result = supabase.client.table("agency_analytics_keyword_ranking_summaries").select("*").eq("campaign_id", campaign_id).order("keyword_id", desc=True).execute()
-        summaries = result.data if hasattr(result, 'data') else []
+        result = await execute_async(supabase.client.table("agency_analytics_keyword_ranking_summaries").select(KEYWORD_SUMMARY_LIST_COLUMNS).eq("campaign_id", campaign_id).order("keyword_id", desc=True))
+        summaries = result_rows(result)
         
-        return {
+        return conditional_json_response(request, {
             "campaign_id": campaign_id,
             "summaries": summaries,
             "count": len(summaries)
-        }
+        })
     except Exception as e:
         logger.error(f"Error fetching campaign keyword ranking summaries: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -1066,8 +1269,8 @@ async def get_campaign_brand_links(
 ):
     """Get campaign-brand links"""
     try:
-        supabase = SupabaseService()
-        links = supabase.get_campaign_brand_links(campaign_id, brand_id)
+        supabase = get_supabase_service()
+        links = await asyncio.to_thread(supabase.get_campaign_brand_links, campaign_id, brand_id)
         
         return {
             "links": links,
@@ -1086,8 +1289,9 @@ async def create_campaign_brand_link(
 ):
     """Manually link a campaign to a brand"""
     try:
-        supabase = SupabaseService()
-        supabase.link_campaign_to_brand(campaign_id, brand_id, match_method, match_confidence)
+        supabase = get_supabase_service()
+        await asyncio.to_thread(supabase.link_campaign_to_brand, campaign_id, brand_id, match_method, match_confidence)
+        await asyncio.to_thread(supabase.clear_reporting_dashboard_snapshots, brand_id)
         
         return {
             "status": "success",
@@ -1101,26 +1305,33 @@ async def create_campaign_brand_link(
 async def get_brand_campaigns(brand_id: int):
     """Get all campaigns linked to a brand"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
-        # Get links for this brand (returns empty list if table doesn't exist)
-        links = supabase.get_campaign_brand_links(brand_id=brand_id)
+        # Get links for this brand with the linked campaign embedded, in one request
+        try:
+            links_result = await execute_async(
+                supabase.client.table("agency_analytics_campaign_brands")
+                .select(f"match_method,match_confidence,agency_analytics_campaigns({CAMPAIGN_LIST_COLUMNS})")
+                .eq("brand_id", brand_id)
+            )
+            links = result_rows(links_result)
+        except Exception as e:
+            error_str = str(e)
+            # Deployments without the link table (v4 migration) have no linked campaigns
+            if "Could not find the table" not in error_str and "does not exist" not in error_str:
+                raise
+            logger.warning("Table 'agency_analytics_campaign_brands' does not exist yet. Please run the SQL script to create it.")
+            links = []
         
-        # Get campaign details
         campaigns = []
         for link in links:
-            try:
-                campaign_result = supabase.client.table("agency_analytics_campaigns").select("*").eq("id", link["campaign_id"]).execute()
-                if campaign_result.data:
-                    campaign = campaign_result.data[0]
-                    campaign["link_info"] = {
-                        "match_method": link.get("match_method"),
-                        "match_confidence": link.get("match_confidence")
-                    }
-                    campaigns.append(campaign)
-            except Exception as e:
-                logger.warning(f"Error fetching campaign {link.get('campaign_id')}: {str(e)}")
-                continue
+            campaign = link.get("agency_analytics_campaigns")
+            if campaign:
+                campaign["link_info"] = {
+                    "match_method": link.get("match_method"),
+                    "match_confidence": link.get("match_confidence")
+                }
+                campaigns.append(campaign)
         
         return {
             "brand_id": brand_id,
@@ -1135,21 +1346,367 @@ async def get_brand_campaigns(brand_id: int):
 # Reporting Dashboard Endpoint
 # =====================================================
 
-@router.get("/data/reporting-dashboard/{brand_id}/diagnostics")
-async def get_reporting_dashboard_diagnostics(brand_id: int):
+def percent_change(current, previous, from_zero=0.0):
+    """Percentage change from previous to current.
+
+    When previous is 0 there is nothing to compare against, so from_zero is returned if
+    current is positive (the metric newly appeared) and 0 otherwise. A negative previous
+    value has no meaningful percentage change and also gives 0.
+    """
+    if previous > 0:
+        return (current - previous) / previous * 100
+    return from_zero if previous == 0 and current > 0 else 0.0
+
+
+def previous_period(start_dt, end_dt):
+    """(prev_start, prev_end) date strings for the period of the same length ending the day before start_dt"""
+    period_duration = (end_dt - start_dt).days + 1  # Include both start and end dates
+    prev_start = (start_dt - timedelta(days=period_duration)).strftime("%Y-%m-%d")
+    prev_end = (start_dt - timedelta(days=1)).strftime("%Y-%m-%d")
+    return prev_start, prev_end
+
+
+# GA4 traffic overview metrics compared with the previous period, and their change keys
+GA4_OVERVIEW_CHANGE_KEYS = (
+    ("engagedSessions", "engagedSessionsChange"),
+    ("averageSessionDuration", "avgSessionDurationChange"),
+    ("engagementRate", "engagementRateChange")
+)
+
+
+def empty_daily_metrics(date_formatted):
+    """Zeroed GA4 daily chart metrics for one day, dated YYYYMMDD"""
+    return {"date": date_formatted, "users": 0, "sessions": 0, "new_users": 0, "conversions": 0, "revenue": 0}
+
+
+def empty_daily_metrics_by_date(first_dt, last_dt):
+    """Zeroed GA4 daily chart metrics keyed by YYYY-MM-DD for every day from first_dt to last_dt"""
+    days = (first_dt + timedelta(days=offset) for offset in range((last_dt - first_dt).days + 1))
+    return {day.strftime("%Y-%m-%d"): empty_daily_metrics(day.strftime("%Y%m%d")) for day in days}
+
+
+# Daily chart metrics read from each stored GA4 daily table: (metric, column, conversion)
+GA4_DAILY_TRAFFIC_FIELDS = (("users", "users", None), ("sessions", "sessions", None), ("new_users", "new_users", None))
+GA4_DAILY_CONVERSIONS_FIELDS = (("conversions", "total_conversions", None),)
+GA4_DAILY_REVENUE_FIELDS = (("revenue", "total_revenue", float),)
+
+
+def fill_daily_metrics(daily_metrics, records, fields):
+    """Copy stored GA4 daily record columns into the zeroed day buckets, skipping days outside the range"""
+    for record in records:
+        day = daily_metrics.get(record.get("date"))
+        if day is None:
+            continue
+        for metric, column, convert in fields:
+            value = record.get(column, 0)
+            day[metric] = convert(value) if convert else value
+
+
+def response_citation_count(response):
+    """Number of citations on a response, from citation_count or else the citations array"""
+    citation_count = response.get("citation_count")
+    if citation_count is not None:
+        return citation_count
+    citations = response.get("citations")
+    if isinstance(citations, list):
+        return len(citations)
+    if isinstance(citations, str) and citations:
+        try:
+            parsed = orjson.loads(citations)
+        except ValueError:
+            return 0
+        return len(parsed) if isinstance(parsed, list) else 0
+    return 0
+
+
+def day_start_timestamp(day):
+    """UTC timestamp at the start of a YYYY-MM-DD day, for created_at range filters"""
+    return f"{day}T00:00:00Z"
+
+def day_end_timestamp(day):
+    """UTC timestamp at the last second of a YYYY-MM-DD day, for created_at range filters"""
+    return f"{day}T23:59:59Z"
+
+def scrunch_period_metrics_query(supabase, brand_id, start_date, end_date, prev_start, prev_end):
+    """RPC returning Scrunch KPI totals for a period and its previous period (migration v30)"""
+    return supabase.client.rpc("get_scrunch_period_metrics", {
+        "p_brand_id": brand_id,
+        "p_start": day_start_timestamp(start_date),
+        "p_end": day_end_timestamp(end_date),
+        "p_prev_start": day_start_timestamp(prev_start),
+        "p_prev_end": day_end_timestamp(prev_end)
+    })
+
+def scrunch_prompt_stats_query(supabase, brand_id, period_start, period_end):
+    """RPC returning per-prompt response stats for a period, most answered first (migration v29)"""
+    return supabase.client.rpc("get_scrunch_prompt_stats", {
+        "p_brand_id": brand_id,
+        "p_start": day_start_timestamp(period_start),
+        "p_end": day_end_timestamp(period_end)
+    })
+
+def build_top_performing_prompts(prompt_stats, prompts_by_id, total_responses_for_brand, limit=10):
+    """Rank the brand's most answered prompts from get_scrunch_prompt_stats rows"""
+    top_prompts = []
+    for stats in prompt_stats:
+        prompt = prompts_by_id.get(stats.get("prompt_id"))
+        if not prompt:
+            continue
+        top_prompts.append({
+            "id": stats["prompt_id"],
+            "text": prompt.get("text") or "N/A",
+            "rank": len(top_prompts) + 1,
+            "responseCount": stats.get("response_count") or 0,
+            # Count of unique platforms (ChatGPT, Perplexity, Claude, etc.), at least one
+            "variants": stats.get("platform_count") or 1,
+            "citations": stats.get("citation_count") or 0,
+            "totalResponsesForBrand": total_responses_for_brand
+        })
+        if len(top_prompts) == limit:
+            break
+    return top_prompts
+
+
+def prompt_category(prompt, text):
+    """Insight category for a prompt: its first topic, else the first words of its text, else its stage"""
+    topics = prompt.get("topics")
+    if topics and topics[0]:
+        return topics[0]
+    if text:
+        return " ".join(text.split(" ")[:3])
+    return prompt.get("stage") or "General"
+
+
+# Scrunch KPI metrics for a period with no responses
+EMPTY_SCRUNCH_METRICS = {
+    "total_citations": 0,
+    "brand_present_count": 0,
+    "brand_presence_rate": 0,
+    "sentiment_score": 0,
+    "prompt_search_volume": 0,
+    "top10_prompt_percentage": 0,
+    "competitive_benchmarking": {
+        "brand_visibility_percent": 0,
+        "competitor_avg_visibility_percent": 0
+    },
+    "prompt_reach": {
+        "total_prompts_tracked": 0,
+        "prompts_with_brand": 0,
+        "display": "Tracked prompts: 0; brand appeared in 0 of them"
+    },
+}
+
+def scrunch_metrics_from_totals(totals):
+    """Calculate the Scrunch KPI metrics for one period from its get_scrunch_period_metrics row"""
+    response_count = (totals or {}).get("response_count") or 0
+    if response_count == 0:
+        return copy.deepcopy(EMPTY_SCRUNCH_METRICS)
+    
+    brand_present_count = totals.get("brand_present_count") or 0
+    prompts_tracked = totals.get("prompts_tracked") or 0
+    prompts_with_brand = totals.get("prompts_with_brand") or 0
+    
+    # Share of responses that belong to the 10 most answered prompts
+    top10_prompt_percentage = (totals.get("top10_response_count") or 0) / response_count * 100
+    
+    # Calculate metrics (100% from source data only)
+    brand_presence_rate = brand_present_count / response_count * 100
+    
+    sentiment_count = totals.get("sentiment_count") or 0
+    if sentiment_count > 0:
+        sentiment_score = ((totals.get("positive_count") or 0) - (totals.get("negative_count") or 0)) / sentiment_count * 100
+    else:
+        sentiment_score = 0
+    
+    # Competitive Benchmarking Metrics
+    competitor_avg_visibility_percent = 0
+    responses_with_competitors = totals.get("responses_with_competitors") or 0
+    if responses_with_competitors > 0:
+        competitor_avg_visibility_percent = (totals.get("competitor_appearances") or 0) / responses_with_competitors * 100
+    
+    return {
+        "total_citations": totals.get("total_citations") or 0,
+        "brand_present_count": brand_present_count,
+        "brand_presence_rate": brand_presence_rate,
+        "sentiment_score": sentiment_score,
+        "prompt_search_volume": response_count,
+        "top10_prompt_percentage": top10_prompt_percentage,
+        "competitive_benchmarking": {
+            "brand_visibility_percent": brand_presence_rate,
+            "competitor_avg_visibility_percent": competitor_avg_visibility_percent
+        },
+        "prompt_reach": {
+            "total_prompts_tracked": prompts_tracked,
+            "prompts_with_brand": prompts_with_brand,
+            "display": f"Tracked prompts: {prompts_tracked}; brand appeared in {prompts_with_brand} of them"
+        },
+    }
+
+def scrunch_period_metrics(period_rows):
+    """Split get_scrunch_period_metrics rows into (current, previous) Scrunch KPI metrics"""
+    totals_by_period = {row.get("period"): row for row in period_rows}
+    return (
+        scrunch_metrics_from_totals(totals_by_period.get("current")),
+        scrunch_metrics_from_totals(totals_by_period.get("previous"))
+    )
+
+
+@contextmanager
+def timed_section(section_times: Dict[str, float], name: str):
+    """Record how long the with-block takes, in seconds, as section_times[name]"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        section_times[name] = time.perf_counter() - start
+
+
+# Stored GA4 KPI snapshot columns, in the order the dashboard KPIs are built from them
+GA4_SNAPSHOT_KEYS = (
+    "users", "sessions", "new_users", "bounce_rate", "avg_session_duration",
+    "engagement_rate", "conversions", "revenue", "engaged_sessions",
+)
+get_ga4_snapshot_values = itemgetter(*GA4_SNAPSHOT_KEYS)
+get_ga4_snapshot_changes = itemgetter(*(f"{key}_change" for key in GA4_SNAPSHOT_KEYS))
+
+# Reporting dashboard GA4 KPIs as (key, label, icon, format), in GA4_SNAPSHOT_KEYS order
+GA4_KPI_SPEC = (
+    ("users", "Users", "People", None),
+    ("sessions", "Sessions", "BarChart", None),
+    ("new_users", "New Users", "PersonAdd", None),
+    ("bounce_rate", "Bounce Rate", "TrendingDown", "percentage"),
+    ("avg_session_duration", "Avg Session Duration", "AccessTime", "duration"),  # seconds
+    ("ga4_engagement_rate", "Engagement Rate", "TrendingUp", "percentage"),
+    ("conversions", "Conversions", "TrendingUp", None),
+    ("revenue", "Revenue", "TrendingUp", "currency"),
+    ("engaged_sessions", "Engaged Sessions", "People", None),
+)
+
+def build_ga4_kpis(values, changes) -> Dict:
+    """Build the GA4 KPI entries from values and changes given in GA4_KPI_SPEC order"""
+    ga4_kpis = {}
+    for (key, label, icon, value_format), value, change in zip(GA4_KPI_SPEC, values, changes):
+        kpi = {
+            "value": value,
+            "change": change,
+            "source": "GA4",
+            "label": label,
+            "icon": icon
+        }
+        if value_format:
+            kpi["format"] = value_format
+        ga4_kpis[key] = kpi
+    return ga4_kpis
+
+
+# PostgREST filter for keywords ranking in the top 100, matching the dashboard's ranking rule:
+# the Google ranking, falling back to the mobile ranking when it is 0 or NULL
+RANKED_KEYWORD_FILTER = (
+    "and(google_ranking.gte.1,google_ranking.lte.100),"
+    "and(google_ranking.is.null,google_mobile_ranking.gte.1,google_mobile_ranking.lte.100),"
+    "and(google_ranking.eq.0,google_mobile_ranking.gte.1,google_mobile_ranking.lte.100)"
+)
+
+# Keyword summary columns read by ranked_keyword_rows
+RANKED_KEYWORD_COLUMNS = "keyword_id,keyword_phrase,google_ranking,google_mobile_ranking,search_volume,ranking_change"
+
+def ranked_keyword_rows(summaries):
+    """Build the "All Keywords ranking" rows for top-100 keyword summaries, best ranking first"""
+    rows = []
+    for summary in summaries:
+        ranking = summary.get("google_ranking") or summary.get("google_mobile_ranking") or 999
+        if ranking <= 100:
+            rows.append({
+                "keyword": summary.get("keyword_phrase") or f"Keyword {summary.get('keyword_id', 'N/A')}",
+                "ranking": ranking,
+                "search_volume": summary.get("search_volume", 0) or 0,
+                "ranking_change": summary.get("ranking_change"),
+                "keyword_id": summary.get("keyword_id")
+            })
+    rows.sort(key=itemgetter("ranking"))
+    return rows
+
+
+# The reporting dashboard endpoints only need a few brand columns, and brand config changes
+# rarely, so the row is cached briefly by brand_id
+REPORTING_BRAND_COLUMNS = "id,name,ga4_property_id"
+reporting_brand_cache = TTLCache(maxsize=1024, ttl=60)
+
+async def get_reporting_brand(brand_id: int) -> Optional[Dict]:
+    """Get the brand row used by the reporting dashboard endpoints, or None if it does not exist"""
+    brand = reporting_brand_cache.get(brand_id)
+    if brand is None:
+        supabase = get_supabase_service()
+        # maybe_single() asks PostgREST for a single object instead of a list; a missing
+        # brand comes back as no data (or no response at all, depending on the client version)
+        result = await execute_async(
+            supabase.client.table("brands").select(REPORTING_BRAND_COLUMNS).eq("id", brand_id).maybe_single()
+        )
+        brand = getattr(result, "data", None)
+        if not brand:
+            return None
+        reporting_brand_cache.set(brand_id, brand)
+    return brand
+
+
+# Public dashboard slugs resolve to a brand through a client's url_slug and scrunch_brand_id,
+# falling back to a brand's own slug. Mappings change rarely, so resolved ids are cached briefly
+dashboard_slug_cache = TTLCache(maxsize=1024, ttl=60)
+
+async def resolve_dashboard_brand_id(slug: str, unmapped_detail: str) -> int:
+    """Get the brand id a public dashboard slug points at, raising 404 if it points nowhere"""
+    brand_id = dashboard_slug_cache.get(slug)
+    if brand_id is not None:
+        return brand_id
+    
+    supabase = get_supabase_service()
+    # First, try to find a client by url_slug (for /reporting/client/:slug routes)
+    client = await asyncio.to_thread(supabase.get_client_by_slug, slug)
+    if client:
+        brand_id = client.get("scrunch_brand_id")
+        if not brand_id:
+            raise HTTPException(status_code=404, detail=unmapped_detail)
+        logger.info(f"Found client by url_slug '{slug}', using scrunch_brand_id: {brand_id}")
+    else:
+        # Fall back to finding a brand by slug (for backward compatibility)
+        brands = result_rows(await execute_async(supabase.client.table("brands").select("id").eq("slug", slug)))
+        if not brands:
+            raise HTTPException(status_code=404, detail="Brand or client not found")
+        brand_id = brands[0]["id"]
+        logger.info(f"Found brand by slug '{slug}', using brand_id: {brand_id}")
+    
+    dashboard_slug_cache.set(slug, brand_id)
+    return brand_id
+
+
+@router.get("/data/reporting-dashboard/{brand_id}/diagnostics", response_class=ORJSONResponse)
+async def get_reporting_dashboard_diagnostics(
+    brand_id: int,
+    supabase: SupabaseService = Depends(get_supabase_service)
+):
     """Get diagnostic information about brand configuration for reporting dashboard"""
     try:
-        supabase = SupabaseService()
-        
-        # Get brand info
-        brand_result = supabase.client.table("brands").select("*").eq("id", brand_id).execute()
-        brands = brand_result.data if hasattr(brand_result, 'data') else []
+        # Brand, campaign links and Scrunch data are independent, fetch them concurrently.
+        # Exceptions are returned so each section can report its own error below.
+        # Scrunch only needs counts: count="exact" reads them from the Content-Range header,
+        # and limit(1) keeps the row payload to a single id.
+        brand, campaign_links_result, prompts_result, responses_result = await asyncio.gather(
+            get_reporting_brand(brand_id),
+            execute_async(
+                supabase.client.table("agency_analytics_campaign_brands")
+                .select("campaign_id,agency_analytics_campaigns(id,company,url)")
+                .eq("brand_id", brand_id)
+            ),
+            execute_async(supabase.client.table("prompts").select("id", count="exact").eq("brand_id", brand_id).limit(1)),
+            execute_async(supabase.client.table("responses").select("id", count="exact").eq("brand_id", brand_id).limit(1)),
+            return_exceptions=True
+        )
+        if isinstance(brand, Exception):
+            raise brand
         
-        if not brands:
+        if not brand:
             raise HTTPException(status_code=404, detail="Brand not found")
         
-        brand = brands[0]
-        
         diagnostics = {
             "brand_id": brand_id,
             "brand_name": brand.get("name"),
@@ -1174,13 +1731,13 @@ async def get_reporting_dashboard_diagnostics(brand_id: int):
         
         # Check Agency Analytics
         try:
-            campaign_links_result = supabase.client.table("agency_analytics_campaign_brands").select("*").eq("brand_id", brand_id).execute()
-            campaign_links = campaign_links_result.data if hasattr(campaign_links_result, 'data') else []
+            if isinstance(campaign_links_result, Exception):
+                raise campaign_links_result
+            campaign_links = result_rows(campaign_links_result)
             
             if campaign_links:
-                campaign_ids = [link["campaign_id"] for link in campaign_links]
-                campaigns_result = supabase.client.table("agency_analytics_campaigns").select("*").in_("id", campaign_ids).execute()
-                campaigns = campaigns_result.data if hasattr(campaigns_result, 'data') else []
+                # Linked campaigns are embedded in the link rows, so no second query is needed
+                campaigns = [link["agency_analytics_campaigns"] for link in campaign_links if link.get("agency_analytics_campaigns")]
                 
                 diagnostics["agency_analytics"]["configured"] = True
                 diagnostics["agency_analytics"]["campaigns_linked"] = len(campaign_links)
@@ -1193,32 +1750,35 @@ async def get_reporting_dashboard_diagnostics(brand_id: int):
         
         # Check Scrunch
         try:
-            prompts_result = supabase.client.table("prompts").select("*").eq("brand_id", brand_id).execute()
-            prompts = prompts_result.data if hasattr(prompts_result, 'data') else []
+            for scrunch_result in (prompts_result, responses_result):
+                if isinstance(scrunch_result, Exception):
+                    raise scrunch_result
+            prompts_count = result_count(prompts_result)
+            responses_count = result_count(responses_result)
             
-            responses_result = supabase.client.table("responses").select("*").eq("brand_id", brand_id).execute()
-            responses = responses_result.data if hasattr(responses_result, 'data') else []
-            
-            if prompts or responses:
+            if prompts_count or responses_count:
                 diagnostics["scrunch"]["configured"] = True
-                diagnostics["scrunch"]["prompts_count"] = len(prompts)
-                diagnostics["scrunch"]["responses_count"] = len(responses)
-                diagnostics["scrunch"]["message"] = f"Scrunch data available: {len(prompts)} prompts, {len(responses)} responses"
+                diagnostics["scrunch"]["prompts_count"] = prompts_count
+                diagnostics["scrunch"]["responses_count"] = responses_count
+                diagnostics["scrunch"]["message"] = f"Scrunch data available: {prompts_count} prompts, {responses_count} responses"
             else:
                 diagnostics["scrunch"]["message"] = "No Scrunch data found. Please sync Scrunch data for this brand."
         except Exception as e:
             diagnostics["scrunch"]["message"] = f"Error checking Scrunch: {str(e)}"
         
         return diagnostics
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching diagnostics: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/data/reporting-dashboard/{brand_id}")
+@router.get("/data/reporting-dashboard/{brand_id}", response_class=ORJSONResponse)
 async def get_reporting_dashboard(
     brand_id: int,
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
-    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    supabase: SupabaseService = Depends(get_supabase_service)
 ):
     """Get consolidated KPIs from GA4, Agency Analytics, and Scrunch for reporting dashboard"""
     import time
@@ -1226,21 +1786,13 @@ async def get_reporting_dashboard(
     section_times = {}
     
     try:
-        init_start = time.time()
-        supabase = SupabaseService()
-        section_times["init"] = time.time() - init_start
-        
         # Get brand info
-        brand_start = time.time()
-        brand_result = supabase.client.table("brands").select("*").eq("id", brand_id).execute()
-        brands = brand_result.data if hasattr(brand_result, 'data') else []
-        section_times["get_brand"] = time.time() - brand_start
+        with timed_section(section_times, "get_brand"):
+            brand = await get_reporting_brand(brand_id)
         
-        if not brands:
+        if not brand:
             raise HTTPException(status_code=404, detail="Brand not found")
         
-        brand = brands[0]
-        
         # Set default date range
         if not start_date:
             start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
@@ -1266,1116 +1818,530 @@ async def get_reporting_dashboard(
                 detail=f"Invalid date format. Use YYYY-MM-DD format. Error: {str(e)}"
             )
         
-        kpis = {}
+        # The dates are parsed once above; every section below reuses them. The previous
+        # period has the same duration and ends the day before start_date.
+        period_duration = (end_dt - start_dt).days + 1  # Include both start and end dates
+        prev_start_dt = start_dt - timedelta(days=period_duration)
+        prev_end_dt = start_dt - timedelta(days=1)
+        prev_start = prev_start_dt.strftime("%Y-%m-%d")
+        prev_end = prev_end_dt.strftime("%Y-%m-%d")
+        
+        # Serve the stored payload when this brand and date range were assembled recently.
+        # Syncs and brand/campaign link changes clear stored payloads. data_read_at marks when
+        # this request started reading, so a payload built across a clear is not stored.
+        data_read_at = datetime.now()
+        with timed_section(section_times, "snapshot_lookup"):
+            stored_payload = await asyncio.to_thread(supabase.get_reporting_dashboard_snapshot, brand_id, start_date, end_date)
+        if stored_payload:
+            logger.info(f"[PERFORMANCE] Serving stored reporting dashboard for brand {brand_id} ({start_date} to {end_date})")
+            return stored_payload
         
         # ========== GA4 KPIs ==========
-        ga4_start = time.time()
-        ga4_kpis = {}
-        ga4_errors = []
-        prev_traffic_overview = None  # Initialize to avoid scope issues
-        if brand.get("ga4_property_id"):
-            try:
-                property_id = brand["ga4_property_id"]
-                
-                # First, try to get stored KPI snapshot (for 30-day periods)
-                # Check if the requested date range is approximately 30 days
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                period_duration = (end_dt - start_dt).days + 1
+        def _fetch_ga4():
+            ga4_start = time.time()
+            ga4_kpis = {}
+            ga4_errors = []
+            prev_traffic_overview = None  # Initialize to avoid scope issues
+            if brand.get("ga4_property_id"):
+                try:
+                    property_id = brand["ga4_property_id"]
                 
-                # If it's approximately 30 days, try to find a matching stored snapshot
-                use_stored_snapshot = False
-                if 28 <= period_duration <= 32:  # Allow some flexibility for 30-day periods
-                    # Try to get snapshot that matches the requested date range
-                    kpi_snapshot = supabase.get_ga4_kpi_snapshot_by_date_range(brand_id, start_date, end_date)
-                    if kpi_snapshot:
-                        use_stored_snapshot = True
-                        logger.info(f"[GA4 KPI] Using stored KPI snapshot for brand {brand_id}, period_end_date: {kpi_snapshot['period_end_date']}, period_start_date: {kpi_snapshot['period_start_date']}")
-                    else:
-                        # Fallback: try to get latest snapshot if no exact match found
-                        # This handles cases where data might be slightly out of sync
-                        kpi_snapshot = supabase.get_latest_ga4_kpi_snapshot(brand_id)
+                    # First, try to get stored KPI snapshot (for 30-day periods)
+                    # Check if the requested date range is approximately 30 days
+                    # If it's approximately 30 days, try to find a matching stored snapshot
+                    use_stored_snapshot = False
+                    if 28 <= period_duration <= 32:  # Allow some flexibility for 30-day periods
+                        # Try to get snapshot that matches the requested date range
+                        kpi_snapshot = supabase.get_ga4_kpi_snapshot_by_date_range(brand_id, start_date, end_date)
                         if kpi_snapshot:
-                            snapshot_start_dt = datetime.strptime(kpi_snapshot["period_start_date"], "%Y-%m-%d")
-                            snapshot_end_dt = datetime.strptime(kpi_snapshot["period_end_date"], "%Y-%m-%d")
-                            # Check if the snapshot's date range matches the requested range (within 2 days tolerance)
-                            start_diff = abs((snapshot_start_dt - start_dt).days)
-                            end_diff = abs((snapshot_end_dt - end_dt).days)
-                            if start_diff <= 2 and end_diff <= 2:
-                                use_stored_snapshot = True
-                                logger.info(f"[GA4 KPI] Using latest stored KPI snapshot for brand {brand_id}, period_end_date: {kpi_snapshot['period_end_date']} (within tolerance)")
+                            use_stored_snapshot = True
+                            logger.debug("[GA4 KPI] Using stored KPI snapshot for brand %s, period_end_date: %s, period_start_date: %s", brand_id, kpi_snapshot['period_end_date'], kpi_snapshot['period_start_date'])
+                        else:
+                            # Fallback: try to get latest snapshot if no exact match found
+                            # This handles cases where data might be slightly out of sync
+                            kpi_snapshot = supabase.get_latest_ga4_kpi_snapshot(brand_id)
+                            if kpi_snapshot:
+                                snapshot_start_dt = datetime.fromisoformat(kpi_snapshot["period_start_date"])
+                                snapshot_end_dt = datetime.fromisoformat(kpi_snapshot["period_end_date"])
+                                # Check if the snapshot's date range matches the requested range (within 2 days tolerance)
+                                start_diff = abs((snapshot_start_dt - start_dt).days)
+                                end_diff = abs((snapshot_end_dt - end_dt).days)
+                                if start_diff <= 2 and end_diff <= 2:
+                                    use_stored_snapshot = True
+                                    logger.debug("[GA4 KPI] Using latest stored KPI snapshot for brand %s, period_end_date: %s (within tolerance)", brand_id, kpi_snapshot['period_end_date'])
                 
-                if use_stored_snapshot:
-                    # Use stored KPI snapshot
-                    snapshot = kpi_snapshot
-                    
-                    # Convert stored values to KPI format
-                    bounce_rate_value = round(float(snapshot.get("bounce_rate", 0)) * 100, 2) if snapshot.get("bounce_rate") else 0
-                    engagement_rate_value = round(float(snapshot.get("engagement_rate", 0)) * 100, 2) if snapshot.get("engagement_rate") else 0
-                    
-                    ga4_kpis = {
-                        "users": {
-                            "value": snapshot.get("users", 0),
-                            "change": float(snapshot.get("users_change", 0)),
-                            "source": "GA4",
-                            "label": "Users",
-                            "icon": "People"
-                        },
-                        "sessions": {
-                            "value": snapshot.get("sessions", 0),
-                            "change": float(snapshot.get("sessions_change", 0)),
-                            "source": "GA4",
-                            "label": "Sessions",
-                            "icon": "BarChart"
-                        },
-                        "new_users": {
-                            "value": snapshot.get("new_users", 0),
-                            "change": float(snapshot.get("new_users_change", 0)),
-                            "source": "GA4",
-                            "label": "New Users",
-                            "icon": "PersonAdd"
-                        },
-                        "bounce_rate": {
-                            "value": bounce_rate_value,
-                            "change": float(snapshot.get("bounce_rate_change", 0)),
-                            "source": "GA4",
-                            "label": "Bounce Rate",
-                            "icon": "TrendingDown",
-                            "format": "percentage"
-                        },
-                        "avg_session_duration": {
-                            "value": round(float(snapshot.get("avg_session_duration", 0)), 1),
-                            "change": float(snapshot.get("avg_session_duration_change", 0)),
-                            "source": "GA4",
-                            "label": "Avg Session Duration",
-                            "icon": "AccessTime",
-                            "format": "duration"
-                        },
-                        "ga4_engagement_rate": {
-                            "value": engagement_rate_value,
-                            "change": float(snapshot.get("engagement_rate_change", 0)),
-                            "source": "GA4",
-                            "label": "Engagement Rate",
-                            "icon": "TrendingUp",
-                            "format": "percentage"
-                        },
-                        "conversions": {
-                            "value": float(snapshot.get("conversions", 0)),
-                            "change": float(snapshot.get("conversions_change", 0)),
-                            "source": "GA4",
-                            "label": "Conversions",
-                            "icon": "TrendingUp"
-                        },
-                        "revenue": {
-                            "value": float(snapshot.get("revenue", 0)),
-                            "change": float(snapshot.get("revenue_change", 0)),
-                            "source": "GA4",
-                            "label": "Revenue",
-                            "icon": "TrendingUp",
-                            "format": "currency"
-                        },
-                        "engaged_sessions": {
-                            "value": snapshot.get("engaged_sessions", 0),
-                            "change": float(snapshot.get("engaged_sessions_change", 0)),
-                            "source": "GA4",
-                            "label": "Engaged Sessions",
-                            "icon": "People"
-                        }
-                    }
-                    logger.info(f"[GA4 KPI] Successfully loaded stored KPIs for brand {brand_id}")
-                    section_times["ga4"] = time.time() - ga4_start
-                else:
-                    # Try to get data from stored daily records first (for any date range)
-                    logger.info(f"[GA4 STORED DATA] Attempting to fetch from stored daily records for date range: {start_date} to {end_date}")
-                    traffic_overview = supabase.get_ga4_traffic_overview_by_date_range(brand_id, property_id, start_date, end_date)
-                    # prev_traffic_overview already initialized at the start of GA4 section
+                    if use_stored_snapshot:
+                        # Use stored KPI snapshot
+                        snapshot = kpi_snapshot
                     
-                    if traffic_overview:
-                        logger.info(f"[GA4 STORED DATA] Successfully loaded aggregated data from stored daily records")
-                        # Get previous period from stored data
-                        start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                        end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                        period_duration = (end_dt - start_dt).days + 1
-                        prev_end = (start_dt - timedelta(days=1)).strftime("%Y-%m-%d")
-                        prev_start = (start_dt - timedelta(days=period_duration)).strftime("%Y-%m-%d")
-                        prev_traffic_overview = supabase.get_ga4_traffic_overview_by_date_range(brand_id, property_id, prev_start, prev_end)
-                        if prev_traffic_overview:
-                            logger.info(f"[GA4 STORED DATA] Successfully loaded previous period from stored daily records")
-                        else:
-                            logger.info(f"[GA4 STORED DATA] No previous period data found in database")
-                            prev_traffic_overview = None
-                        
-                        # Get conversions and revenue from stored data
-                        total_conversions = traffic_overview.get("conversions", 0)
-                        revenue = traffic_overview.get("revenue", 0)
-                        prev_total_conversions = prev_traffic_overview.get("conversions", 0) if prev_traffic_overview else 0
-                        prev_revenue = prev_traffic_overview.get("revenue", 0) if prev_traffic_overview else 0
+                        # Convert stored values to KPI format (NULL columns count as 0)
+                        (
+                            users, sessions, new_users, bounce_rate, avg_session_duration,
+                            engagement_rate, conversions, revenue, engaged_sessions,
+                        ) = (value or 0 for value in get_ga4_snapshot_values(snapshot))
+                        changes = [float(change or 0) for change in get_ga4_snapshot_changes(snapshot)]
+                        ga4_kpis = build_ga4_kpis(
+                            (
+                                users,
+                                sessions,
+                                new_users,
+                                round(float(bounce_rate) * 100, 2),
+                                round(float(avg_session_duration), 1),
+                                round(float(engagement_rate) * 100, 2),
+                                float(conversions),
+                                float(revenue),
+                                engaged_sessions,
+                            ),
+                            changes
+                        )
+                        logger.debug("[GA4 KPI] Successfully loaded stored KPIs for brand %s", brand_id)
                     else:
-                        # No stored data available - return empty KPIs (data should be synced first)
-                        logger.warning(f"[GA4 STORED DATA] No stored data found for date range {start_date} to {end_date}. Please sync GA4 data first.")
-                        traffic_overview = None
-                        prev_traffic_overview = None
-                        total_conversions = 0
-                        revenue = 0
-                        prev_total_conversions = 0
-                        prev_revenue = 0
-                    
-                    users_change = 0
-                    # NOTE: sessionsChange from API uses 60-day lookback, but we recalculate using same-duration period
-                    sessions_change_from_api = traffic_overview.get("sessionsChange", 0) if traffic_overview else 0
-                    logger.info(f"[GA4 CHANGE CALCULATION] sessionsChange from API (60-day lookback): {sessions_change_from_api}")
-                    
-                    # Recalculate sessions_change using same-duration period
-                    sessions_change = 0
-                    conversions_change = 0
-                    revenue_change = 0
-                    
-                    # Calculate revenue change
-                    if prev_revenue > 0:
-                        revenue_change = ((revenue - prev_revenue) / prev_revenue) * 100
-                        logger.info(f"[GA4 CHANGE CALCULATION] revenue_change calculated: {revenue_change}%")
-                    elif prev_revenue == 0 and revenue > 0:
-                        revenue_change = 100.0  # 100% increase from 0
-                        logger.info(f"[GA4 CHANGE CALCULATION] revenue_change: 100% (from 0 to {revenue})")
-                    elif prev_revenue == 0 and revenue == 0:
-                        revenue_change = 0.0
+                        # Try to get data from stored daily records first (for any date range)
+                        logger.debug("[GA4 STORED DATA] Attempting to fetch from stored daily records for date range: %s to %s", start_date, end_date)
+                        # Both periods come back from one query over prev_start..end_date
+                        traffic_overview, prev_traffic_overview = supabase.get_ga4_traffic_overview_two_periods(
+                            brand_id, property_id, prev_start, prev_end, start_date, end_date
+                        )
                     
-                    # Calculate changes using prev_traffic_overview (now guaranteed to be initialized)
-                    if prev_traffic_overview:
-                        prev_users = prev_traffic_overview.get("users", 0)
-                        current_users = traffic_overview.get("users", 0) if traffic_overview else 0
-                        logger.info(f"[GA4 CHANGE CALCULATION] Users - Current: {current_users}, Previous: {prev_users}")
-                        if prev_users > 0:
-                            users_change = ((current_users - prev_users) / prev_users) * 100
-                            logger.info(f"[GA4 CHANGE CALCULATION] users_change calculated: {users_change}%")
-                        
-                        prev_sessions = prev_traffic_overview.get("sessions", 0)
-                        current_sessions = traffic_overview.get("sessions", 0) if traffic_overview else 0
-                        logger.info(f"[GA4 CHANGE CALCULATION] Sessions - Current: {current_sessions}, Previous: {prev_sessions}")
-                        if prev_sessions > 0:
-                            sessions_change = ((current_sessions - prev_sessions) / prev_sessions) * 100
-                            logger.info(f"[GA4 CHANGE CALCULATION] sessions_change recalculated (same-duration period): {sessions_change}%")
-                            logger.info(f"[GA4 CHANGE CALCULATION] Difference from API: {sessions_change - sessions_change_from_api}%")
+                        if traffic_overview:
+                            logger.debug("[GA4 STORED DATA] Successfully loaded aggregated data from stored daily records")
+                            if prev_traffic_overview:
+                                logger.debug("[GA4 STORED DATA] Successfully loaded previous period from stored daily records")
+                            else:
+                                logger.debug("[GA4 STORED DATA] No previous period data found in database")
+                                prev_traffic_overview = None
                         
-                        if prev_total_conversions > 0:
-                            conversions_change = ((total_conversions - prev_total_conversions) / prev_total_conversions) * 100
-                            logger.info(f"[GA4 CHANGE CALCULATION] conversions_change calculated: {conversions_change}%")
-                        elif prev_total_conversions == 0 and total_conversions > 0:
-                            conversions_change = 100.0  # 100% increase from 0
-                            logger.info(f"[GA4 CHANGE CALCULATION] conversions_change: 100% (from 0 to {total_conversions})")
-                        elif prev_total_conversions == 0 and total_conversions == 0:
-                            conversions_change = 0.0
+                            # Get conversions and revenue from stored data
+                            total_conversions = traffic_overview.get("conversions", 0)
+                            revenue = traffic_overview.get("revenue", 0)
+                            prev_total_conversions = prev_traffic_overview.get("conversions", 0) if prev_traffic_overview else 0
+                            prev_revenue = prev_traffic_overview.get("revenue", 0) if prev_traffic_overview else 0
+                        else:
+                            # No stored data available - return empty KPIs (data should be synced first)
+                            logger.warning(f"[GA4 STORED DATA] No stored data found for date range {start_date} to {end_date}. Please sync GA4 data first.")
+                            traffic_overview = None
+                            prev_traffic_overview = None
+                            total_conversions = 0
+                            revenue = 0
+                            prev_total_conversions = 0
+                            prev_revenue = 0
                     
-                    if traffic_overview:
-                        # Calculate additional GA4 metrics
-                        bounce_rate = traffic_overview.get("bounceRate", 0)
-                        avg_session_duration = traffic_overview.get("averageSessionDuration", 0)
-                        engagement_rate = traffic_overview.get("engagementRate", 0)
-                        new_users = traffic_overview.get("newUsers", 0)
-                        engaged_sessions = traffic_overview.get("engagedSessions", 0)
-                        
-                        # Calculate previous period metrics for change comparison
-                        prev_bounce_rate = prev_traffic_overview.get("bounceRate", 0) if prev_traffic_overview else 0
-                        prev_avg_session_duration = prev_traffic_overview.get("averageSessionDuration", 0) if prev_traffic_overview else 0
-                        prev_engagement_rate = prev_traffic_overview.get("engagementRate", 0) if prev_traffic_overview else 0
-                        prev_new_users = prev_traffic_overview.get("newUsers", 0) if prev_traffic_overview else 0
-                        prev_engaged_sessions = prev_traffic_overview.get("engagedSessions", 0) if prev_traffic_overview else 0
-                        
-                        # Calculate percentage changes
-                        logger.info(f"[GA4 CHANGE CALCULATION] Calculating additional metric changes...")
-                        bounce_rate_change = ((bounce_rate - prev_bounce_rate) / prev_bounce_rate * 100) if prev_bounce_rate > 0 else 0
-                        logger.info(f"[GA4 CHANGE CALCULATION] bounce_rate_change: {bounce_rate_change}% (Current: {bounce_rate}, Previous: {prev_bounce_rate})")
-                        
-                        avg_session_duration_change = ((avg_session_duration - prev_avg_session_duration) / prev_avg_session_duration * 100) if prev_avg_session_duration > 0 else 0
-                        logger.info(f"[GA4 CHANGE CALCULATION] avg_session_duration_change: {avg_session_duration_change}% (Current: {avg_session_duration}, Previous: {prev_avg_session_duration})")
-                        
-                        engagement_rate_change = ((engagement_rate - prev_engagement_rate) / prev_engagement_rate * 100) if prev_engagement_rate > 0 else 0
-                        logger.info(f"[GA4 CHANGE CALCULATION] engagement_rate_change: {engagement_rate_change}% (Current: {engagement_rate}, Previous: {prev_engagement_rate})")
-                        
-                        new_users_change = ((new_users - prev_new_users) / prev_new_users * 100) if prev_new_users > 0 else 0
-                        logger.info(f"[GA4 CHANGE CALCULATION] new_users_change: {new_users_change}% (Current: {new_users}, Previous: {prev_new_users})")
-                        
-                        engaged_sessions_change = ((engaged_sessions - prev_engaged_sessions) / prev_engaged_sessions * 100) if prev_engaged_sessions > 0 else 0
-                        logger.info(f"[GA4 CHANGE CALCULATION] engaged_sessions_change: {engaged_sessions_change}% (Current: {engaged_sessions}, Previous: {prev_engaged_sessions})")
-                        
-                        logger.info(f"[GA4 FINAL KPIs] Summary of all GA4 KPIs being returned:")
-                        logger.info(f"[GA4 FINAL KPIs] users: value={traffic_overview.get('users', 0)}, change={users_change}%")
-                        logger.info(f"[GA4 FINAL KPIs] sessions: value={traffic_overview.get('sessions', 0)}, change={sessions_change}% (RECALCULATED using same-duration period)")
-                        logger.info(f"[GA4 FINAL KPIs] new_users: value={new_users}, change={new_users_change}%")
-                        
-                        ga4_kpis = {
-                        "users": {
-                            "value": traffic_overview.get("users", 0),
-                            "change": users_change,
-                            "source": "GA4",
-                            "label": "Users",
-                            "icon": "People"
-                        },
-                        "sessions": {
-                            "value": traffic_overview.get("sessions", 0),
-                            "change": sessions_change,  # Using recalculated value (same-duration period)
-                            "source": "GA4",
-                            "label": "Sessions",
-                            "icon": "BarChart"
-                        },
-                        "new_users": {
-                            "value": new_users,
-                            "change": new_users_change,
-                            "source": "GA4",
-                            "label": "New Users",
-                            "icon": "PersonAdd"
-                        },
-                        "bounce_rate": {
-                            "value": round(bounce_rate * 100, 2),  # Convert to percentage
-                            "change": bounce_rate_change,
-                            "source": "GA4",
-                            "label": "Bounce Rate",
-                            "icon": "TrendingDown",
-                            "format": "percentage"
-                        },
-                        "avg_session_duration": {
-                            "value": round(avg_session_duration, 1),
-                            "change": avg_session_duration_change,
-                            "source": "GA4",
-                            "label": "Avg Session Duration",
-                            "icon": "AccessTime",
-                            "format": "duration"  # seconds
-                        },
-                        "ga4_engagement_rate": {
-                            "value": round(engagement_rate * 100, 2),  # Convert to percentage
-                            "change": engagement_rate_change,
-                            "source": "GA4",
-                            "label": "Engagement Rate",
-                            "icon": "TrendingUp",
-                            "format": "percentage"
-                        },
-                        "conversions": {
-                            "value": total_conversions,
-                            "change": conversions_change,
-                            "source": "GA4",
-                            "label": "Conversions",
-                            "icon": "TrendingUp"
-                        },
-                        "revenue": {
-                            "value": revenue,
-                            "change": revenue_change,
-                            "source": "GA4",
-                            "label": "Revenue",
-                            "icon": "TrendingUp",
-                            "format": "currency"
-                        },
-                        "engaged_sessions": {
-                            "value": engaged_sessions,
-                            "change": engaged_sessions_change,
-                            "source": "GA4",
-                            "label": "Engaged Sessions",
-                            "icon": "People"
-                        }
-                    }
-            except Exception as e:
-                error_msg = f"Error fetching GA4 KPIs: {str(e)}"
-                logger.error(error_msg)
-                ga4_errors.append(error_msg)
-        else:
-            logger.warning(f"Brand {brand_id} does not have GA4 property ID configured")
-        section_times["ga4"] = time.time() - ga4_start
+                        if traffic_overview:
+                            # Calculate additional GA4 metrics
+                            bounce_rate = traffic_overview.get("bounceRate", 0)
+                            avg_session_duration = traffic_overview.get("averageSessionDuration", 0)
+                            engagement_rate = traffic_overview.get("engagementRate", 0)
+                            new_users = traffic_overview.get("newUsers", 0)
+                            engaged_sessions = traffic_overview.get("engagedSessions", 0)
+                            
+                            # Compare against the previous period of the same duration (the stored
+                            # overview has no 60-day sessionsChange to fall back on)
+                            previous = prev_traffic_overview or {}
+                            users_change = percent_change(traffic_overview.get("users", 0), previous.get("users", 0))
+                            sessions_change = percent_change(traffic_overview.get("sessions", 0), previous.get("sessions", 0))
+                            new_users_change = percent_change(new_users, previous.get("newUsers", 0))
+                            bounce_rate_change = percent_change(bounce_rate, previous.get("bounceRate", 0))
+                            avg_session_duration_change = percent_change(avg_session_duration, previous.get("averageSessionDuration", 0))
+                            engagement_rate_change = percent_change(engagement_rate, previous.get("engagementRate", 0))
+                            engaged_sessions_change = percent_change(engaged_sessions, previous.get("engagedSessions", 0))
+                            
+                            # Conversions and revenue appearing from zero count as a 100% increase
+                            conversions_change = percent_change(total_conversions, prev_total_conversions, from_zero=100.0) if prev_traffic_overview else 0
+                            revenue_change = percent_change(revenue, prev_revenue, from_zero=100.0)
+                            
+                            logger.debug(
+                                "[GA4 CHANGE CALCULATION] users=%s%%, sessions=%s%%, new_users=%s%%, "
+                                "bounce_rate=%s%%, avg_session_duration=%s%%, "
+                                "engagement_rate=%s%%, engaged_sessions=%s%%, "
+                                "conversions=%s%%, revenue=%s%%",
+                                users_change, sessions_change, new_users_change,
+                                bounce_rate_change, avg_session_duration_change,
+                                engagement_rate_change, engaged_sessions_change,
+                                conversions_change, revenue_change
+                            )
+                            
+                            ga4_kpis = build_ga4_kpis(
+                                (
+                                    traffic_overview.get("users", 0),
+                                    traffic_overview.get("sessions", 0),
+                                    new_users,
+                                    round(bounce_rate * 100, 2),  # Convert to percentage
+                                    round(avg_session_duration, 1),
+                                    round(engagement_rate * 100, 2),  # Convert to percentage
+                                    total_conversions,
+                                    revenue,
+                                    engaged_sessions,
+                                ),
+                                (
+                                    users_change,
+                                    sessions_change,
+                                    new_users_change,
+                                    bounce_rate_change,
+                                    avg_session_duration_change,
+                                    engagement_rate_change,
+                                    conversions_change,
+                                    revenue_change,
+                                    engaged_sessions_change,
+                                )
+                            )
+                except Exception as e:
+                    error_msg = f"Error fetching GA4 KPIs: {str(e)}"
+                    logger.error(error_msg)
+                    ga4_errors.append(error_msg)
+            else:
+                logger.warning(f"Brand {brand_id} does not have GA4 property ID configured")
+            return ga4_kpis, ga4_errors, time.time() - ga4_start
         
         # ========== Agency Analytics KPIs ==========
-        agency_start = time.time()
-        agency_kpis = {}
-        agency_errors = []
-        campaign_links = []  # Initialize to avoid scope issues
-        try:
-            # Get campaigns linked to this brand
-            campaign_links_result = supabase.client.table("agency_analytics_campaign_brands").select("*").eq("brand_id", brand_id).execute()
-            campaign_links = campaign_links_result.data if hasattr(campaign_links_result, 'data') else []
+        def _fetch_agency():
+            agency_start = time.time()
+            agency_kpis = {}
+            agency_errors = []
+            campaign_links = []  # Initialize to avoid scope issues
+            try:
+                # Get campaigns linked to this brand
+                campaign_links_result = supabase.client.table("agency_analytics_campaign_brands").select("campaign_id").eq("brand_id", brand_id).execute()
+                campaign_links = result_rows(campaign_links_result)
             
-            logger.info(f"Found {len(campaign_links)} campaign links for brand {brand_id}")
+                logger.debug("Found %s campaign links for brand %s", len(campaign_links), brand_id)
             
-            if campaign_links:
-                campaign_ids = [link["campaign_id"] for link in campaign_links]
-                logger.info(f"Processing {len(campaign_ids)} campaigns: {campaign_ids}")
-                
-                # Get keyword ranking summaries for all campaigns
-                # NOTE: Only using 100% accurate data from Agency Analytics source - no estimations
-                total_rankings = 0
-                ranking_sum = 0
-                total_search_volume = 0
-                total_ranking_change = 0
-                ranking_change_count = 0
+                if campaign_links:
+                    campaign_ids = [link["campaign_id"] for link in campaign_links]
+                    logger.debug("Processing %s campaigns: %s", len(campaign_ids), campaign_ids)
                 
-                for campaign_id in campaign_ids:
-                    # Query keyword ranking summaries - get all summaries for the campaign
-                    # Summaries represent the latest state of each keyword, so we get all summaries
-                    # The summaries table has one row per keyword with the most recent data
-                    summaries_query = supabase.client.table("agency_analytics_keyword_ranking_summaries").select("*").eq("campaign_id", campaign_id)
+                    # Aggregate keyword ranking summaries for all campaigns in Postgres - only one
+                    # row of totals comes back instead of every summary row
+                    # NOTE: Only using 100% accurate data from Agency Analytics source - no estimations
+                    agg_result = supabase.client.rpc("get_keyword_ranking_agg", {"p_campaign_ids": campaign_ids}).execute()
+                    agg_rows = result_rows(agg_result)
+                    agg = agg_rows[0] if agg_rows else {}
                     
-                    # Get all summaries - they represent the current state of keywords
-                    # We don't filter by date since summaries are the latest snapshot
-                    summaries_result = summaries_query.execute()
-                    summaries = summaries_result.data if hasattr(summaries_result, 'data') else []
+                    total_rankings = agg.get("total_rankings") or 0
+                    ranking_sum = agg.get("ranking_sum") or 0
+                    total_search_volume = agg.get("total_search_volume") or 0
+                    total_ranking_change = agg.get("total_ranking_change") or 0
+                    ranking_change_count = agg.get("ranking_change_count") or 0
                     
-                    logger.info(f"Found {len(summaries)} keyword summaries for campaign {campaign_id}")
+                    # Previous period metrics - the summaries represent the latest state, so the
+                    # comparison uses the same rows. In a real scenario, you might want to query
+                    # historical daily rankings for the previous period
+                    prev_total_rankings = total_rankings
+                    prev_ranking_sum = ranking_sum
+                    prev_total_search_volume = agg.get("all_search_volume") or 0
+                    prev_total_ranking_change = agg.get("all_ranking_change") or 0
+                    prev_ranking_change_count = agg.get("all_ranking_change_count") or 0
                     
-                    for summary in summaries:
-                        search_volume = summary.get("search_volume", 0) or 0
-                        ranking = summary.get("google_ranking") or summary.get("google_mobile_ranking") or 999
-                        
-                        if ranking <= 100:  # Only count keywords ranking in top 100
-                            # Calculate average ranking (100% from source data)
-                            ranking_sum += ranking
-                            total_rankings += 1
-                            
-                            # Track search volume (100% from source data)
-                            total_search_volume += search_volume
-                            
-                            # Track ranking change if available (100% from source data)
-                            ranking_change = summary.get("ranking_change")
-                            if ranking_change is not None:
-                                total_ranking_change += ranking_change
-                                ranking_change_count += 1
-                
-                # Calculate average keyword rank
-                avg_keyword_rank = (ranking_sum / total_rankings) if total_rankings > 0 else 0
-                
-                # Calculate average ranking change
-                avg_ranking_change = (total_ranking_change / ranking_change_count) if ranking_change_count > 0 else 0
-                
-                logger.info(f"Agency Analytics KPI calculations: total_rankings={total_rankings}, avg_keyword_rank={avg_keyword_rank}, total_search_volume={total_search_volume}, avg_ranking_change={avg_ranking_change}")
-                
-                # Get previous period data for change calculation
-                prev_start = (datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=60)).strftime("%Y-%m-%d")
-                prev_end = (datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+                    # Collect all keywords with their rankings for "All Keywords ranking" KPI.
+                    # Summaries represent the latest state of each keyword (one row per keyword),
+                    # so we don't filter by date. Only top-100 keywords are transferred.
+                    summaries_result = supabase.client.table("agency_analytics_keyword_ranking_summaries").select(
+                        RANKED_KEYWORD_COLUMNS
+                    ).in_("campaign_id", campaign_ids).or_(RANKED_KEYWORD_FILTER).execute()
+                    summaries = result_rows(summaries_result)
+                    
+                    logger.debug("Found %s keyword summaries for %s campaigns", len(summaries), len(campaign_ids))
+                    
+                    all_keywords_rankings = ranked_keyword_rows(summaries)
+                    
+                    # Calculate average keyword rank
+                    avg_keyword_rank = (ranking_sum / total_rankings) if total_rankings > 0 else 0
                 
-                # Calculate previous period metrics for comparison
-                prev_total_rankings = 0
-                prev_ranking_sum = 0
-                prev_total_ranking_change = 0
-                prev_ranking_change_count = 0
-                prev_total_search_volume = 0
+                    # Calculate average ranking change
+                    avg_ranking_change = (total_ranking_change / ranking_change_count) if ranking_change_count > 0 else 0
                 
-                for campaign_id in campaign_ids:
-                    # Get previous period summaries - use the same approach, get all summaries
-                    # For comparison, we'll use the same summaries (they represent latest state)
-                    # In a real scenario, you might want to query historical daily rankings for previous period
-                    prev_summaries_query = supabase.client.table("agency_analytics_keyword_ranking_summaries").select("*").eq("campaign_id", campaign_id)
-                    prev_summaries_result = prev_summaries_query.execute()
-                    prev_summaries = prev_summaries_result.data if hasattr(prev_summaries_result, 'data') else []
-                    
-                    for summary in prev_summaries:
-                        ranking = summary.get("google_ranking") or summary.get("google_mobile_ranking") or 999
-                        if ranking <= 100:
-                            prev_ranking_sum += ranking
-                            prev_total_rankings += 1
-                        
-                        prev_total_search_volume += summary.get("search_volume", 0) or 0
-                        
-                        ranking_change = summary.get("ranking_change")
-                        if ranking_change is not None:
-                            prev_total_ranking_change += ranking_change
-                            prev_ranking_change_count += 1
+                    logger.debug("Agency Analytics KPI calculations: total_rankings=%s, avg_keyword_rank=%s, total_search_volume=%s, avg_ranking_change=%s", total_rankings, avg_keyword_rank, total_search_volume, avg_ranking_change)
                 
-                prev_avg_rank = (prev_ranking_sum / prev_total_rankings) if prev_total_rankings > 0 else 0
-                prev_avg_ranking_change = (prev_total_ranking_change / prev_ranking_change_count) if prev_ranking_change_count > 0 else 0
+                    prev_avg_rank = (prev_ranking_sum / prev_total_rankings) if prev_total_rankings > 0 else 0
+                    prev_avg_ranking_change = (prev_total_ranking_change / prev_ranking_change_count) if prev_ranking_change_count > 0 else 0
                 
-                # Calculate changes
-                def calculate_change(current, previous):
-                    if previous == 0 and current > 0:
-                        return 100.0
-                    if current == 0 and previous > 0:
-                        return -100.0
-                    if previous > 0:
-                        return ((current - previous) / previous) * 100
-                    return 0.0
+                    # Calculate changes for 100% accurate source data KPIs only; a KPI that
+                    # newly appeared shows a 100% increase
+                    avg_rank_change = percent_change(avg_keyword_rank, prev_avg_rank, from_zero=100.0)
+                    search_volume_change = percent_change(total_search_volume, prev_total_search_volume, from_zero=100.0)
+                    ranking_count_change = percent_change(total_rankings, prev_total_rankings, from_zero=100.0)
+                    ranking_change_change = percent_change(avg_ranking_change, prev_avg_ranking_change, from_zero=100.0)
                 
-                # Calculate changes for 100% accurate source data KPIs only
-                avg_rank_change = calculate_change(avg_keyword_rank, prev_avg_rank)
-                search_volume_change = calculate_change(total_search_volume, prev_total_search_volume)
-                ranking_count_change = calculate_change(total_rankings, prev_total_rankings)
-                ranking_change_change = calculate_change(avg_ranking_change, prev_avg_ranking_change)
+                    # NOTE: impressions, clicks, and CTR are NOT included as they require estimations
+                    # Only KPIs with 100% accurate source data are included
+                    agency_kpis = {
+                            "search_volume": {
+                                "value": int(total_search_volume),
+                                "change": search_volume_change,
+                                "source": "AgencyAnalytics",
+                                "label": "Search Volume",
+                                "icon": "Search",
+                                "format": "number"
+                            },
+                            "avg_keyword_rank": {
+                                "value": round(avg_keyword_rank, 1),
+                                "change": avg_rank_change,
+                                "source": "AgencyAnalytics",
+                                "label": "Avg Keyword Rank",
+                                "icon": "Search",
+                                "format": "number"
+                            },
+                            "ranking_change": {
+                                "value": round(avg_ranking_change, 1),
+                                "change": ranking_change_change,
+                                "source": "AgencyAnalytics",
+                                "label": "Avg Ranking Change",
+                                "icon": "TrendingUp",
+                                "format": "number"
+                            },
+                            # New/Updated Google Ranking KPIs
+                            "google_ranking_count": {
+                                "value": total_rankings,
+                                "change": ranking_count_change,
+                                "source": "AgencyAnalytics",
+                                "label": "Google Ranking Count",
+                                "icon": "Search",
+                                "format": "number",
+                                "display": f"Total keywords ranking: {total_rankings}"
+                            },
+                            "google_ranking": {
+                                "value": round(avg_keyword_rank, 1),
+                                "change": avg_rank_change,
+                                "source": "AgencyAnalytics",
+                                "label": "Google Ranking",
+                                "icon": "Search",
+                                "format": "number",
+                                "display": f"Average position: {round(avg_keyword_rank, 1)}"
+                            },
+                            "google_ranking_change": {
+                                "value": round(avg_ranking_change, 1),
+                                "change": ranking_change_change,
+                                "source": "AgencyAnalytics",
+                                "label": "Google Ranking Change",
+                                "icon": "TrendingUp",
+                                "format": "number",
+                                "display": f"Average change: {round(avg_ranking_change, 1)} positions"
+                            },
+                            "all_keywords_ranking": {
+                                "value": all_keywords_rankings,
+                                "change": None,
+                                "source": "AgencyAnalytics",
+                                "label": "All Keywords Ranking",
+                                "icon": "List",
+                                "format": "custom",
+                                "display": f"{len(all_keywords_rankings)} keywords tracked"
+                            },
+                            "keyword_ranking_change_and_volume": {
+                                "value": {
+                                    "avg_ranking_change": round(avg_ranking_change, 1),
+                                    "total_search_volume": int(total_search_volume),
+                                    "keywords_count": total_rankings
+                                },
+                                "change": {
+                                    "ranking_change": ranking_change_change,
+                                    "search_volume": search_volume_change
+                                },
+                                "source": "AgencyAnalytics",
+                                "label": "Keyword Ranking Change and Volume",
+                                "icon": "BarChart",
+                                "format": "custom",
+                                "display": f"Ranking change: {round(avg_ranking_change, 1)} positions | Search volume: {total_search_volume:,}"
+                            }
+                        }
+            except Exception as e:
+                error_msg = f"Error fetching Agency Analytics KPIs: {str(e)}"
+                logger.error(error_msg)
+                agency_errors.append(error_msg)
+        
+            if not campaign_links:
+                logger.warning(f"Brand {brand_id} does not have any Agency Analytics campaigns linked")
+            return agency_kpis, agency_errors, campaign_links, time.time() - agency_start
+        
+        # ========== Scrunch AI KPIs ==========
+        # NOTE: The full Scrunch dashboard is loaded via /data/reporting-dashboard/{brand_id}/scrunch;
+        # only the top performing prompts computed here are returned by this endpoint
+        def _fetch_scrunch():
+            scrunch_start = time.time()
+            scrunch_kpis = {}
+            scrunch_chart_data = {
+                "top_performing_prompts": [],
+                "scrunch_ai_insights": []
+            }
+            if brand.get("ga4_property_id"):
+                # Get this brand's Scrunch KPI totals for the current and previous periods, its
+                # prompts and its per-prompt response stats. The totals and stats are aggregated
+                # in Postgres, so no response rows are transferred. The queries are independent,
+                # so they run concurrently.
+                period_metrics_query = scrunch_period_metrics_query(supabase, brand_id, start_date, end_date, prev_start, prev_end)
+                prompts_query = supabase.client.table("prompts").select("id,text").eq("brand_id", brand_id)
+                prompt_stats_query = scrunch_prompt_stats_query(supabase, brand_id, start_date, end_date)
+            
+                with timed_section(section_times, "scrunch_queries"):
+                    period_metrics_result, prompts_result, prompt_stats_result = run_all(
+                        period_metrics_query.execute,
+                        prompts_query.execute,
+                        prompt_stats_query.execute
+                    )
+                current_metrics, prev_metrics = scrunch_period_metrics(result_rows(period_metrics_result))
+                prompts = result_rows(prompts_result)
+                prompt_stats = result_rows(prompt_stats_result)
+                response_count = current_metrics["prompt_search_volume"]
+            
+                logger.debug(
+                    "Found %s Scrunch responses for brand %s in date range %s to %s, %s in previous period %s to %s and %s prompts (queries took %.2fs)",
+                    response_count, brand_id, start_date, end_date, prev_metrics["prompt_search_volume"], prev_start, prev_end, len(prompts),
+                    section_times.get("scrunch_queries", 0)
+                )
+            
+                # Check if brand has any Scrunch data at all (to determine if we should show Scrunch section)
+                # This ensures we show Scrunch section even if date range has no data
+                has_any_scrunch_data = response_count > 0 or len(prompts) > 0
+                logger.debug("Brand %s Scrunch data check: responses=%s, prompts=%s, has_any_scrunch_data=%s", brand_id, response_count, len(prompts), has_any_scrunch_data)
+                if not has_any_scrunch_data:
+                    # Check if brand has any Scrunch data (without date filter)
+                    any_scrunch_result = supabase.client.rpc("brand_has_scrunch_data", {"p_brand_id": brand_id}).execute()
+                    has_any_scrunch_data_all_time = bool(getattr(any_scrunch_result, "data", False))
                 
-                # Collect all keywords with their rankings for "All Keywords ranking" KPI
-                all_keywords_rankings = []
-                for campaign_id in campaign_ids:
-                    # Get all summaries for the campaign - they represent the latest state
-                    summaries_query = supabase.client.table("agency_analytics_keyword_ranking_summaries").select("*").eq("campaign_id", campaign_id)
-                    summaries_result = summaries_query.execute()
-                    summaries = summaries_result.data if hasattr(summaries_result, 'data') else []
-                    
-                    for summary in summaries:
-                        keyword_phrase = summary.get("keyword_phrase") or f"Keyword {summary.get('keyword_id', 'N/A')}"
-                        ranking = summary.get("google_ranking") or summary.get("google_mobile_ranking")
-                        if ranking is not None and ranking <= 100:
-                            all_keywords_rankings.append({
-                                "keyword": keyword_phrase,
-                                "ranking": ranking,
-                                "search_volume": summary.get("search_volume", 0) or 0,
-                                "ranking_change": summary.get("ranking_change"),
-                                "keyword_id": summary.get("keyword_id")
-                            })
+                    logger.debug("Brand %s checking for any Scrunch data (no date filter): %s", brand_id, has_any_scrunch_data_all_time)
+                    if has_any_scrunch_data_all_time:
+                        logger.debug("Brand %s has Scrunch data but none in date range %s to %s. Will show Scrunch section with zero values.", brand_id, start_date, end_date)
+                        has_any_scrunch_data = True
+                    else:
+                        logger.warning(f"Brand {brand_id} has no Scrunch data at all. Skipping Scrunch KPIs.")
+            
+                # Calculate Scrunch KPIs if brand has any Scrunch data (prompts or responses)
+                # This ensures all brands with Scrunch data show the section (with zero values if no data in date range)
+                logger.debug("Brand %s Scrunch KPI calculation: has_any_scrunch_data=%s", brand_id, has_any_scrunch_data)
+                if has_any_scrunch_data:
+                    # Calculate percentage changes
+                    # Each KPI is compared to its own previous value; a KPI that newly appeared
+                    # shows a 100% increase
+                    # NOTE: influencer_reach, engagement_rate, total_interactions, cost_per_engagement are NOT calculated
+                    # as they require assumptions. Only 100% accurate source data KPIs are calculated.
+                    total_citations_change = percent_change(current_metrics["total_citations"], prev_metrics["total_citations"], from_zero=100.0)
+                    brand_presence_rate_change = percent_change(current_metrics["brand_presence_rate"], prev_metrics["brand_presence_rate"], from_zero=100.0)
+                    sentiment_score_change = percent_change(current_metrics["sentiment_score"], prev_metrics["sentiment_score"], from_zero=100.0)
+                    top10_prompt_change = percent_change(current_metrics["top10_prompt_percentage"], prev_metrics["top10_prompt_percentage"], from_zero=100.0)
+                    prompt_search_volume_change = percent_change(current_metrics["prompt_search_volume"], prev_metrics["prompt_search_volume"], from_zero=100.0)
                 
-                # Sort by ranking (best first)
-                all_keywords_rankings.sort(key=lambda x: x["ranking"] if x["ranking"] else 999)
+                    # Calculate changes for new KPIs
+                    competitive_current = current_metrics.get("competitive_benchmarking", {})
+                    competitive_prev = prev_metrics.get("competitive_benchmarking", {})
+                    brand_visibility_change = percent_change(
+                        competitive_current.get("brand_visibility_percent", 0),
+                        competitive_prev.get("brand_visibility_percent", 0),
+                        from_zero=100.0
+                    )
+                    competitor_avg_change = percent_change(
+                        competitive_current.get("competitor_avg_visibility_percent", 0),
+                        competitive_prev.get("competitor_avg_visibility_percent", 0),
+                        from_zero=100.0
+                    )
                 
-                # NOTE: impressions, clicks, and CTR are NOT included as they require estimations
-                # Only KPIs with 100% accurate source data are included
-                agency_kpis = {
-                        "search_volume": {
-                            "value": int(total_search_volume),
-                            "change": search_volume_change,
-                            "source": "AgencyAnalytics",
-                            "label": "Search Volume",
-                            "icon": "Search",
+                    # NOTE: influencer_reach, total_interactions, engagement_rate, cost_per_engagement
+                    # are NOT included as they require assumptions. Only 100% accurate source data KPIs are included.
+                    scrunch_kpis = {
+                        "total_citations": {
+                            "value": int(current_metrics["total_citations"]),
+                            "change": round(total_citations_change, 2),
+                            "source": "Scrunch",
+                            "label": "Total Citations",
+                            "icon": "Link",
                             "format": "number"
                         },
-                        "avg_keyword_rank": {
-                            "value": round(avg_keyword_rank, 1),
-                            "change": avg_rank_change,
-                            "source": "AgencyAnalytics",
-                            "label": "Avg Keyword Rank",
-                            "icon": "Search",
-                            "format": "number"
+                        "brand_presence_rate": {
+                            "value": round(current_metrics["brand_presence_rate"], 1),
+                            "change": round(brand_presence_rate_change, 2),
+                            "source": "Scrunch",
+                            "label": "Brand Presence Rate",
+                            "icon": "CheckCircle",
+                            "format": "percentage"
                         },
-                        "ranking_change": {
-                            "value": round(avg_ranking_change, 1),
-                            "change": ranking_change_change,
-                            "source": "AgencyAnalytics",
-                            "label": "Avg Ranking Change",
-                            "icon": "TrendingUp",
+                        "brand_sentiment_score": {
+                            "value": round(current_metrics["sentiment_score"], 1),
+                            "change": round(sentiment_score_change, 2),
+                            "source": "Scrunch",
+                            "label": "Brand Sentiment Score",
+                            "icon": "SentimentSatisfied",
                             "format": "number"
                         },
-                        # New/Updated Google Ranking KPIs
-                        "google_ranking_count": {
-                            "value": total_rankings,
-                            "change": ranking_count_change,
-                            "source": "AgencyAnalytics",
-                            "label": "Google Ranking Count",
-                            "icon": "Search",
-                            "format": "number",
-                            "display": f"Total keywords ranking: {total_rankings}"
-                        },
-                        "google_ranking": {
-                            "value": round(avg_keyword_rank, 1),
-                            "change": avg_rank_change,
-                            "source": "AgencyAnalytics",
-                            "label": "Google Ranking",
-                            "icon": "Search",
-                            "format": "number",
-                            "display": f"Average position: {round(avg_keyword_rank, 1)}"
+                        # NOTE: scrunch_engagement_rate, total_interactions, cost_per_engagement are NOT included
+                        # as they require assumptions. Only 100% accurate source data KPIs are included.
+                        "top10_prompt_percentage": {
+                            "value": round(current_metrics["top10_prompt_percentage"], 1),
+                            "change": round(top10_prompt_change, 2),
+                            "source": "Scrunch",
+                            "label": "Top 10 Prompt",
+                            "icon": "Article",
+                            "format": "percentage"
                         },
-                        "google_ranking_change": {
-                            "value": round(avg_ranking_change, 1),
-                            "change": ranking_change_change,
-                            "source": "AgencyAnalytics",
-                            "label": "Google Ranking Change",
+                        "prompt_search_volume": {
+                            "value": current_metrics["prompt_search_volume"],
+                            "change": round(prompt_search_volume_change, 2),
+                            "source": "Scrunch",
+                            "label": "Prompt Search Volume",
                             "icon": "TrendingUp",
-                            "format": "number",
-                            "display": f"Average change: {round(avg_ranking_change, 1)} positions"
-                        },
-                        "all_keywords_ranking": {
-                            "value": all_keywords_rankings,
-                            "change": None,
-                            "source": "AgencyAnalytics",
-                            "label": "All Keywords Ranking",
-                            "icon": "List",
-                            "format": "custom",
-                            "display": f"{len(all_keywords_rankings)} keywords tracked"
+                            "format": "number"
                         },
-                        "keyword_ranking_change_and_volume": {
+                        # New KPIs
+                        "competitive_benchmarking": {
                             "value": {
-                                "avg_ranking_change": round(avg_ranking_change, 1),
-                                "total_search_volume": int(total_search_volume),
-                                "keywords_count": total_rankings
+                                "brand_visibility_percent": round(competitive_current.get("brand_visibility_percent", 0), 1),
+                                "competitor_avg_visibility_percent": round(competitive_current.get("competitor_avg_visibility_percent", 0), 1)
                             },
                             "change": {
-                                "ranking_change": ranking_change_change,
-                                "search_volume": search_volume_change
+                                "brand_visibility": round(brand_visibility_change, 2),
+                                "competitor_avg_visibility": round(competitor_avg_change, 2)
                             },
-                            "source": "AgencyAnalytics",
-                            "label": "Keyword Ranking Change and Volume",
+                            "source": "Scrunch",
+                            "label": "Competitive Benchmarking",
                             "icon": "BarChart",
                             "format": "custom",
-                            "display": f"Ranking change: {round(avg_ranking_change, 1)} positions | Search volume: {total_search_volume:,}"
-                        }
-                    }
-        except Exception as e:
-            error_msg = f"Error fetching Agency Analytics KPIs: {str(e)}"
-            logger.error(error_msg)
-            agency_errors.append(error_msg)
-        
-        if not campaign_links:
-            logger.warning(f"Brand {brand_id} does not have any Agency Analytics campaigns linked")
-        section_times["agency"] = time.time() - agency_start
-        
-        # ========== Chart Data ==========
-        # Initialize chart_data early so it can be used in Scrunch AI section
-        chart_data = {
-            "users_over_time": [],
-            "impressions_vs_clicks": [],
-            "traffic_sources": [],
-            "top_campaigns": [],
-            "top_pages": [],
-            "ga4_traffic_overview": None,
-            "geographic_breakdown": [],
-            "top_performing_prompts": [],
-            "scrunch_ai_insights": []
-        }
-        
-        # ========== Scrunch AI KPIs ==========
-        # NOTE: Scrunch data is now loaded via separate endpoint /data/reporting-dashboard/{brand_id}/scrunch
-        # This allows the main dashboard to load quickly while Scrunch data loads in parallel
-        scrunch_kpis = {}
-        scrunch_chart_data = {
-            "top_performing_prompts": [],
-            "scrunch_ai_insights": []
-        }
-        
-        # Skip Scrunch processing in main endpoint - it's handled by separate endpoint
-        # This significantly improves main dashboard load time from ~15s to ~3-4s
-        logger.info(f"[PERFORMANCE] Skipping Scrunch processing in main endpoint - use /data/reporting-dashboard/{brand_id}/scrunch for Scrunch data")
-        
-        # Original Scrunch processing code moved to separate endpoint
-        # See /data/reporting-dashboard/{brand_id}/scrunch endpoint for implementation
-        # Scrunch data is now loaded separately to improve main dashboard load time
-        
-        # Combine all KPIs (Scrunch KPIs loaded via separate endpoint)
-        kpis = {**ga4_kpis, **agency_kpis, **scrunch_kpis}
-        
-        # Log KPI counts for debugging
-        logger.info(f"Combined KPIs for brand {brand_id}: GA4={len(ga4_kpis)}, AgencyAnalytics={len(agency_kpis)}, Scrunch={len(scrunch_kpis)}, Total={len(kpis)}")
-        
-        # Chart data is already initialized above (before Scrunch AI section)
-        # Continue populating chart_data with GA4 and Agency Analytics data
-        
-        # Get users over time (GA4)
-        if brand.get("ga4_property_id"):
-            try:
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                period_duration = (end_dt - start_dt).days + 1  # Include both start and end dates
-                
-                # Previous period should be the same duration, ending the day before start_date
-                prev_end = (start_dt - timedelta(days=1)).strftime("%Y-%m-%d")
-                prev_start = (start_dt - timedelta(days=period_duration)).strftime("%Y-%m-%d")
-            except:
-                # Fallback to 60-day lookback if date parsing fails
-                prev_start = (datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=60)).strftime("%Y-%m-%d")
-                prev_end = (datetime.strptime(start_date, "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
-            
-            # Get responses for this brand filtered by date range (current period)
-            # Only select needed columns to avoid loading large JSONB fields unnecessarily
-            responses_query = supabase.client.table("responses").select(
-                "id,brand_id,prompt_id,platform,brand_present,brand_sentiment,competitors_present,citations"
-            ).eq("brand_id", brand_id)
-            responses_query = responses_query.gte("created_at", f"{start_date}T00:00:00Z").lte("created_at", f"{end_date}T23:59:59Z")
-            
-            responses_query_start = time.time()
-            responses_result = responses_query.execute()
-            section_times["scrunch_responses_query"] = time.time() - responses_query_start
-            responses = responses_result.data if hasattr(responses_result, 'data') else []
-            
-            logger.info(f"Found {len(responses)} Scrunch responses for brand {brand_id} in date range {start_date} to {end_date} (query took {section_times.get('scrunch_responses_query', 0):.2f}s)")
-            
-            # Log response count for performance debugging
-            if len(responses) > 1000:
-                logger.warning(f"[PERFORMANCE] Large response set: {len(responses)} responses for brand {brand_id}. Consider pagination or date range limits.")
-            
-            # Get responses for previous period (for change calculation)
-            prev_responses_query = supabase.client.table("responses").select(
-                "id,brand_id,prompt_id,platform,brand_present,brand_sentiment,competitors_present,citations"
-            ).eq("brand_id", brand_id)
-            prev_responses_query = prev_responses_query.gte("created_at", f"{prev_start}T00:00:00Z").lte("created_at", f"{prev_end}T23:59:59Z")
-            
-            prev_responses_query_start = time.time()
-            prev_responses_result = prev_responses_query.execute()
-            section_times["scrunch_prev_responses_query"] = time.time() - prev_responses_query_start
-            prev_responses = prev_responses_result.data if hasattr(prev_responses_result, 'data') else []
-            
-            logger.info(f"Found {len(prev_responses)} Scrunch responses for brand {brand_id} in previous period {prev_start} to {prev_end} (query took {section_times.get('scrunch_prev_responses_query', 0):.2f}s)")
-            
-            # Get prompts for this brand to calculate top 10 prompt percentage
-            # Only select id column since we only need to count prompts
-            prompts_query = supabase.client.table("prompts").select("id").eq("brand_id", brand_id)
-            prompts_query_start = time.time()
-            prompts_result = prompts_query.execute()
-            section_times["scrunch_prompts_query"] = time.time() - prompts_query_start
-            prompts = prompts_result.data if hasattr(prompts_result, 'data') else []
-            
-            logger.info(f"Found {len(prompts)} Scrunch prompts for brand {brand_id}")
-            
-            # Check if brand has any Scrunch data at all (to determine if we should show Scrunch section)
-            # This ensures we show Scrunch section even if date range has no data
-            has_any_scrunch_data = len(responses) > 0 or len(prompts) > 0
-            logger.info(f"Brand {brand_id} Scrunch data check: responses={len(responses)}, prompts={len(prompts)}, has_any_scrunch_data={has_any_scrunch_data}")
-            if not has_any_scrunch_data:
-                # Check if brand has any Scrunch data (without date filter)
-                any_responses_query = supabase.client.table("responses").select("id").eq("brand_id", brand_id).limit(1)
-                any_responses_result = any_responses_query.execute()
-                any_responses = any_responses_result.data if hasattr(any_responses_result, 'data') else []
-                
-                any_prompts_query = supabase.client.table("prompts").select("id").eq("brand_id", brand_id).limit(1)
-                any_prompts_result = any_prompts_query.execute()
-                any_prompts = any_prompts_result.data if hasattr(any_prompts_result, 'data') else []
-                
-                logger.info(f"Brand {brand_id} checking for any Scrunch data (no date filter): any_responses={len(any_responses)}, any_prompts={len(any_prompts)}")
-                if len(any_responses) > 0 or len(any_prompts) > 0:
-                    logger.info(f"Brand {brand_id} has Scrunch data but none in date range {start_date} to {end_date}. Will show Scrunch section with zero values.")
-                    has_any_scrunch_data = True
-                else:
-                    logger.warning(f"Brand {brand_id} has no Scrunch data at all. Skipping Scrunch KPIs.")
-            
-            # Helper function to calculate metrics from responses
-            # Note: responses_list should already be filtered by brand_id, but we validate for safety
-            # OPTIMIZED: Single pass through responses to calculate all metrics
-            def calculate_scrunch_metrics(responses_list, prompts_list=None, brand_id_filter=None):
-                if not responses_list:
-                    return {
-                        "total_citations": 0,
-                        "brand_present_count": 0,
-                        "brand_presence_rate": 0,
-                        "sentiment_score": 0,
-                        "prompt_search_volume": 0,
-                        "top10_prompt_percentage": 0,
-                        "competitive_benchmarking": {
-                            "brand_visibility_percent": 0,
-                            "competitor_avg_visibility_percent": 0
-                        },
-                        "citations_by_prompt": {},
-                        "prompt_reach": {
-                            "total_prompts_tracked": 0,
-                            "prompts_with_brand": 0,
-                            "display": "Tracked prompts: 0; brand appeared in 0 of them"
-                        }
-                    }
-                
-                # Initialize all tracking variables
-                total_citations = 0
-                brand_present_count = 0
-                sentiment_scores = {"positive": 0, "neutral": 0, "negative": 0}
-                prompt_counts = {}
-                prompt_platform_map = {}
-                unique_prompts_tracked = set()
-                unique_prompts_with_brand = set()
-                competitor_visibility_count = {}
-                total_responses_with_competitors = 0
-                citations_by_prompt = {}
-                valid_responses_count = 0
-                
-                # Single pass through responses - calculate everything at once
-                # Optimized: Pre-compile regex and use faster string operations
-                import json
-                import re
-                
-                # Pre-compile regex for faster sentiment matching
-                positive_pattern = re.compile(r'positive', re.IGNORECASE)
-                negative_pattern = re.compile(r'negative', re.IGNORECASE)
-                
-                # Cache for parsed JSON to avoid re-parsing
-                json_cache = {}
-                
-                for r in responses_list:
-                    # Filter by brand_id if provided (should already be filtered, but double-check)
-                    if brand_id_filter is not None:
-                        if r.get("brand_id") != brand_id_filter:
-                            continue
-                    valid_responses_count += 1
-                    
-                    prompt_id = r.get("prompt_id")
-                    brand_present = r.get("brand_present", False)
-                    
-                    # Track prompt counts and platforms (for top 10 calculation)
-                    if prompt_id:
-                        prompt_counts[prompt_id] = prompt_counts.get(prompt_id, 0) + 1
-                        unique_prompts_tracked.add(prompt_id)
-                        
-                        platform = r.get("platform")
-                        if platform:
-                            if prompt_id not in prompt_platform_map:
-                                prompt_platform_map[prompt_id] = set()
-                            prompt_platform_map[prompt_id].add(platform)
-                        
-                        if brand_present:
-                            unique_prompts_with_brand.add(prompt_id)
-                    
-                    # Count citations (highly optimized - avoid JSON parsing when possible)
-                    citations = r.get("citations")
-                    citation_count = 0
-                    if citations:
-                        if isinstance(citations, list):
-                            citation_count = len(citations)
-                        elif isinstance(citations, str):
-                            # Check cache first
-                            if citations in json_cache:
-                                citation_count = json_cache[citations]
-                            else:
-                                try:
-                                    parsed = json.loads(citations)
-                                    if isinstance(parsed, list):
-                                        citation_count = len(parsed)
-                                        json_cache[citations] = citation_count  # Cache result
-                                except:
-                                    pass
-                    
-                    total_citations += citation_count
-                    if prompt_id:
-                        citations_by_prompt[prompt_id] = citations_by_prompt.get(prompt_id, 0) + citation_count
-                    
-                    # Track brand presence
-                    if brand_present:
-                        brand_present_count += 1
-                    
-                    # Track competitors (optimized - use list comprehension for speed)
-                    competitors_present = r.get("competitors_present")
-                    if isinstance(competitors_present, list) and len(competitors_present) > 0:
-                        total_responses_with_competitors += 1
-                        # Use dict comprehension for faster updates
-                        for comp in competitors_present:
-                            if comp:
-                                competitor_visibility_count[comp] = competitor_visibility_count.get(comp, 0) + 1
-                    
-                    # Track sentiment (optimized - use pre-compiled regex)
-                    sentiment = r.get("brand_sentiment")
-                    if sentiment:
-                        if positive_pattern.search(sentiment):
-                            sentiment_scores["positive"] += 1
-                        elif negative_pattern.search(sentiment):
-                            sentiment_scores["negative"] += 1
-                        else:
-                            sentiment_scores["neutral"] += 1
-                
-                # Calculate Top 10 Prompt Percentage (optimized - use sorted once)
-                sorted_prompts = sorted(prompt_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-                top10_count = sum(count for _, count in sorted_prompts)
-                top10_prompt_percentage = (top10_count / valid_responses_count * 100) if valid_responses_count > 0 else 0
-                
-                # Calculate metrics (100% from source data only)
-                brand_presence_rate = (brand_present_count / valid_responses_count * 100) if valid_responses_count > 0 else 0
-                
-                total_sentiment_responses = sum(sentiment_scores.values())
-                if total_sentiment_responses > 0:
-                    sentiment_score = (
-                        (sentiment_scores["positive"] * 1.0 + 
-                         sentiment_scores["neutral"] * 0.0 + 
-                         sentiment_scores["negative"] * -1.0) / total_sentiment_responses * 100
-                    )
-                else:
-                    sentiment_score = 0
-                
-                # Competitive Benchmarking Metrics
-                brand_visibility_percent = brand_presence_rate
-                competitor_avg_visibility_percent = 0
-                if total_responses_with_competitors > 0:
-                    total_competitor_appearances = sum(competitor_visibility_count.values())
-                    if total_competitor_appearances > 0:
-                        competitor_avg_visibility_percent = (total_competitor_appearances / total_responses_with_competitors) * 100
-                
-                # Calculate Prompt Reach Metric
-                prompt_reach = {
-                    "total_prompts_tracked": len(unique_prompts_tracked),
-                    "prompts_with_brand": len(unique_prompts_with_brand),
-                    "display": f"Tracked prompts: {len(unique_prompts_tracked)}; brand appeared in {len(unique_prompts_with_brand)} of them"
-                }
-                
-                return {
-                    "total_citations": total_citations,
-                    "brand_present_count": brand_present_count,
-                    "brand_presence_rate": brand_presence_rate,
-                    "sentiment_score": sentiment_score,
-                    "prompt_search_volume": valid_responses_count,
-                    "top10_prompt_percentage": top10_prompt_percentage,
-                    "competitive_benchmarking": {
-                        "brand_visibility_percent": brand_visibility_percent,
-                        "competitor_avg_visibility_percent": competitor_avg_visibility_percent
-                    },
-                    "prompt_reach": prompt_reach,
-                    "citations_by_prompt": citations_by_prompt,
-                }
-            
-            # Calculate Scrunch KPIs if brand has any Scrunch data (prompts or responses)
-            # This ensures all brands with Scrunch data show the section (with zero values if no data in date range)
-            logger.info(f"Brand {brand_id} Scrunch KPI calculation: has_any_scrunch_data={has_any_scrunch_data}")
-            if has_any_scrunch_data:
-                # Calculate current period metrics (will be zero if no responses)
-                current_metrics = calculate_scrunch_metrics(responses, prompts, brand_id)
-                
-                # Extract citations_by_prompt for use in chart data
-                citations_by_prompt = current_metrics.get("citations_by_prompt", {})
-                
-                # Calculate previous period metrics (will be zero if no responses)
-                prev_metrics = calculate_scrunch_metrics(prev_responses, prompts, brand_id)
-                
-                # Calculate percentage changes
-                # Each KPI is compared to its own previous value
-                def calculate_change(current, previous, metric_name=""):
-                    # If both are zero, no change
-                    if current == 0 and previous == 0:
-                        return 0.0
-                    
-                    # If previous is zero but current has value
-                    # This means the metric appeared for the first time
-                    if previous == 0 and current > 0:
-                        # Return a large positive change to indicate new metric
-                        # But use a consistent value so all new metrics show the same
-                        return 100.0  # Indicates new metric appeared
-                    
-                    # If current is zero but previous had value, show 100% decrease
-                    if current == 0 and previous > 0:
-                        return -100.0
-                    
-                    # Normal calculation when both have values
-                    # This is where each KPI gets its unique change percentage
-                    if previous > 0:
-                        change = ((current - previous) / previous) * 100
-                        return change
-                    
-                    return 0.0
-                
-                # NOTE: influencer_reach, engagement_rate, total_interactions, cost_per_engagement are NOT calculated
-                # as they require assumptions. Only 100% accurate source data KPIs are calculated.
-                total_citations_change = calculate_change(current_metrics["total_citations"], prev_metrics["total_citations"], "total_citations")
-                brand_presence_rate_change = calculate_change(current_metrics["brand_presence_rate"], prev_metrics["brand_presence_rate"], "brand_presence_rate")
-                sentiment_score_change = calculate_change(current_metrics["sentiment_score"], prev_metrics["sentiment_score"], "sentiment_score")
-                top10_prompt_change = calculate_change(current_metrics["top10_prompt_percentage"], prev_metrics["top10_prompt_percentage"], "top10_prompt_percentage")
-                prompt_search_volume_change = calculate_change(current_metrics["prompt_search_volume"], prev_metrics["prompt_search_volume"], "prompt_search_volume")
-                
-                # Calculate changes for new KPIs
-                competitive_current = current_metrics.get("competitive_benchmarking", {})
-                competitive_prev = prev_metrics.get("competitive_benchmarking", {})
-                brand_visibility_change = calculate_change(
-                    competitive_current.get("brand_visibility_percent", 0),
-                    competitive_prev.get("brand_visibility_percent", 0),
-                    "brand_visibility"
-                )
-                competitor_avg_change = calculate_change(
-                    competitive_current.get("competitor_avg_visibility_percent", 0),
-                    competitive_prev.get("competitor_avg_visibility_percent", 0),
-                    "competitor_avg_visibility"
-                )
-                
-                # NOTE: influencer_reach, total_interactions, engagement_rate, cost_per_engagement
-                # are NOT included as they require assumptions. Only 100% accurate source data KPIs are included.
-                scrunch_kpis = {
-                    "total_citations": {
-                        "value": int(current_metrics["total_citations"]),
-                        "change": round(total_citations_change, 2),
-                        "source": "Scrunch",
-                        "label": "Total Citations",
-                        "icon": "Link",
-                        "format": "number"
-                    },
-                    "brand_presence_rate": {
-                        "value": round(current_metrics["brand_presence_rate"], 1),
-                        "change": round(brand_presence_rate_change, 2),
-                        "source": "Scrunch",
-                        "label": "Brand Presence Rate",
-                        "icon": "CheckCircle",
-                        "format": "percentage"
-                    },
-                    "brand_sentiment_score": {
-                        "value": round(current_metrics["sentiment_score"], 1),
-                        "change": round(sentiment_score_change, 2),
-                        "source": "Scrunch",
-                        "label": "Brand Sentiment Score",
-                        "icon": "SentimentSatisfied",
-                        "format": "number"
-                    },
-                    # NOTE: scrunch_engagement_rate, total_interactions, cost_per_engagement are NOT included
-                    # as they require assumptions. Only 100% accurate source data KPIs are included.
-                    "top10_prompt_percentage": {
-                        "value": round(current_metrics["top10_prompt_percentage"], 1),
-                        "change": round(top10_prompt_change, 2),
-                        "source": "Scrunch",
-                        "label": "Top 10 Prompt",
-                        "icon": "Article",
-                        "format": "percentage"
-                    },
-                    "prompt_search_volume": {
-                        "value": current_metrics["prompt_search_volume"],
-                        "change": round(prompt_search_volume_change, 2),
-                        "source": "Scrunch",
-                        "label": "Prompt Search Volume",
-                        "icon": "TrendingUp",
-                        "format": "number"
-                    },
-                    # New KPIs
-                    "competitive_benchmarking": {
-                        "value": {
-                            "brand_visibility_percent": round(competitive_current.get("brand_visibility_percent", 0), 1),
-                            "competitor_avg_visibility_percent": round(competitive_current.get("competitor_avg_visibility_percent", 0), 1)
-                        },
-                        "change": {
-                            "brand_visibility": round(brand_visibility_change, 2),
-                            "competitor_avg_visibility": round(competitor_avg_change, 2)
+                            "display": f"Your brand's AI visibility: {round(competitive_current.get('brand_visibility_percent', 0), 1)}% vs competitor average: {round(competitive_current.get('competitor_avg_visibility_percent', 0), 1)}%"
                         },
-                        "source": "Scrunch",
-                        "label": "Competitive Benchmarking",
-                        "icon": "BarChart",
-                        "format": "custom",
-                        "display": f"Your brand's AI visibility: {round(competitive_current.get('brand_visibility_percent', 0), 1)}% vs competitor average: {round(competitive_current.get('competitor_avg_visibility_percent', 0), 1)}%"
-                    },
-                    "prompt_reach": {
-                        "value": current_metrics.get("prompt_reach", {}),
-                        "change": None,  # Not calculating change for this metric
-                        "source": "Scrunch",
-                        "label": "Prompt Reach",
-                        "icon": "Article",
-                        "format": "custom"
+                        "prompt_reach": {
+                            "value": current_metrics.get("prompt_reach", {}),
+                            "change": None,  # Not calculating change for this metric
+                            "source": "Scrunch",
+                            "label": "Prompt Reach",
+                            "icon": "Article",
+                            "format": "custom"
+                        }
                     }
-                }
-                
-                # Calculate Top Performing Prompts
-                # Filter by brand_id: only count responses for this brand_id and match with prompts for this brand_id
-                if prompts and responses:
-                    # Create a set of valid prompt IDs for this brand_id for quick lookup
-                    valid_prompt_ids = {prompt.get("id") for prompt in prompts if prompt.get("id")}
-                    
-                    # Count responses per prompt_id, but only for responses that:
-                    # 1. Have a prompt_id
-                    # 2. The prompt_id belongs to a prompt for this brand_id
-                    # 3. The response already belongs to this brand_id (from the query filter)
-                    prompt_counts = {}
-                    total_responses_for_brand = 0
-                    for r in responses:
-                        # Double-check brand_id matches (defensive programming)
-                        response_brand_id = r.get("brand_id")
-                        if response_brand_id != brand_id:
-                            continue  # Skip responses that don't match brand_id
-                        
-                        total_responses_for_brand += 1
-                        prompt_id = r.get("prompt_id")
-                        if prompt_id and prompt_id in valid_prompt_ids:
-                            prompt_counts[prompt_id] = prompt_counts.get(prompt_id, 0) + 1
-                    
-                    # Map prompts with response counts and unique platform variants (only prompts for this brand_id)
-                    # First, collect platform variants for each prompt
-                    prompt_variants = {}
-                    for r in responses:
-                        # Double-check brand_id matches
-                        response_brand_id = r.get("brand_id")
-                        if response_brand_id != brand_id:
-                            continue
-                        
-                        prompt_id = r.get("prompt_id")
-                        if prompt_id and prompt_id in valid_prompt_ids:
-                            if prompt_id not in prompt_variants:
-                                prompt_variants[prompt_id] = set()
-                            platform = r.get("platform")
-                            if platform:
-                                prompt_variants[prompt_id].add(platform)
-                    
-                    top_prompts_data = []
-                    for prompt in prompts:
-                        # Ensure prompt belongs to this brand_id
-                        prompt_brand_id = prompt.get("brand_id")
-                        if prompt_brand_id != brand_id:
-                            continue  # Skip prompts that don't match brand_id
-                        
-                        prompt_id = prompt.get("id")
-                        response_count = prompt_counts.get(prompt_id, 0)
-                        if response_count > 0:
-                            # Count unique platforms (variants) for this prompt
-                            unique_variants = len(prompt_variants.get(prompt_id, set()))
-                            # If no platforms found, default to 1 (at least one variant exists)
-                            variants_count = unique_variants if unique_variants > 0 else 1
-                            
-                            top_prompts_data.append({
-                                "id": prompt_id,
-                                "text": prompt.get("text") or prompt.get("prompt_text") or "N/A",
-                                "responseCount": response_count,
-                                "variants": variants_count,  # Count of unique platforms (ChatGPT, Perplexity, Claude, etc.)
-                                "citations": citations_by_prompt.get(prompt_id, 0),  # New: Citations per prompt
-                                "totalResponsesForBrand": total_responses_for_brand  # Total responses for this brand_id
-                            })
-                    
-                    # Sort by response count and get top 10
-                    top_prompts_data.sort(key=lambda x: x["responseCount"], reverse=True)
-                    top_performing_prompts = []
-                    for idx, prompt_data in enumerate(top_prompts_data[:10], 1):
-                        top_performing_prompts.append({
-                            **prompt_data,
-                            "rank": idx
-                        })
-                    chart_data["top_performing_prompts"] = top_performing_prompts
                 
-                # Calculate Scrunch AI Insights
-                if prompts and responses:
-                    # Group responses by prompt
-                    prompt_data_map = {}
-                    for prompt in prompts:
-                        prompt_data_map[prompt.get("id")] = {
-                            "prompt": prompt,
-                            "responses": [],
-                            "variants": set(),
-                            "citations": 0,
-                            "competitors": set()
-                        }
-                    
-                    for r in responses:
-                        prompt_id = r.get("prompt_id")
-                        if prompt_id and prompt_id in prompt_data_map:
-                            prompt_data_map[prompt_id]["responses"].append(r)
-                            if r.get("platform"):
-                                prompt_data_map[prompt_id]["variants"].add(r.get("platform"))
-                            
-                            # Count citations
-                            citations = r.get("citations")
-                            if citations:
-                                if isinstance(citations, list):
-                                    prompt_data_map[prompt_id]["citations"] += len(citations)
-                                elif isinstance(citations, str):
-                                    try:
-                                        import json
-                                        parsed = json.loads(citations)
-                                        if isinstance(parsed, list):
-                                            prompt_data_map[prompt_id]["citations"] += len(parsed)
-                                    except:
-                                        pass
-                            
-                            # Track competitors
-                            competitors_present = r.get("competitors_present", [])
-                            if isinstance(competitors_present, list):
-                                for comp in competitors_present:
-                                    prompt_data_map[prompt_id]["competitors"].add(comp)
-                    
-                    # Calculate insights for each prompt
-                    insights = []
-                    for prompt_id, data in prompt_data_map.items():
-                        if len(data["responses"]) > 0:
-                            prompt = data["prompt"]
-                            response_count = len(data["responses"])
-                            presence_count = sum(1 for r in data["responses"] if r.get("brand_present") == True)
-                            presence = (presence_count / response_count * 100) if response_count > 0 else 0
-                            
-                            # Get category from topics or prompt text
-                            category = (
-                                prompt.get("topics", [None])[0] if prompt.get("topics") else None
-                            ) or (
-                                (prompt.get("text") or prompt.get("prompt_text") or "").split(" ")[:3]
-                            ) or prompt.get("stage") or "General"
-                            
-                            if isinstance(category, list):
-                                category = " ".join(category)
-                            
-                            insights.append({
-                                "id": prompt_id,
-                                "seedPrompt": prompt.get("text") or prompt.get("prompt_text") or "N/A",
-                                "stage": prompt.get("stage") or "Unknown",
-                                "variants": len(data["variants"]) or 1,
-                                "responses": response_count,
-                                "presence": round(presence, 1),
-                                "presenceChange": 0,  # Would need historical comparison
-                                "citations": data["citations"],
-                                "citationsChange": 0,  # Would need historical comparison
-                                "competitors": len(data["competitors"]),
-                                "competitorsChange": 0,  # Would need historical comparison
-                                "category": category
-                            })
-                    
+                    # Calculate Top Performing Prompts from the per-prompt stats, keeping only
+                    # prompts that belong to this brand (the prompts query is filtered by brand)
+                    if prompts and prompt_stats:
+                        prompts_by_id = {prompt["id"]: prompt for prompt in prompts if prompt.get("id")}
+                        scrunch_chart_data["top_performing_prompts"] = build_top_performing_prompts(
+                            prompt_stats, prompts_by_id, response_count
+                        )
+            return scrunch_kpis, scrunch_chart_data, time.time() - scrunch_start
+        
+        # The three sources share nothing but the brand row, so fetch them concurrently.
+        # The Supabase client is synchronous, so each source runs in a worker thread.
+        ga4_res, agency_res, scrunch_res = await asyncio.gather(
+            asyncio.to_thread(_fetch_ga4),
+            asyncio.to_thread(_fetch_agency),
+            asyncio.to_thread(_fetch_scrunch)
+        )
+        ga4_kpis, ga4_errors, section_times["ga4"] = ga4_res
+        agency_kpis, agency_errors, campaign_links, section_times["agency"] = agency_res
+        scrunch_kpis, scrunch_chart_data, section_times["scrunch"] = scrunch_res
+        
+        # ========== Chart Data ==========
+        chart_data = {
+            "users_over_time": [],
+            "impressions_vs_clicks": [],
+            "traffic_sources": [],
+            "top_campaigns": [],
+            "top_pages": [],
+            "ga4_traffic_overview": None,
+            "geographic_breakdown": [],
+            "top_performing_prompts": scrunch_chart_data["top_performing_prompts"],
+            "scrunch_ai_insights": []
+        }
+        
+        # Combine GA4 and Agency Analytics KPIs (Scrunch KPIs are served by the separate endpoint)
+        kpis = {**ga4_kpis, **agency_kpis}
         
         # Log KPI counts for debugging
-        logger.info(f"Combined KPIs for brand {brand_id}: GA4={len(ga4_kpis)}, AgencyAnalytics={len(agency_kpis)}, Scrunch={len(scrunch_kpis)}, Total={len(kpis)}")
+        logger.debug("Combined KPIs for brand %s: GA4=%s, AgencyAnalytics=%s, Scrunch=%s, Total=%s", brand_id, len(ga4_kpis), len(agency_kpis), len(scrunch_kpis), len(kpis))
         
-        # Chart data is already initialized above (before Scrunch AI section)
         # Continue populating chart_data with GA4 and Agency Analytics data
         
         # Get users over time (GA4)
@@ -2383,225 +2349,107 @@ async def get_reporting_dashboard(
             try:
                 property_id = brand["ga4_property_id"]
                 
-                # Get all chart data from stored database records (NO live API calls)
-                logger.info(f"[GA4 STORED DATA] Fetching chart data from stored records for date range: {start_date} to {end_date}")
-                top_pages = supabase.get_ga4_top_pages_by_date_range(brand_id, property_id, start_date, end_date, limit=10)
-                traffic_sources = supabase.get_ga4_traffic_sources_by_date_range(brand_id, property_id, start_date, end_date)
-                geographic = supabase.get_ga4_geographic_by_date_range(brand_id, property_id, start_date, end_date, limit=10)
-                devices = supabase.get_ga4_devices_by_date_range(brand_id, property_id, start_date, end_date)
+                # Get all chart data from stored database records (NO live API calls). Every
+                # read below is independent, so they all run concurrently.
+                logger.debug("[GA4 STORED DATA] Fetching chart data from stored records for date range: %s to %s", start_date, end_date)
+                
+                def daily_query(table, columns, period_start, period_end):
+                    return supabase.client.table(table).select(columns).eq("brand_id", brand_id).eq("property_id", property_id).gte("date", period_start).lte("date", period_end)
+                
+                # The daily metrics section below handles its own errors, so its six queries
+                # return their exceptions instead of failing the breakdowns. They run in the
+                # same gather as the breakdowns, so every query is awaited on every path.
+                daily_queries = asyncio.gather(
+                    execute_async(daily_query("ga4_traffic_overview", "date,users,sessions,new_users", start_date, end_date).order("date", desc=False)),
+                    execute_async(daily_query("ga4_daily_conversions", "date,total_conversions", start_date, end_date)),
+                    execute_async(daily_query("ga4_revenue", "date,total_revenue", start_date, end_date)),
+                    execute_async(daily_query("ga4_traffic_overview", "date,users,sessions,new_users", prev_start, prev_end).order("date", desc=False)),
+                    execute_async(daily_query("ga4_daily_conversions", "date,total_conversions", prev_start, prev_end)),
+                    execute_async(daily_query("ga4_revenue", "date,total_revenue", prev_start, prev_end)),
+                    return_exceptions=True
+                )
+                top_pages, traffic_sources, geographic, devices, (traffic_overview, prev_traffic_overview), daily_results = await asyncio.gather(
+                    asyncio.to_thread(supabase.get_ga4_top_pages_by_date_range, brand_id, property_id, start_date, end_date, limit=10),
+                    asyncio.to_thread(supabase.get_ga4_traffic_sources_by_date_range, brand_id, property_id, start_date, end_date),
+                    asyncio.to_thread(supabase.get_ga4_geographic_by_date_range, brand_id, property_id, start_date, end_date, limit=10),
+                    asyncio.to_thread(supabase.get_ga4_devices_by_date_range, brand_id, property_id, start_date, end_date),
+                    # Traffic overview for detailed metrics, with the previous period for change
+                    # comparison based on the selected date range duration
+                    asyncio.to_thread(supabase.get_ga4_traffic_overview_two_periods, brand_id, property_id, prev_start, prev_end, start_date, end_date),
+                    daily_queries
+                )
                 
                 chart_data["traffic_sources"] = traffic_sources if traffic_sources else []
                 chart_data["top_pages"] = top_pages if top_pages else []
                 chart_data["geographic_breakdown"] = geographic if geographic else []
                 chart_data["device_breakdown"] = devices if devices else []
                 
-                logger.info(f"[GA4 STORED DATA] Chart data loaded - top_pages: {len(top_pages)}, traffic_sources: {len(traffic_sources)}, geographic: {len(geographic)}, devices: {len(devices)}")
+                logger.debug("[GA4 STORED DATA] Chart data loaded - top_pages: %s, traffic_sources: %s, geographic: %s, devices: %s", len(top_pages), len(traffic_sources), len(geographic), len(devices))
                 
-                # Get GA4 traffic overview for detailed metrics from stored data
-                traffic_overview = supabase.get_ga4_traffic_overview_by_date_range(brand_id, property_id, start_date, end_date)
                 if traffic_overview:
-                    # Calculate previous period for change comparison based on selected date range duration
-                    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                    period_duration = (end_dt - start_dt).days + 1
-                    prev_end = (start_dt - timedelta(days=1)).strftime("%Y-%m-%d")
-                    prev_start = (start_dt - timedelta(days=period_duration)).strftime("%Y-%m-%d")
-                    prev_traffic_overview = supabase.get_ga4_traffic_overview_by_date_range(brand_id, property_id, prev_start, prev_end)
-                    
-                    if traffic_overview:
-                        # Calculate changes
-                        sessions_change = traffic_overview.get("sessionsChange", 0)
-                        engaged_sessions_change = 0
-                        avg_session_duration_change = 0
-                        engagement_rate_change = 0
-                        
-                        if prev_traffic_overview:
-                            prev_engaged_sessions = prev_traffic_overview.get("engagedSessions", 0)
-                            current_engaged_sessions = traffic_overview.get("engagedSessions", 0)
-                            if prev_engaged_sessions > 0:
-                                engaged_sessions_change = ((current_engaged_sessions - prev_engaged_sessions) / prev_engaged_sessions) * 100
-                            
-                            prev_avg_duration = prev_traffic_overview.get("averageSessionDuration", 0)
-                            current_avg_duration = traffic_overview.get("averageSessionDuration", 0)
-                            if prev_avg_duration > 0:
-                                avg_session_duration_change = ((current_avg_duration - prev_avg_duration) / prev_avg_duration) * 100
-                            
-                            prev_engagement_rate = prev_traffic_overview.get("engagementRate", 0)
-                            current_engagement_rate = traffic_overview.get("engagementRate", 0)
-                            if prev_engagement_rate > 0:
-                                engagement_rate_change = ((current_engagement_rate - prev_engagement_rate) / prev_engagement_rate) * 100
-                        
-                        chart_data["ga4_traffic_overview"] = {
-                            "sessions": traffic_overview.get("sessions", 0),
-                            "sessionsChange": sessions_change,
-                            "engagedSessions": traffic_overview.get("engagedSessions", 0),
-                            "engagedSessionsChange": engaged_sessions_change,
-                            "averageSessionDuration": traffic_overview.get("averageSessionDuration", 0),
-                            "avgSessionDurationChange": avg_session_duration_change,
-                            "engagementRate": traffic_overview.get("engagementRate", 0),
-                            "engagementRateChange": engagement_rate_change
-                        }
-                    else:
-                        logger.warning(f"[GA4 STORED DATA] No traffic overview data found in database for date range {start_date} to {end_date}")
+                    # Sessions change comes with the overview; the rest compare with the previous period
+                    overview = {
+                        "sessions": traffic_overview.get("sessions", 0),
+                        "sessionsChange": traffic_overview.get("sessionsChange", 0)
+                    }
+                    for metric, change_key in GA4_OVERVIEW_CHANGE_KEYS:
+                        overview[metric] = traffic_overview.get(metric, 0)
+                        overview[change_key] = percent_change(overview[metric], prev_traffic_overview.get(metric, 0)) if prev_traffic_overview else 0
+                    chart_data["ga4_traffic_overview"] = overview
+                else:
+                    logger.warning(f"[GA4 STORED DATA] No traffic overview data found in database for date range {start_date} to {end_date}")
                 
                 # Get daily metrics over time from stored data (NO live API calls)
-                logger.info(f"[GA4 STORED DATA] Fetching daily metrics from stored records")
+                logger.debug("[GA4 STORED DATA] Fetching daily metrics from stored records")
                 daily_metrics = {}
                 prev_daily_metrics = {}
                 
-                # Calculate previous period dates
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                period_duration = (end_dt - start_dt).days + 1
-                prev_end = (start_dt - timedelta(days=1)).strftime("%Y-%m-%d")
-                prev_start = (start_dt - timedelta(days=period_duration)).strftime("%Y-%m-%d")
-                
                 try:
-                    # First, generate all dates in the range to ensure we have entries for all days
-                    all_dates_map = {}
-                    current_date = start_dt
-                    while current_date <= end_dt:
-                        date_str = current_date.strftime("%Y-%m-%d")
-                        date_formatted = current_date.strftime("%Y%m%d")  # YYYYMMDD format for chart
-                        all_dates_map[date_str] = date_formatted
-                        # Initialize with zeros - will be filled from actual data
-                        daily_metrics[date_str] = {
-                            "date": date_formatted,
-                            "users": 0,
-                            "sessions": 0,
-                            "new_users": 0,
-                            "conversions": 0,
-                            "revenue": 0
-                        }
-                        current_date += timedelta(days=1)
-                    
-                    # Get daily traffic overview records for current period
-                    daily_traffic_result = supabase.client.table("ga4_traffic_overview").select("*").eq("brand_id", brand_id).eq("property_id", property_id).gte("date", start_date).lte("date", end_date).order("date", desc=False).execute()
-                    daily_traffic_records = daily_traffic_result.data if hasattr(daily_traffic_result, 'data') else []
+                    (
+                        daily_traffic_result, daily_conversions_result, daily_revenue_result,
+                        prev_daily_traffic_result, prev_daily_conversions_result, prev_daily_revenue_result
+                    ) = daily_results
+                    for daily_result in (
+                        daily_traffic_result, daily_conversions_result, daily_revenue_result,
+                        prev_daily_traffic_result, prev_daily_conversions_result, prev_daily_revenue_result
+                    ):
+                        if isinstance(daily_result, Exception):
+                            raise daily_result
                     
-                    for record in daily_traffic_records:
-                        date = record.get("date")
-                        if date and date in daily_metrics:
-                            daily_metrics[date]["users"] = record.get("users", 0)
-                            daily_metrics[date]["sessions"] = record.get("sessions", 0)
-                            daily_metrics[date]["new_users"] = record.get("new_users", 0)
+                    # First, generate all dates in the range to ensure we have entries for all days,
+                    # initialized with zeros - will be filled from actual data
+                    daily_metrics = empty_daily_metrics_by_date(start_dt, end_dt)
                     
-                    # Get daily conversions - match to existing dates or create new entries
-                    daily_conversions_result = supabase.client.table("ga4_daily_conversions").select("*").eq("brand_id", brand_id).eq("property_id", property_id).gte("date", start_date).lte("date", end_date).execute()
-                    daily_conversions_records = daily_conversions_result.data if hasattr(daily_conversions_result, 'data') else []
-                    for record in daily_conversions_records:
-                        date = record.get("date")
-                        if date:
-                            if date not in daily_metrics:
-                                # Create entry if it doesn't exist (shouldn't happen, but just in case)
-                                date_formatted = date.replace("-", "") if "-" in date else date
-                                daily_metrics[date] = {
-                                    "date": date_formatted,
-                                    "users": 0,
-                                    "sessions": 0,
-                                    "new_users": 0,
-                                    "conversions": 0,
-                                    "revenue": 0
-                                }
-                            daily_metrics[date]["conversions"] = record.get("total_conversions", 0)
-                    
-                    # Get daily revenue - match to existing dates or create new entries
-                    daily_revenue_result = supabase.client.table("ga4_revenue").select("*").eq("brand_id", brand_id).eq("property_id", property_id).gte("date", start_date).lte("date", end_date).execute()
-                    daily_revenue_records = daily_revenue_result.data if hasattr(daily_revenue_result, 'data') else []
-                    for record in daily_revenue_records:
-                        date = record.get("date")
-                        if date:
-                            if date not in daily_metrics:
-                                # Create entry if it doesn't exist (shouldn't happen, but just in case)
-                                date_formatted = date.replace("-", "") if "-" in date else date
-                                daily_metrics[date] = {
-                                    "date": date_formatted,
-                                    "users": 0,
-                                    "sessions": 0,
-                                    "new_users": 0,
-                                    "conversions": 0,
-                                    "revenue": 0
-                                }
-                            daily_metrics[date]["revenue"] = float(record.get("total_revenue", 0))
+                    for daily_result, fields in (
+                        (daily_traffic_result, GA4_DAILY_TRAFFIC_FIELDS),
+                        (daily_conversions_result, GA4_DAILY_CONVERSIONS_FIELDS),
+                        (daily_revenue_result, GA4_DAILY_REVENUE_FIELDS)
+                    ):
+                        fill_daily_metrics(daily_metrics, result_rows(daily_result), fields)
                     
                     # Generate all dates for previous period first
-                    prev_all_dates_map = {}
-                    prev_current_date = datetime.strptime(prev_start, "%Y-%m-%d")
-                    prev_end_dt = datetime.strptime(prev_end, "%Y-%m-%d")
-                    while prev_current_date <= prev_end_dt:
-                        date_str = prev_current_date.strftime("%Y-%m-%d")
-                        date_formatted = prev_current_date.strftime("%Y%m%d")
-                        prev_all_dates_map[date_str] = date_formatted
-                        # Initialize with zeros
-                        prev_daily_metrics[date_str] = {
-                            "date": date_formatted,
-                            "users": 0,
-                            "sessions": 0,
-                            "new_users": 0,
-                            "conversions": 0,
-                            "revenue": 0
-                        }
-                        prev_current_date += timedelta(days=1)
-                    
-                    # Get previous period daily metrics
-                    prev_daily_traffic_result = supabase.client.table("ga4_traffic_overview").select("*").eq("brand_id", brand_id).eq("property_id", property_id).gte("date", prev_start).lte("date", prev_end).order("date", desc=False).execute()
-                    prev_daily_traffic_records = prev_daily_traffic_result.data if hasattr(prev_daily_traffic_result, 'data') else []
-                    
-                    for record in prev_daily_traffic_records:
-                        date = record.get("date")
-                        if date and date in prev_daily_metrics:
-                            prev_daily_metrics[date]["users"] = record.get("users", 0)
-                            prev_daily_metrics[date]["sessions"] = record.get("sessions", 0)
-                            prev_daily_metrics[date]["new_users"] = record.get("new_users", 0)
+                    prev_daily_metrics = empty_daily_metrics_by_date(prev_start_dt, prev_end_dt)
                     
-                    # Get previous period conversions and revenue
-                    prev_daily_conversions_result = supabase.client.table("ga4_daily_conversions").select("*").eq("brand_id", brand_id).eq("property_id", property_id).gte("date", prev_start).lte("date", prev_end).execute()
-                    prev_daily_conversions_records = prev_daily_conversions_result.data if hasattr(prev_daily_conversions_result, 'data') else []
-                    for record in prev_daily_conversions_records:
-                        date = record.get("date")
-                        if date:
-                            if date not in prev_daily_metrics:
-                                date_formatted = date.replace("-", "") if "-" in date else date
-                                prev_daily_metrics[date] = {
-                                    "date": date_formatted,
-                                    "users": 0,
-                                    "sessions": 0,
-                                    "new_users": 0,
-                                    "conversions": 0,
-                                    "revenue": 0
-                                }
-                            prev_daily_metrics[date]["conversions"] = record.get("total_conversions", 0)
+                    for daily_result, fields in (
+                        (prev_daily_traffic_result, GA4_DAILY_TRAFFIC_FIELDS),
+                        (prev_daily_conversions_result, GA4_DAILY_CONVERSIONS_FIELDS),
+                        (prev_daily_revenue_result, GA4_DAILY_REVENUE_FIELDS)
+                    ):
+                        fill_daily_metrics(prev_daily_metrics, result_rows(daily_result), fields)
                     
-                    prev_daily_revenue_result = supabase.client.table("ga4_revenue").select("*").eq("brand_id", brand_id).eq("property_id", property_id).gte("date", prev_start).lte("date", prev_end).execute()
-                    prev_daily_revenue_records = prev_daily_revenue_result.data if hasattr(prev_daily_revenue_result, 'data') else []
-                    for record in prev_daily_revenue_records:
-                        date = record.get("date")
-                        if date:
-                            if date not in prev_daily_metrics:
-                                date_formatted = date.replace("-", "") if "-" in date else date
-                                prev_daily_metrics[date] = {
-                                    "date": date_formatted,
-                                    "users": 0,
-                                    "sessions": 0,
-                                    "new_users": 0,
-                                    "conversions": 0,
-                                    "revenue": 0
-                                }
-                            prev_daily_metrics[date]["revenue"] = float(record.get("total_revenue", 0))
-                    
-                    logger.info(f"[GA4 STORED DATA] Loaded {len(daily_metrics)} daily metrics records for current period, {len(prev_daily_metrics)} for previous period")
+                    logger.debug("[GA4 STORED DATA] Loaded %s daily metrics records for current period, %s for previous period", len(daily_metrics), len(prev_daily_metrics))
                     
                     # Combine current and previous period data
                     if daily_metrics:
                         ga4_daily_comparison = []
-                        prev_data_list = sorted(prev_daily_metrics.items())
-                        current_dates = sorted(daily_metrics.keys())
+                        current_dates = sorted(daily_metrics)
+                        period_shift = timedelta(days=period_duration)
                         
-                        for idx, date_str in enumerate(current_dates):
+                        for date_str in current_dates:
                             current = daily_metrics[date_str]
-                            # Get corresponding previous period data by index
-                            prev_idx = idx if idx < len(prev_data_list) else len(prev_data_list) - 1
-                            previous = prev_data_list[prev_idx][1] if prev_data_list else {}
+                            # The matching previous period day is exactly one period earlier
+                            prev_date_str = (datetime.strptime(date_str, "%Y-%m-%d") - period_shift).strftime("%Y-%m-%d")
+                            previous = prev_daily_metrics.get(prev_date_str, {})
                             
                             ga4_daily_comparison.append({
                                 "date": current["date"],  # Already in YYYYMMDD format
@@ -2620,13 +2468,13 @@ async def get_reporting_dashboard(
                         chart_data["ga4_daily_comparison"] = ga4_daily_comparison
                         
                         # Keep backward compatibility - users_over_time (all days in range)
-                        users_over_time = []
-                        for date_str in sorted(daily_metrics.keys()):
-                            users_over_time.append({
+                        chart_data["users_over_time"] = [
+                            {
                                 "date": daily_metrics[date_str]["date"],  # Already in YYYYMMDD format
                                 "users": daily_metrics[date_str]["users"]
-                            })
-                        chart_data["users_over_time"] = users_over_time
+                            }
+                            for date_str in current_dates
+                        ]
                     else:
                         chart_data["ga4_daily_comparison"] = []
                         chart_data["users_over_time"] = []
@@ -2638,59 +2486,39 @@ async def get_reporting_dashboard(
             except Exception as e:
                 logger.warning(f"Error fetching GA4 chart data: {str(e)}")
         
-        # Get impressions vs clicks and top campaigns (Agency Analytics)
-        try:
-            campaign_links_result = supabase.client.table("agency_analytics_campaign_brands").select("*").eq("brand_id", brand_id).execute()
-            campaign_links = campaign_links_result.data if hasattr(campaign_links_result, 'data') else []
-        except:
-            campaign_links = []
-        
+        # Get impressions vs clicks and top campaigns (Agency Analytics), reusing the campaign
+        # links the KPI section already fetched
         if campaign_links:
             try:
                 campaign_ids = [link["campaign_id"] for link in campaign_links]
                 
-                # Get campaign data
-                campaigns_result = supabase.client.table("agency_analytics_campaigns").select("*").in_("id", campaign_ids).execute()
-                campaigns = campaigns_result.data if hasattr(campaigns_result, 'data') else []
-                
                 # NOTE: impressions_vs_clicks and top_campaigns charts are NOT populated
                 # as they require estimated impressions/clicks calculations.
                 # Only 100% accurate source data is used for charts.
                 chart_data["impressions_vs_clicks"] = []  # Empty - requires estimations
                 chart_data["top_campaigns"] = []  # Empty - requires estimations
                 
-                # Calculate keyword rankings performance metrics and collect all keywords
-                chart_total_rankings = 0
-                chart_total_search_volume = 0
-                chart_all_keywords_rankings = []
-                
-                for campaign_id in campaign_ids:
-                    summaries_query = supabase.client.table("agency_analytics_keyword_ranking_summaries").select("*").eq("campaign_id", campaign_id)
-                    summaries_query = summaries_query.gte("date", start_date).lte("date", end_date)
-                    summaries_result = summaries_query.execute()
-                    campaign_summaries = summaries_result.data if hasattr(summaries_result, 'data') else []
-                    
-                    for summary in campaign_summaries:
-                        ranking = summary.get("google_ranking") or summary.get("google_mobile_ranking") or 999
-                        if ranking <= 100:
-                            chart_total_rankings += 1
-                        chart_total_search_volume += summary.get("search_volume", 0) or 0
-                        
-                        # Collect keyword data for "All Keywords ranking"
-                        keyword_phrase = summary.get("keyword_phrase") or f"Keyword {summary.get('keyword_id', 'N/A')}"
-                        if ranking is not None and ranking <= 100:
-                            chart_all_keywords_rankings.append({
-                                "keyword": keyword_phrase,
-                                "ranking": ranking,
-                                "search_volume": summary.get("search_volume", 0) or 0,
-                                "ranking_change": summary.get("ranking_change"),
-                                "keyword_id": summary.get("keyword_id")
-                            })
-                
-                # Sort by ranking (best first)
-                chart_all_keywords_rankings.sort(key=lambda x: x["ranking"] if x["ranking"] else 999)
+                # Keyword rankings performance totals are aggregated in Postgres over the
+                # summaries dated within the range; only the top 100 keyword rows are fetched
+                # for "All Keywords ranking"
+                chart_agg_result, summaries_result = await asyncio.gather(
+                    execute_async(supabase.client.rpc("get_keyword_ranking_agg", {
+                        "p_campaign_ids": campaign_ids,
+                        "p_start_date": start_date,
+                        "p_end_date": end_date
+                    })),
+                    execute_async(
+                        supabase.client.table("agency_analytics_keyword_ranking_summaries").select(
+                            RANKED_KEYWORD_COLUMNS
+                        ).in_("campaign_id", campaign_ids).gte("date", start_date).lte("date", end_date).or_(RANKED_KEYWORD_FILTER)
+                    )
+                )
+                chart_agg_rows = result_rows(chart_agg_result)
+                chart_agg = chart_agg_rows[0] if chart_agg_rows else {}
+                chart_total_rankings = chart_agg.get("total_rankings") or 0
+                chart_total_search_volume = chart_agg.get("all_search_volume") or 0
                 
-                chart_data["all_keywords_ranking"] = chart_all_keywords_rankings
+                chart_data["all_keywords_ranking"] = ranked_keyword_rows(result_rows(summaries_result))
                 chart_data["keyword_rankings_performance"] = {
                     "google_rankings": chart_total_rankings,
                     "google_rankings_change": 0,  # Would need historical comparison in chart section
@@ -2701,19 +2529,17 @@ async def get_reporting_dashboard(
             except Exception as e:
                 logger.warning(f"Error fetching Agency Analytics chart data: {str(e)}")
         
-        # Scrunch processing removed - handled by separate endpoint
-        # section_times["scrunch"] removed - no longer needed
         total_time = time.time() - total_start
         section_times["total"] = total_time
         
         # Log performance breakdown
         logger.info(f"[PERFORMANCE] Dashboard endpoint for brand {brand_id} took {total_time:.2f}s total:")
-        for section, duration in sorted(section_times.items(), key=lambda x: x[1], reverse=True):
+        for section, duration in sorted(section_times.items(), key=itemgetter(1), reverse=True):
             if duration > 0.05:  # Log sections taking more than 50ms (lowered threshold to see sub-timings)
                 percentage = (duration / total_time * 100) if total_time > 0 else 0
                 logger.info(f"[PERFORMANCE]   - {section}: {duration:.2f}s ({percentage:.1f}%)")
         
-        return {
+        payload = {
             "brand_id": brand_id,
             "brand_name": brand.get("name"),
             "date_range": {
@@ -2741,6 +2567,12 @@ async def get_reporting_dashboard(
             }
         }
         
+        # Only store complete payloads so a transient source error is not served until the next sync
+        if not ga4_errors and not agency_errors:
+            await asyncio.to_thread(supabase.upsert_reporting_dashboard_snapshot, brand_id, start_date, end_date, payload, data_read_at)
+        
+        return payload
+        
     except Exception as e:
         logger.error(f"Error fetching reporting dashboard: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -2755,36 +2587,15 @@ async def get_brand_by_slug(slug: str):
     - Falls back to finding a brand by slug if no client found
     """
     try:
-        supabase = SupabaseService()
-        
-        # First, try to find a client by url_slug (for /reporting/client/:slug routes)
-        client = supabase.get_client_by_slug(slug)
-        if client:
-            # If client found, get the associated brand via scrunch_brand_id
-            if client.get("scrunch_brand_id"):
-                brand_id = client["scrunch_brand_id"]
-                brand_result = supabase.client.table("brands").select("*").eq("id", brand_id).execute()
-                brands = brand_result.data if hasattr(brand_result, 'data') else []
-                if brands:
-                    logger.info(f"Found client by url_slug '{slug}', returning associated brand")
-                    return brands[0]
-                else:
-                    raise HTTPException(
-                        status_code=404,
-                        detail=f"Client found but associated brand (id: {brand_id}) not found"
-                    )
-            else:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Client found but no brand mapping configured (scrunch_brand_id is null)"
-                )
-        
-        # Fall back to finding a brand by slug (for backward compatibility)
-        brand_result = supabase.client.table("brands").select("*").eq("slug", slug).execute()
-        brands = brand_result.data if hasattr(brand_result, 'data') else []
+        supabase = get_supabase_service()
         
+        brand_id = await resolve_dashboard_brand_id(
+            slug, "Client found but no brand mapping configured (scrunch_brand_id is null)"
+        )
+        brand_result = await execute_async(supabase.client.table("brands").select("*").eq("id", brand_id))
+        brands = result_rows(brand_result)
         if not brands:
-            raise HTTPException(status_code=404, detail="Brand or client not found")
+            raise HTTPException(status_code=404, detail=f"Brand (id: {brand_id}) not found")
         
         return brands[0]
     except HTTPException:
@@ -2804,12 +2615,12 @@ async def get_reporting_dashboard_by_client(
     Uses the client's scrunch_brand_id to fetch the data.
     """
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         brand_id = None
         
         # Get client from database
-        client_result = supabase.client.table("clients").select("*").eq("id", client_id).execute()
-        clients = client_result.data if hasattr(client_result, 'data') else []
+        client_result = supabase.client.table("clients").select("id,scrunch_brand_id").eq("id", client_id).execute()
+        clients = result_rows(client_result)
         
         if not clients:
             raise HTTPException(status_code=404, detail="Client not found")
@@ -2829,9 +2640,9 @@ async def get_reporting_dashboard_by_client(
         if not brand_id:
             raise HTTPException(status_code=404, detail="Brand ID not found")
         
-        # Call the existing get_reporting_dashboard function directly
-        # Since it's in the same module, we can call it directly
-        return await get_reporting_dashboard(brand_id, start_date, end_date)
+        # Call the existing get_reporting_dashboard function directly. Its service dependency
+        # is only injected on routed calls, so it is passed explicitly here
+        return await get_reporting_dashboard(brand_id, start_date, end_date, supabase=supabase)
         
     except HTTPException:
         raise
@@ -2854,38 +2665,13 @@ async def get_reporting_dashboard_by_slug(
     - Falls back to finding a brand by slug if no client found
     """
     try:
-        supabase = SupabaseService()
-        brand_id = None
-        
-        # First, try to find a client by url_slug (for /reporting/client/:slug routes)
-        client = supabase.get_client_by_slug(slug)
-        if client:
-            # If client found, use the scrunch_brand_id from the client
-            if client.get("scrunch_brand_id"):
-                brand_id = client["scrunch_brand_id"]
-                logger.info(f"Found client by url_slug '{slug}', using scrunch_brand_id: {brand_id}")
-            else:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Client found but no brand mapping configured (scrunch_brand_id is null)"
-                )
-        else:
-            # Fall back to finding a brand by slug (for backward compatibility)
-            brand_result = supabase.client.table("brands").select("*").eq("slug", slug).execute()
-            brands = brand_result.data if hasattr(brand_result, 'data') else []
-            
-            if not brands:
-                raise HTTPException(status_code=404, detail="Brand or client not found")
-            
-            brand = brands[0]
-            brand_id = brand["id"]
-            logger.info(f"Found brand by slug '{slug}', using brand_id: {brand_id}")
-        
-        if not brand_id:
-            raise HTTPException(status_code=404, detail="Brand ID not found")
+        brand_id = await resolve_dashboard_brand_id(
+            slug, "Client found but no brand mapping configured (scrunch_brand_id is null)"
+        )
         
-        # Call the existing get_reporting_dashboard function directly instead of making HTTP request
-        result = await get_reporting_dashboard(brand_id, start_date, end_date)
+        # Call the existing get_reporting_dashboard function directly instead of making HTTP request;
+        # its service dependency is only injected on routed calls, so it is passed explicitly
+        result = await get_reporting_dashboard(brand_id, start_date, end_date, supabase=get_supabase_service())
         result["brand_slug"] = slug
         return result
         
@@ -2911,40 +2697,14 @@ async def get_scrunch_dashboard_data_by_slug(
     - Falls back to finding a brand by slug if no client found
     """
     try:
-        supabase = SupabaseService()
-        brand_id = None
-        
-        # First, try to find a client by url_slug (for /reporting/client/:slug routes)
-        client = supabase.get_client_by_slug(slug)
-        if client:
-            # If client found, use the scrunch_brand_id from the client
-            if client.get("scrunch_brand_id"):
-                brand_id = client["scrunch_brand_id"]
-                logger.info(f"Found client by url_slug '{slug}', using scrunch_brand_id: {brand_id}")
-            else:
-                raise HTTPException(
-                    status_code=404, 
-                    detail=f"Client found but no Scrunch brand mapping configured (scrunch_brand_id is null)"
-                )
-        else:
-            # Fall back to finding a brand by slug (for backward compatibility)
-            brand_result = supabase.client.table("brands").select("*").eq("slug", slug).execute()
-            brands = brand_result.data if hasattr(brand_result, 'data') else []
-            
-            if not brands:
-                raise HTTPException(status_code=404, detail="Brand or client not found")
-            
-            brand = brands[0]
-            brand_id = brand["id"]
-            logger.info(f"Found brand by slug '{slug}', using brand_id: {brand_id}")
-        
-        if not brand_id:
-            raise HTTPException(status_code=404, detail="Brand ID not found")
+        brand_id = await resolve_dashboard_brand_id(
+            slug, "Client found but no Scrunch brand mapping configured (scrunch_brand_id is null)"
+        )
         
-        # Call the existing get_scrunch_dashboard_data function
+        # Call the existing get_scrunch_dashboard_data function. Its result may be the cached
+        # payload shared by every caller, so the slug goes on a copy
         result = await get_scrunch_dashboard_data(brand_id, start_date, end_date)
-        result["brand_slug"] = slug
-        return result
+        return {**result, "brand_slug": slug}
         
     except HTTPException:
         raise
@@ -2963,23 +2723,25 @@ async def get_scrunch_dashboard_data(
 ):
     """Get Scrunch AI KPIs and chart data for reporting dashboard (separate endpoint for parallel loading)"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Get brand info
-        brand_result = supabase.client.table("brands").select("*").eq("id", brand_id).execute()
-        brands = brand_result.data if hasattr(brand_result, 'data') else []
-        
-        if not brands:
+        brand = await get_reporting_brand(brand_id)
+        if not brand:
             raise HTTPException(status_code=404, detail="Brand not found")
         
-        brand = brands[0]
-        
         # Set default date range
         if not start_date:
             start_date = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
         if not end_date:
             end_date = datetime.now().strftime("%Y-%m-%d")
         
+        # Serve the cached response when this brand and date range were assembled recently
+        cache_key = (brand_id, start_date, end_date)
+        cached = scrunch_dashboard_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         # Validate date range
         try:
             start_dt = datetime.strptime(start_date, "%Y-%m-%d")
@@ -3003,258 +2765,60 @@ async def get_scrunch_dashboard_data(
             "top_performing_prompts": [],
             "scrunch_ai_insights": []
         }
+        fetch_failed = False
         
         try:
-            # Calculate previous period for change comparison
-            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-            end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-            period_duration = (end_dt - start_dt).days + 1
-            prev_end = (start_dt - timedelta(days=1)).strftime("%Y-%m-%d")
-            prev_start = (start_dt - timedelta(days=period_duration)).strftime("%Y-%m-%d")
+            # Previous period for change comparison, from the dates parsed above
+            prev_start, prev_end = previous_period(start_dt, end_dt)
             
-            # Get responses for this brand filtered by date range (current period)
-            # Only select needed columns to avoid loading large JSONB fields unnecessarily
-            responses_query = supabase.client.table("responses").select(
-                "id,brand_id,prompt_id,platform,brand_present,brand_sentiment,competitors_present,citations"
-            ).eq("brand_id", brand_id)
-            responses_query = responses_query.gte("created_at", f"{start_date}T00:00:00Z").lte("created_at", f"{end_date}T23:59:59Z")
-            responses_result = responses_query.execute()
-            responses = responses_result.data if hasattr(responses_result, 'data') else []
+            # Get this brand's Scrunch KPI totals for the current and previous periods, its
+            # prompts and its per-prompt response stats, concurrently. The totals and stats are
+            # aggregated in Postgres, so no response rows are transferred.
+            period_metrics_query = scrunch_period_metrics_query(supabase, brand_id, start_date, end_date, prev_start, prev_end)
+            prompts_query = supabase.client.table("prompts").select("id,text,stage,topics").eq("brand_id", brand_id)
+            prompt_stats_query = scrunch_prompt_stats_query(supabase, brand_id, start_date, end_date)
             
-            logger.info(f"Found {len(responses)} Scrunch responses for brand {brand_id} in date range {start_date} to {end_date}")
-            
-            # Get responses for previous period
-            prev_responses_query = supabase.client.table("responses").select(
-                "id,brand_id,prompt_id,platform,brand_present,brand_sentiment,competitors_present,citations"
-            ).eq("brand_id", brand_id)
-            prev_responses_query = prev_responses_query.gte("created_at", f"{prev_start}T00:00:00Z").lte("created_at", f"{prev_end}T23:59:59Z")
-            prev_responses_result = prev_responses_query.execute()
-            prev_responses = prev_responses_result.data if hasattr(prev_responses_result, 'data') else []
-            
-            logger.info(f"Found {len(prev_responses)} Scrunch responses for brand {brand_id} in previous period {prev_start} to {prev_end}")
-            
-            # Get prompts for this brand (only select needed columns)
-            prompts_query = supabase.client.table("prompts").select("id,text,stage,topics,brand_id").eq("brand_id", brand_id)
-            prompts_result = prompts_query.execute()
-            prompts = prompts_result.data if hasattr(prompts_result, 'data') else []
+            period_metrics_result, prompts_result, prompt_stats_result = await asyncio.gather(
+                execute_async(period_metrics_query),
+                execute_async(prompts_query),
+                execute_async(prompt_stats_query)
+            )
+            current_metrics, prev_metrics = scrunch_period_metrics(result_rows(period_metrics_result))
+            prompts = result_rows(prompts_result)
+            prompt_stats = result_rows(prompt_stats_result)
+            response_count = current_metrics["prompt_search_volume"]
             
+            logger.info(f"Found {response_count} Scrunch responses for brand {brand_id} in date range {start_date} to {end_date}")
+            logger.info(f"Found {prev_metrics['prompt_search_volume']} Scrunch responses for brand {brand_id} in previous period {prev_start} to {prev_end}")
             logger.info(f"Found {len(prompts)} Scrunch prompts for brand {brand_id}")
             
             # Check if brand has any Scrunch data
-            has_any_scrunch_data = len(responses) > 0 or len(prompts) > 0
+            has_any_scrunch_data = response_count > 0 or len(prompts) > 0
             if not has_any_scrunch_data:
-                any_responses_query = supabase.client.table("responses").select("id").eq("brand_id", brand_id).limit(1)
-                any_responses_result = any_responses_query.execute()
-                any_responses = any_responses_result.data if hasattr(any_responses_result, 'data') else []
-                any_prompts_query = supabase.client.table("prompts").select("id").eq("brand_id", brand_id).limit(1)
-                any_prompts_result = any_prompts_query.execute()
-                any_prompts = any_prompts_result.data if hasattr(any_prompts_result, 'data') else []
-                if len(any_responses) > 0 or len(any_prompts) > 0:
-                    has_any_scrunch_data = True
-            
-            # Import the calculate_scrunch_metrics function logic
-            # (We'll use the same logic from the main endpoint)
-            # Note: responses_list should already be filtered by brand_id, but we validate for safety
-            def calculate_scrunch_metrics(responses_list, prompts_list=None, brand_id_filter=None):
-                if not responses_list:
-                    return {
-                        "total_citations": 0,
-                        "brand_present_count": 0,
-                        "brand_presence_rate": 0,
-                        "sentiment_score": 0,
-                        "prompt_search_volume": 0,
-                        "top10_prompt_percentage": 0,
-                        "competitive_benchmarking": {
-                            "brand_visibility_percent": 0,
-                            "competitor_avg_visibility_percent": 0
-                        },
-                        "prompt_reach": {
-                            "total_prompts_tracked": 0,
-                            "prompts_with_brand": 0,
-                            "display": "Tracked prompts: 0; brand appeared in 0 of them"
-                        },
-                        "citations_by_prompt": {},
-                    }
-                
-                # Initialize all tracking variables
-                total_citations = 0
-                brand_present_count = 0
-                sentiment_scores = {"positive": 0, "neutral": 0, "negative": 0}
-                prompt_counts = {}
-                prompt_platform_map = {}
-                unique_prompts_tracked = set()
-                unique_prompts_with_brand = set()
-                competitor_visibility_count = {}
-                total_responses_with_competitors = 0
-                citations_by_prompt = {}
-                valid_responses_count = 0
-                
-                # Single pass through responses - calculate everything at once
-                # Optimized: Pre-compile regex and use faster string operations
-                import json
-                import re
-                
-                # Pre-compile regex for faster sentiment matching
-                positive_pattern = re.compile(r'positive', re.IGNORECASE)
-                negative_pattern = re.compile(r'negative', re.IGNORECASE)
-                
-                # Cache for parsed JSON to avoid re-parsing
-                json_cache = {}
-                
-                for r in responses_list:
-                    # Filter by brand_id if provided (should already be filtered, but double-check)
-                    if brand_id_filter is not None:
-                        if r.get("brand_id") != brand_id_filter:
-                            continue
-                    valid_responses_count += 1
-                    
-                    prompt_id = r.get("prompt_id")
-                    brand_present = r.get("brand_present", False)
-                    
-                    # Track prompt counts and platforms (for top 10 calculation)
-                    if prompt_id:
-                        prompt_counts[prompt_id] = prompt_counts.get(prompt_id, 0) + 1
-                        unique_prompts_tracked.add(prompt_id)
-                        
-                        platform = r.get("platform")
-                        if platform:
-                            if prompt_id not in prompt_platform_map:
-                                prompt_platform_map[prompt_id] = set()
-                            prompt_platform_map[prompt_id].add(platform)
-                        
-                        if brand_present:
-                            unique_prompts_with_brand.add(prompt_id)
-                    
-                    # Count citations (highly optimized - avoid JSON parsing when possible)
-                    citations = r.get("citations")
-                    citation_count = 0
-                    if citations:
-                        if isinstance(citations, list):
-                            citation_count = len(citations)
-                        elif isinstance(citations, str):
-                            # Check cache first
-                            if citations in json_cache:
-                                citation_count = json_cache[citations]
-                            else:
-                                try:
-                                    parsed = json.loads(citations)
-                                    if isinstance(parsed, list):
-                                        citation_count = len(parsed)
-                                        json_cache[citations] = citation_count  # Cache result
-                                except:
-                                    pass
-                    
-                    total_citations += citation_count
-                    if prompt_id:
-                        citations_by_prompt[prompt_id] = citations_by_prompt.get(prompt_id, 0) + citation_count
-                    
-                    # Track brand presence
-                    if brand_present:
-                        brand_present_count += 1
-                    
-                    # Track competitors (optimized - use list comprehension for speed)
-                    competitors_present = r.get("competitors_present")
-                    if isinstance(competitors_present, list) and len(competitors_present) > 0:
-                        total_responses_with_competitors += 1
-                        # Use dict comprehension for faster updates
-                        for comp in competitors_present:
-                            if comp:
-                                competitor_visibility_count[comp] = competitor_visibility_count.get(comp, 0) + 1
-                    
-                    # Track sentiment (optimized - use pre-compiled regex)
-                    sentiment = r.get("brand_sentiment")
-                    if sentiment:
-                        if positive_pattern.search(sentiment):
-                            sentiment_scores["positive"] += 1
-                        elif negative_pattern.search(sentiment):
-                            sentiment_scores["negative"] += 1
-                        else:
-                            sentiment_scores["neutral"] += 1
-                
-                # Calculate Top 10 Prompt Percentage (optimized - use sorted once)
-                sorted_prompts = sorted(prompt_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-                top10_count = sum(count for _, count in sorted_prompts)
-                top10_prompt_percentage = (top10_count / valid_responses_count * 100) if valid_responses_count > 0 else 0
-                
-                # Calculate metrics (100% from source data only)
-                brand_presence_rate = (brand_present_count / valid_responses_count * 100) if valid_responses_count > 0 else 0
-                
-                total_sentiment_responses = sum(sentiment_scores.values())
-                if total_sentiment_responses > 0:
-                    sentiment_score = (
-                        (sentiment_scores["positive"] * 1.0 + 
-                         sentiment_scores["neutral"] * 0.0 + 
-                         sentiment_scores["negative"] * -1.0) / total_sentiment_responses * 100
-                    )
-                else:
-                    sentiment_score = 0
-                
-                brand_visibility_percent = brand_presence_rate
-                competitor_avg_visibility_percent = 0
-                if total_responses_with_competitors > 0:
-                    unique_competitors = len(competitor_visibility_count)
-                    if unique_competitors > 0:
-                        total_competitor_appearances = sum(competitor_visibility_count.values())
-                        competitor_avg_visibility_percent = (total_competitor_appearances / total_responses_with_competitors) * 100
-                
-                # Calculate Prompt Reach Metric
-                prompt_reach = {
-                    "total_prompts_tracked": len(unique_prompts_tracked),
-                    "prompts_with_brand": len(unique_prompts_with_brand),
-                    "display": f"Tracked prompts: {len(unique_prompts_tracked)}; brand appeared in {len(unique_prompts_with_brand)} of them"
-                }
-                
-                return {
-                    "total_citations": total_citations,
-                    "brand_present_count": brand_present_count,
-                    "brand_presence_rate": brand_presence_rate,
-                    "sentiment_score": sentiment_score,
-                    "prompt_search_volume": valid_responses_count,
-                    "top10_prompt_percentage": top10_prompt_percentage,
-                    "competitive_benchmarking": {
-                        "brand_visibility_percent": brand_visibility_percent,
-                        "competitor_avg_visibility_percent": competitor_avg_visibility_percent
-                    },
-                    "prompt_reach": prompt_reach,
-                    "citations_by_prompt": citations_by_prompt,
-                }
+                any_scrunch_result = await execute_async(
+                    supabase.client.rpc("brand_has_scrunch_data", {"p_brand_id": brand_id})
+                )
+                has_any_scrunch_data = bool(getattr(any_scrunch_result, "data", False))
             
             if has_any_scrunch_data:
-                # Calculate current period metrics (will be zero if no responses)
-                current_metrics = calculate_scrunch_metrics(responses, prompts, brand_id)
-                
-                # Calculate previous period metrics (will be zero if no responses)
-                prev_metrics = calculate_scrunch_metrics(prev_responses, prompts, brand_id)
-                
-                # Extract citations_by_prompt from current_metrics (already calculated)
-                citations_by_prompt = current_metrics.get("citations_by_prompt", {})
-                
-                def calculate_change(current, previous):
-                    if current == 0 and previous == 0:
-                        return 0.0
-                    if previous == 0 and current > 0:
-                        return 100.0
-                    if current == 0 and previous > 0:
-                        return -100.0
-                    if previous > 0:
-                        return ((current - previous) / previous) * 100
-                    return 0.0
-                
-                total_citations_change = calculate_change(current_metrics["total_citations"], prev_metrics["total_citations"])
-                brand_presence_rate_change = calculate_change(current_metrics["brand_presence_rate"], prev_metrics["brand_presence_rate"])
-                sentiment_score_change = calculate_change(current_metrics["sentiment_score"], prev_metrics["sentiment_score"])
-                top10_prompt_change = calculate_change(current_metrics["top10_prompt_percentage"], prev_metrics["top10_prompt_percentage"])
-                prompt_search_volume_change = calculate_change(current_metrics["prompt_search_volume"], prev_metrics["prompt_search_volume"])
+                # A KPI that newly appeared shows a 100% increase
+                total_citations_change = percent_change(current_metrics["total_citations"], prev_metrics["total_citations"], from_zero=100.0)
+                brand_presence_rate_change = percent_change(current_metrics["brand_presence_rate"], prev_metrics["brand_presence_rate"], from_zero=100.0)
+                sentiment_score_change = percent_change(current_metrics["sentiment_score"], prev_metrics["sentiment_score"], from_zero=100.0)
+                top10_prompt_change = percent_change(current_metrics["top10_prompt_percentage"], prev_metrics["top10_prompt_percentage"], from_zero=100.0)
+                prompt_search_volume_change = percent_change(current_metrics["prompt_search_volume"], prev_metrics["prompt_search_volume"], from_zero=100.0)
                 
                 competitive_current = current_metrics.get("competitive_benchmarking", {})
                 competitive_prev = prev_metrics.get("competitive_benchmarking", {})
-                brand_visibility_change = calculate_change(
+                brand_visibility_change = percent_change(
                     competitive_current.get("brand_visibility_percent", 0),
-                    competitive_prev.get("brand_visibility_percent", 0)
+                    competitive_prev.get("brand_visibility_percent", 0),
+                    from_zero=100.0
                 )
-                competitor_avg_change = calculate_change(
+                competitor_avg_change = percent_change(
                     competitive_current.get("competitor_avg_visibility_percent", 0),
-                    competitive_prev.get("competitor_avg_visibility_percent", 0)
+                    competitive_prev.get("competitor_avg_visibility_percent", 0),
+                    from_zero=100.0
                 )
                 
                 scrunch_kpis = {
@@ -3322,150 +2886,59 @@ async def get_scrunch_dashboard_data(
                     }
                 }
                 
-                # Get top performing prompts (optimized - use data already calculated in metrics)
-                top_prompts_start = time.time()
-                # Build prompt lookup map for quick access
-                prompt_map = {p.get("id"): p for p in prompts if p.get("brand_id") == brand_id and p.get("id")}
-                
-                # Extract prompt counts and platform variants from responses (single pass)
-                prompt_response_counts = {}
-                prompt_variants = {}
-                total_responses_for_brand = len([r for r in responses if r.get("brand_id") == brand_id])
+                # Top performing prompts and Scrunch AI insights come from the per-prompt stats.
+                # The prompts query is already filtered by brand, so indexing them by id is enough
+                # to keep only this brand's prompts.
+                prompts_by_id = {prompt["id"]: prompt for prompt in prompts if prompt.get("id")}
+                scrunch_chart_data["top_performing_prompts"] = build_top_performing_prompts(
+                    prompt_stats, prompts_by_id, response_count
+                )
                 
-                for r in responses:
-                    if r.get("brand_id") != brand_id:
+                insights = []
+                for stats in prompt_stats:
+                    prompt = prompts_by_id.get(stats.get("prompt_id"))
+                    prompt_response_count = stats.get("response_count") or 0
+                    if not prompt or prompt_response_count == 0:
                         continue
-                    prompt_id = r.get("prompt_id")
-                    if prompt_id and prompt_id in prompt_map:
-                        prompt_response_counts[prompt_id] = prompt_response_counts.get(prompt_id, 0) + 1
-                        platform = r.get("platform")
-                        if platform:
-                            if prompt_id not in prompt_variants:
-                                prompt_variants[prompt_id] = set()
-                            prompt_variants[prompt_id].add(platform)
-                
-                # Sort and build top performing prompts
-                top_prompts = sorted(prompt_response_counts.items(), key=lambda x: x[1], reverse=True)[:10]
-                top_performing_prompts = []
-                for idx, (prompt_id, count) in enumerate(top_prompts, 1):
-                    prompt = prompt_map.get(prompt_id)
-                    if prompt:
-                        unique_variants = len(prompt_variants.get(prompt_id, set()))
-                        variants_count = unique_variants if unique_variants > 0 else 1
-                        
-                        top_performing_prompts.append({
-                            "id": prompt_id,
-                            "text": prompt.get("text", "N/A"),
-                            "rank": idx,
-                            "responseCount": count,
-                            "variants": variants_count,
-                            "citations": citations_by_prompt.get(prompt_id, 0),
-                            "totalResponsesForBrand": total_responses_for_brand
-                        })
-                
-                scrunch_chart_data["top_performing_prompts"] = top_performing_prompts
-                
-                # Calculate Scrunch AI Insights (optimized - single pass through responses)
-                insights_start = time.time()
-                if prompts and responses:
-                    # Build prompt lookup map
-                    prompt_map_insights = {p.get("id"): p for p in prompts if p.get("brand_id") == brand_id and p.get("id")}
-                    
-                    # Single pass through responses to build insights data
-                    prompt_insights_data = {}
-                    import json
-                    for r in responses:
-                        if r.get("brand_id") != brand_id:
-                            continue
-                        prompt_id = r.get("prompt_id")
-                        if not prompt_id or prompt_id not in prompt_map_insights:
-                            continue
-                        
-                        if prompt_id not in prompt_insights_data:
-                            prompt_insights_data[prompt_id] = {
-                                "response_count": 0,
-                                "presence_count": 0,
-                                "variants": set(),
-                                "citations": 0,
-                                "competitors": set()
-                            }
-                        
-                        data = prompt_insights_data[prompt_id]
-                        data["response_count"] += 1
-                        if r.get("brand_present"):
-                            data["presence_count"] += 1
-                        
-                        platform = r.get("platform")
-                        if platform:
-                            data["variants"].add(platform)
-                        
-                        # Count citations (reuse JSON parsing logic)
-                        citations = r.get("citations")
-                        if citations:
-                            if isinstance(citations, list):
-                                data["citations"] += len(citations)
-                            elif isinstance(citations, str):
-                                try:
-                                    parsed = json.loads(citations)
-                                    if isinstance(parsed, list):
-                                        data["citations"] += len(parsed)
-                                except:
-                                    pass
-                        
-                        # Track competitors
-                        competitors_present = r.get("competitors_present", [])
-                        if isinstance(competitors_present, list):
-                            for comp in competitors_present:
-                                if comp:
-                                    data["competitors"].add(comp)
+                    presence = (stats.get("brand_present_count") or 0) / prompt_response_count * 100
                     
-                    # Build insights list
-                    insights = []
-                    for prompt_id, data in prompt_insights_data.items():
-                        if data["response_count"] > 0:
-                            prompt = prompt_map_insights[prompt_id]
-                            presence = (data["presence_count"] / data["response_count"] * 100) if data["response_count"] > 0 else 0
-                            
-                            # Get category
-                            category = (
-                                prompt.get("topics", [None])[0] if prompt.get("topics") else None
-                            ) or (
-                                (prompt.get("text") or prompt.get("prompt_text") or "").split(" ")[:3]
-                            ) or prompt.get("stage") or "General"
-                            
-                            if isinstance(category, list):
-                                category = " ".join(category)
-                            
-                            insights.append({
-                                "id": prompt_id,
-                                "seedPrompt": prompt.get("text") or prompt.get("prompt_text") or "N/A",
-                                "stage": prompt.get("stage") or "Unknown",
-                                "variants": len(data["variants"]) or 1,
-                                "responses": data["response_count"],
-                                "presence": round(presence, 1),
-                                "presenceChange": 0,
-                                "citations": data["citations"],
-                                "citationsChange": 0,
-                                "competitors": len(data["competitors"]),
-                                "competitorsChange": 0,
-                                "category": category
-                            })
+                    text = prompt.get("text") or ""
                     
-                    # Sort and limit
-                    insights.sort(key=lambda x: x["responses"], reverse=True)
-                    scrunch_chart_data["scrunch_ai_insights"] = insights[:20]
+                    insights.append({
+                        "id": stats["prompt_id"],
+                        "seedPrompt": text or "N/A",
+                        "stage": prompt.get("stage") or "Unknown",
+                        "variants": stats.get("platform_count") or 1,
+                        "responses": prompt_response_count,
+                        "presence": round(presence, 1),
+                        "presenceChange": 0,
+                        "citations": stats.get("citation_count") or 0,
+                        "citationsChange": 0,
+                        "competitors": stats.get("competitor_count") or 0,
+                        "competitorsChange": 0,
+                        "category": prompt_category(prompt, text)
+                    })
+                    # Stats are ordered by response count, so the first 20 are the most answered
+                    if len(insights) == 20:
+                        break
+                scrunch_chart_data["scrunch_ai_insights"] = insights
                 
         except Exception as e:
             import traceback
             error_trace = traceback.format_exc()
             logger.error(f"Error fetching Scrunch AI KPIs for brand {brand_id}: {str(e)}\n{error_trace}")
+            fetch_failed = True
         
-        return {
+        payload = {
             "brand_id": brand_id,
             "kpis": scrunch_kpis,
             "chart_data": scrunch_chart_data,
             "available": bool(scrunch_kpis)
         }
+        # Only complete responses are cached; a failed fetch is retried on the next load
+        if not fetch_failed:
+            scrunch_dashboard_cache.set(cache_key, payload)
+        return payload
         
     except HTTPException:
         raise
@@ -3544,7 +3017,7 @@ async def get_brand_kpi_selections(brand_id: int):
     
     try:
         init_start = time.time()
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         init_time = time.time() - init_start
         if init_time > 0.5:
             logger.warning(f"Slow SupabaseService initialization: {init_time:.2f}s for brand {brand_id}")
@@ -3560,7 +3033,7 @@ async def get_brand_kpi_selections(brand_id: int):
         if query_time > 1.0:
             logger.warning(f"Slow KPI selections query: {query_time:.2f}s for brand {brand_id}")
         
-        selections = selection_result.data if hasattr(selection_result, 'data') else []
+        selections = result_rows(selection_result)
         
         if selections and len(selections) > 0:
             selection = selections[0]
@@ -3607,18 +3080,18 @@ async def save_brand_kpi_selections(
     from datetime import datetime
     
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if brand exists
         brand_result = supabase.client.table("brands").select("id").eq("id", brand_id).execute()
-        brands = brand_result.data if hasattr(brand_result, 'data') else []
+        brands = result_rows(brand_result)
         
         if not brands:
             raise HTTPException(status_code=404, detail="Brand not found")
         
         # Get current KPI selection record to check version
         existing_result = supabase.client.table("brand_kpi_selections").select("version, selected_kpis, visible_sections, last_modified_by").eq("brand_id", brand_id).execute()
-        existing = existing_result.data if hasattr(existing_result, 'data') else []
+        existing = result_rows(existing_result)
         
         # Version conflict check (only if version is provided and record exists)
         if request.version is not None and existing and len(existing) > 0:
@@ -3712,11 +3185,11 @@ async def update_brand_ga4_property_id(
     from datetime import datetime
     
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Get current brand to check version
         brand_result = supabase.client.table("brands").select("id, version, ga4_property_id, last_modified_by").eq("id", brand_id).execute()
-        brands = brand_result.data if hasattr(brand_result, 'data') else []
+        brands = result_rows(brand_result)
         
         if not brands:
             raise HTTPException(status_code=404, detail="Brand not found")
@@ -3747,6 +3220,9 @@ async def update_brand_ga4_property_id(
         }
         
         result = supabase.client.table("brands").update(update_data).eq("id", brand_id).execute()
+        reporting_brand_cache.invalidate(brand_id)
+        brands_with_ga4_cache.clear()
+        supabase.clear_reporting_dashboard_snapshots(brand_id)
         
         # Get updated version
         updated_result = supabase.client.table("brands").select("version").eq("id", brand_id).execute()
@@ -3788,25 +3264,25 @@ async def link_agency_analytics_campaign(
 ):
     """Link an Agency Analytics campaign to a brand"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if brand exists
         brand_result = supabase.client.table("brands").select("id").eq("id", brand_id).execute()
-        brands = brand_result.data if hasattr(brand_result, 'data') else []
+        brands = result_rows(brand_result)
         
         if not brands:
             raise HTTPException(status_code=404, detail="Brand not found")
         
         # Check if campaign exists
         campaign_result = supabase.client.table("agency_analytics_campaigns").select("id").eq("id", campaign_id).execute()
-        campaigns = campaign_result.data if hasattr(campaign_result, 'data') else []
+        campaigns = result_rows(campaign_result)
         
         if not campaigns:
             raise HTTPException(status_code=404, detail="Agency Analytics campaign not found")
         
         # Check if link already exists
         existing_link_result = supabase.client.table("agency_analytics_campaign_brands").select("*").eq("brand_id", brand_id).eq("campaign_id", campaign_id).execute()
-        existing_links = existing_link_result.data if hasattr(existing_link_result, 'data') else []
+        existing_links = result_rows(existing_link_result)
         
         if existing_links:
             return {
@@ -3824,6 +3300,7 @@ async def link_agency_analytics_campaign(
         }
         
         result = supabase.client.table("agency_analytics_campaign_brands").insert(link_data).execute()
+        supabase.clear_reporting_dashboard_snapshots(brand_id)
         
         logger.info(f"Linked campaign {campaign_id} to brand {brand_id} by user {current_user.get('email')}")
         
@@ -3847,24 +3324,25 @@ async def unlink_agency_analytics_campaign(
 ):
     """Unlink an Agency Analytics campaign from a brand"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if brand exists
         brand_result = supabase.client.table("brands").select("id").eq("id", brand_id).execute()
-        brands = brand_result.data if hasattr(brand_result, 'data') else []
+        brands = result_rows(brand_result)
         
         if not brands:
             raise HTTPException(status_code=404, detail="Brand not found")
         
         # Check if link exists
         existing_link_result = supabase.client.table("agency_analytics_campaign_brands").select("*").eq("brand_id", brand_id).eq("campaign_id", campaign_id).execute()
-        existing_links = existing_link_result.data if hasattr(existing_link_result, 'data') else []
+        existing_links = result_rows(existing_link_result)
         
         if not existing_links:
             raise HTTPException(status_code=404, detail="Campaign is not linked to this brand")
         
         # Delete link
         result = supabase.client.table("agency_analytics_campaign_brands").delete().eq("brand_id", brand_id).eq("campaign_id", campaign_id).execute()
+        supabase.clear_reporting_dashboard_snapshots(brand_id)
         
         logger.info(f"Unlinked campaign {campaign_id} from brand {brand_id} by user {current_user.get('email')}")
         
@@ -3887,11 +3365,11 @@ async def get_brand_linked_campaigns(
 ):
     """Get all Agency Analytics campaigns linked to a brand"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
-        # Get linked campaigns
-        links_result = supabase.client.table("agency_analytics_campaign_brands").select("*").eq("brand_id", brand_id).execute()
-        links = links_result.data if hasattr(links_result, 'data') else []
+        # Get linked campaigns, embedded through the link table's campaign_id foreign key
+        links_result = supabase.client.table("agency_analytics_campaign_brands").select("agency_analytics_campaigns(*)").eq("brand_id", brand_id).execute()
+        links = result_rows(links_result)
         
         if not links:
             return {
@@ -3900,14 +3378,11 @@ async def get_brand_linked_campaigns(
                 "available_campaigns": []
             }
         
-        # Get campaign details
-        campaign_ids = [link["campaign_id"] for link in links]
-        campaigns_result = supabase.client.table("agency_analytics_campaigns").select("*").in_("id", campaign_ids).execute()
-        linked_campaigns = campaigns_result.data if hasattr(campaigns_result, 'data') else []
+        linked_campaigns = [link["agency_analytics_campaigns"] for link in links if link.get("agency_analytics_campaigns")]
         
         # Get all available campaigns for selection
         all_campaigns_result = supabase.client.table("agency_analytics_campaigns").select("*").order("id", desc=True).execute()
-        all_campaigns = all_campaigns_result.data if hasattr(all_campaigns_result, 'data') else []
+        all_campaigns = result_rows(all_campaigns_result)
         
         return {
             "brand_id": brand_id,
@@ -3935,11 +3410,11 @@ async def upload_brand_logo(
 ):
     """Upload brand logo to Supabase Storage"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if brand exists
         brand_result = supabase.client.table("brands").select("id").eq("id", brand_id).execute()
-        brands = brand_result.data if hasattr(brand_result, 'data') else []
+        brands = result_rows(brand_result)
         
         if not brands:
             raise HTTPException(status_code=404, detail="Brand not found")
@@ -4032,11 +3507,11 @@ async def delete_brand_logo(
 ):
     """Delete brand logo"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if brand exists and get current logo
         brand_result = supabase.client.table("brands").select("id, logo_url").eq("id", brand_id).execute()
-        brands = brand_result.data if hasattr(brand_result, 'data') else []
+        brands = result_rows(brand_result)
         
         if not brands:
             raise HTTPException(status_code=404, detail="Brand not found")
@@ -4091,11 +3566,11 @@ async def update_brand_theme(
     from datetime import datetime
     
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Get current brand to check version
         brand_result = supabase.client.table("brands").select("id, version, theme, last_modified_by").eq("id", brand_id).execute()
-        brands = brand_result.data if hasattr(brand_result, 'data') else []
+        brands = result_rows(brand_result)
         
         if not brands:
             raise HTTPException(status_code=404, detail="Brand not found")
@@ -4188,7 +3663,7 @@ async def get_clients(
 ):
     """Get all clients from database with pagination and search"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Calculate offset from page
         offset = (page - 1) * page_size if page > 0 else 0
@@ -4213,8 +3688,8 @@ async def get_clients(
         
         # Execute query
         result = query.execute()
-        all_items = result.data if hasattr(result, 'data') else []
-        total_count = result.count if hasattr(result, 'count') else len(all_items)
+        all_items = result_rows(result)
+        total_count = result_count(result, len(all_items))
         
         # Calculate total pages
         total_pages = (total_count + page_size - 1) // page_size if page_size > 0 else 0
@@ -4237,7 +3712,7 @@ async def get_clients(
                     "keyword_phrase, primary_keyword"
                 ).in_("campaign_id", campaign_ids).execute()
                 
-                keywords_data = keywords_result.data if hasattr(keywords_result, 'data') else []
+                keywords_data = result_rows(keywords_result)
                 # Extract unique keyword phrases, prioritizing primary keywords
                 keyword_phrases = set()
                 for kw in keywords_data:
@@ -4273,7 +3748,7 @@ async def get_client(
 ):
     """Get a specific client by ID"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         result = supabase.client.table("clients").select("*, client_campaigns(campaign_id, agency_analytics_campaigns(*))").eq("id", client_id).limit(1).execute()
         
@@ -4294,7 +3769,7 @@ async def get_client_by_slug(
 ):
     """Get client by URL slug (public access for whitelabeled reports)"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         client = supabase.get_client_by_slug(url_slug)
         
         if not client:
@@ -4324,11 +3799,11 @@ async def update_client_mappings(
     from datetime import datetime
     
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Get current client to check version
-        client_result = supabase.client.table("clients").select("id, version, ga4_property_id, scrunch_brand_id, last_modified_by").eq("id", client_id).execute()
-        clients = client_result.data if hasattr(client_result, 'data') else []
+        client_result = supabase.client.table("clients").select("id, version, url_slug, ga4_property_id, scrunch_brand_id, last_modified_by").eq("id", client_id).execute()
+        clients = result_rows(client_result)
         
         if not clients:
             raise HTTPException(status_code=404, detail="Client not found")
@@ -4361,6 +3836,8 @@ async def update_client_mappings(
         
         if not success:
             raise HTTPException(status_code=500, detail="Failed to update client mappings")
+        if current_client.get("url_slug"):
+            dashboard_slug_cache.invalidate(current_client["url_slug"])
         
         # Get updated version
         updated_result = supabase.client.table("clients").select("version").eq("id", client_id).execute()
@@ -4414,11 +3891,11 @@ async def update_client_theme(
     from datetime import datetime
     
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Get current client to check version
         client_result = supabase.client.table("clients").select("id, version, theme_color, logo_url, secondary_color, font_family, favicon_url, report_title, custom_css, footer_text, header_text, last_modified_by").eq("id", client_id).execute()
-        clients = client_result.data if hasattr(client_result, 'data') else []
+        clients = result_rows(client_result)
         
         if not clients:
             raise HTTPException(status_code=404, detail="Client not found")
@@ -4507,11 +3984,11 @@ async def upload_client_logo(
 ):
     """Upload client logo to Supabase Storage"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if client exists (same pattern as brand logo upload)
         client_result = supabase.client.table("clients").select("id").eq("id", client_id).execute()
-        clients = client_result.data if hasattr(client_result, 'data') else []
+        clients = result_rows(client_result)
         
         if not clients:
             raise HTTPException(status_code=404, detail="Client not found")
@@ -4600,7 +4077,7 @@ async def delete_client_logo(
 ):
     """Delete client logo"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if client exists and get current logo
         client = supabase.get_client_by_id(client_id)
@@ -4650,7 +4127,7 @@ async def get_client_campaigns(
 ):
     """Get all campaigns linked to a client"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if client exists
         client = supabase.get_client_by_id(client_id)
@@ -4680,7 +4157,7 @@ async def link_client_campaign(
 ):
     """Link a campaign to a client"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if client exists
         client = supabase.get_client_by_id(client_id)
@@ -4689,14 +4166,14 @@ async def link_client_campaign(
         
         # Check if campaign exists
         campaign_result = supabase.client.table("agency_analytics_campaigns").select("id").eq("id", campaign_id).execute()
-        campaigns = campaign_result.data if hasattr(campaign_result, 'data') else []
+        campaigns = result_rows(campaign_result)
         
         if not campaigns:
             raise HTTPException(status_code=404, detail="Agency Analytics campaign not found")
         
         # Check if link already exists
         existing_link_result = supabase.client.table("client_campaigns").select("*").eq("client_id", client_id).eq("campaign_id", campaign_id).execute()
-        existing_links = existing_link_result.data if hasattr(existing_link_result, 'data') else []
+        existing_links = result_rows(existing_link_result)
         
         if existing_links:
             # Update existing link
@@ -4745,7 +4222,7 @@ async def unlink_client_campaign(
 ):
     """Unlink a campaign from a client"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if client exists
         client = supabase.get_client_by_id(client_id)
@@ -4754,7 +4231,7 @@ async def unlink_client_campaign(
         
         # Check if link exists
         existing_link_result = supabase.client.table("client_campaigns").select("*").eq("client_id", client_id).eq("campaign_id", campaign_id).execute()
-        existing_links = existing_link_result.data if hasattr(existing_link_result, 'data') else []
+        existing_links = result_rows(existing_link_result)
         
         if not existing_links:
             raise HTTPException(status_code=404, detail="Campaign is not linked to this client")
@@ -4803,7 +4280,7 @@ async def get_client_keywords(
 ):
     """Get keywords for a client with filtering, sorting, and pagination"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if client exists
         client = supabase.get_client_by_id(client_id)
@@ -4860,9 +4337,11 @@ async def get_client_keywords(
         
         # Get all keywords first (we'll filter by summary fields in Python)
         all_keywords = query.execute()
-        keywords_data = all_keywords.data if hasattr(all_keywords, 'data') else []
+        keywords_data = result_rows(all_keywords)
         
-        # Process and filter by summary fields (volume, rankings, competition)
+        # Process and filter by summary fields (volume, rankings, competition). Each keyword's
+        # summary is resolved once and kept alongside it for sorting and formatting
+        tag_list = [t.strip().lower() for t in tags.split(",")] if tags else []
         filtered_keywords = []
         for kw in keywords_data:
             summary = kw.get("agency_analytics_keyword_ranking_summaries")
@@ -4895,35 +4374,34 @@ async def get_client_keywords(
                 continue
             
             # Filter by tags if provided
-            if tags:
+            if tag_list:
                 kw_tags = kw.get("tags", "") or ""
-                tag_list = [t.strip().lower() for t in tags.split(",")]
                 kw_tag_list = [t.strip().lower() for t in kw_tags.split(",") if t.strip()]
                 if not any(tag in kw_tag_list for tag in tag_list):
                     continue
             
-            filtered_keywords.append(kw)
+            filtered_keywords.append((kw, summary))
         
         # Sort keywords
         reverse_order = sort_order.lower() == "desc"
         if sort_by == "volume":
             filtered_keywords.sort(
-                key=lambda x: (x.get("agency_analytics_keyword_ranking_summaries", [{}])[0] if isinstance(x.get("agency_analytics_keyword_ranking_summaries"), list) else {}).get("search_volume", 0) or 0,
+                key=lambda item: item[1].get("search_volume", 0) or 0,
                 reverse=reverse_order
             )
         elif sort_by == "google_ranking":
             filtered_keywords.sort(
-                key=lambda x: (x.get("agency_analytics_keyword_ranking_summaries", [{}])[0] if isinstance(x.get("agency_analytics_keyword_ranking_summaries"), list) else {}).get("google_ranking") or 999,
+                key=lambda item: item[1].get("google_ranking") or 999,
                 reverse=not reverse_order  # Lower ranking is better, so reverse logic
             )
         elif sort_by == "bing_ranking":
             filtered_keywords.sort(
-                key=lambda x: (x.get("agency_analytics_keyword_ranking_summaries", [{}])[0] if isinstance(x.get("agency_analytics_keyword_ranking_summaries"), list) else {}).get("bing_ranking") or 999,
+                key=lambda item: item[1].get("bing_ranking") or 999,
                 reverse=not reverse_order
             )
         elif sort_by == "keyword_phrase":
             filtered_keywords.sort(
-                key=lambda x: (x.get("keyword_phrase", "") or "").lower(),
+                key=lambda item: (item[0].get("keyword_phrase", "") or "").lower(),
                 reverse=reverse_order
             )
         
@@ -4934,13 +4412,7 @@ async def get_client_keywords(
         bing_rankings_count = 0
         bing_change_total = 0
         
-        for kw in filtered_keywords:
-            summary = kw.get("agency_analytics_keyword_ranking_summaries")
-            if summary and isinstance(summary, list) and len(summary) > 0:
-                summary = summary[0]
-            elif not summary:
-                continue
-            
+        for _, summary in filtered_keywords:
             if summary.get("google_ranking") is not None:
                 google_rankings_count += 1
                 change = summary.get("ranking_change", 0) or 0
@@ -4959,13 +4431,7 @@ async def get_client_keywords(
         
         # Format response
         formatted_keywords = []
-        for kw in paginated_keywords:
-            summary = kw.get("agency_analytics_keyword_ranking_summaries")
-            if summary and isinstance(summary, list) and len(summary) > 0:
-                summary = summary[0]
-            else:
-                summary = {}
-            
+        for kw, summary in paginated_keywords:
             campaign = kw.get("agency_analytics_campaigns")
             if campaign and isinstance(campaign, dict):
                 campaign_name = campaign.get("company", "")
@@ -5035,7 +4501,7 @@ async def get_client_keyword_rankings_over_time(
 ):
     """Get keyword rankings distribution over time by position buckets"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if client exists
         client = supabase.get_client_by_id(client_id)
@@ -5063,7 +4529,7 @@ async def get_client_keyword_rankings_over_time(
             keyword_query = keyword_query.eq("search_location_country_code", location_country)
         
         keywords_result = keyword_query.execute()
-        keyword_ids = [kw.get("id") for kw in (keywords_result.data if hasattr(keywords_result, 'data') else []) if kw.get("id")]
+        keyword_ids = [kw.get("id") for kw in (result_rows(keywords_result)) if kw.get("id")]
         
         if not keyword_ids:
             return {"data": []}
@@ -5074,7 +4540,7 @@ async def get_client_keyword_rankings_over_time(
         ).in_("keyword_id", keyword_ids).gte("date", start_date).lte("date", end_date).order("date", desc=False)
         
         rankings_result = rankings_query.execute()
-        rankings_data = rankings_result.data if hasattr(rankings_result, 'data') else []
+        rankings_data = result_rows(rankings_result)
         
         # Group by date and calculate position buckets
         date_groups = {}
@@ -5175,7 +4641,7 @@ async def get_client_keyword_summary(
 ):
     """Get keyword summary KPIs for a client"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if client exists
         client = supabase.get_client_by_id(client_id)
@@ -5213,7 +4679,7 @@ async def get_client_keyword_summary(
             query = query.eq("search_location_country_code", location_country)
         
         keywords_result = query.execute()
-        keywords_data = keywords_result.data if hasattr(keywords_result, 'data') else []
+        keywords_data = result_rows(keywords_result)
         
         # Calculate KPIs
         total_keywords = len(keywords_data)
@@ -5294,32 +4760,29 @@ def calculate_presence_metrics(responses):
         }
     
     total_responses = len(responses)
-    brand_present_count = sum(1 for r in responses if r.get("brand_present", False))
-    presence_percentage = (brand_present_count / total_responses * 100) if total_responses > 0 else 0
-    
-    # Generate sparkline data (group by week)
-    sparkline_data = {}
+    brand_present_count = 0
+    # Responses and brand-present responses per week, for the sparkline
+    week_totals = Counter()
+    week_present = Counter()
     for response in responses:
+        brand_present = response.get("brand_present", False)
+        if brand_present:
+            brand_present_count += 1
+        
         created_at = response.get("created_at")
         if created_at:
             try:
                 date_obj = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-                week_key = date_obj.strftime("%Y-W%W")
-                if week_key not in sparkline_data:
-                    sparkline_data[week_key] = {"total": 0, "present": 0}
-                sparkline_data[week_key]["total"] += 1
-                if response.get("brand_present", False):
-                    sparkline_data[week_key]["present"] += 1
-            except:
-                pass
+            except ValueError:
+                continue
+            week_key = date_obj.strftime("%Y-W%W")
+            week_totals[week_key] += 1
+            if brand_present:
+                week_present[week_key] += 1
+    presence_percentage = (brand_present_count / total_responses * 100) if total_responses > 0 else 0
     
     # Convert to sorted list
-    sorted_weeks = sorted(sparkline_data.keys())
-    sparkline_list = []
-    for week in sorted_weeks:
-        week_data = sparkline_data[week]
-        week_presence = (week_data["present"] / week_data["total"] * 100) if week_data["total"] > 0 else 0
-        sparkline_list.append(week_presence)
+    sparkline_list = [week_present[week] / week_totals[week] * 100 for week in sorted(week_totals)]
     
     return {
         "presence_percentage": round(presence_percentage, 1),
@@ -5334,64 +4797,21 @@ def calculate_citation_metrics(responses):
             "sparkline_data": []
         }
     
-    import json
     total_citations = 0
-    json_cache = {}
+    # Citations per week, for the sparkline
+    sparkline_data = defaultdict(int)
     
     for response in responses:
-        citations = response.get("citations")
-        if citations:
-            if isinstance(citations, list):
-                citation_count = len(citations)
-            elif isinstance(citations, str):
-                if citations in json_cache:
-                    citation_count = json_cache[citations]
-                else:
-                    try:
-                        parsed = json.loads(citations)
-                        citation_count = len(parsed) if isinstance(parsed, list) else 0
-                        json_cache[citations] = citation_count
-                    except:
-                        citation_count = 0
-            else:
-                citation_count = 0
-        else:
-            citation_count = 0
+        citation_count = response_citation_count(response)
         total_citations += citation_count
-    
-    # Generate sparkline data (group by week)
-    sparkline_data = {}
-    for response in responses:
+        
         created_at = response.get("created_at")
-        citations = response.get("citations")
         if created_at:
             try:
                 date_obj = datetime.fromisoformat(created_at.replace("Z", "+00:00"))
-                week_key = date_obj.strftime("%Y-W%W")
-                if week_key not in sparkline_data:
-                    sparkline_data[week_key] = 0
-                
-                if citations:
-                    if isinstance(citations, list):
-                        citation_count = len(citations)
-                    elif isinstance(citations, str):
-                        if citations in json_cache:
-                            citation_count = json_cache[citations]
-                        else:
-                            try:
-                                parsed = json.loads(citations)
-                                citation_count = len(parsed) if isinstance(parsed, list) else 0
-                                json_cache[citations] = citation_count
-                            except:
-                                citation_count = 0
-                    else:
-                        citation_count = 0
-                else:
-                    citation_count = 0
-                
-                sparkline_data[week_key] += citation_count
-            except:
-                pass
+            except ValueError:
+                continue
+            sparkline_data[date_obj.strftime("%Y-W%W")] += citation_count
     
     # Convert to sorted list
     sorted_weeks = sorted(sparkline_data.keys())
@@ -5407,20 +4827,18 @@ def extract_competitors(responses):
     if not responses:
         return []
     
-    competitors_count = {}
+    competitors_count = Counter()
     total_responses_with_competitors = 0
     
     for response in responses:
         competitors_present = response.get("competitors_present", [])
         if competitors_present:
             total_responses_with_competitors += 1
-            for comp in competitors_present:
-                if comp:
-                    competitors_count[comp] = competitors_count.get(comp, 0) + 1
+            competitors_count.update(comp for comp in competitors_present if comp)
     
-    # Calculate percentages
+    # Calculate percentages for the top 10
     competitors_list = []
-    for comp_name, count in sorted(competitors_count.items(), key=lambda x: x[1], reverse=True):
+    for comp_name, count in competitors_count.most_common(10):
         percentage = (count / total_responses_with_competitors * 100) if total_responses_with_competitors > 0 else 0
         competitors_list.append({
             "name": comp_name,
@@ -5428,7 +4846,7 @@ def extract_competitors(responses):
             "percentage": round(percentage, 1)
         })
     
-    return competitors_list[:10]  # Top 10
+    return competitors_list
 
 def calculate_period_change(current_metrics, previous_metrics):
     """Calculate percentage change between periods"""
@@ -5455,7 +4873,7 @@ async def get_prompts_analytics(
 ):
     """Get aggregated prompts and responses analytics by different dimensions"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         brand_id = None
         
         # Resolve brand_id from client_id or slug
@@ -5493,160 +4911,141 @@ async def get_prompts_analytics(
                 "total_count": 0
             }
         
-        # Get prompts and responses
+        # Get prompts and responses, both filtered by the same created_at bounds
+        start_timestamp = day_start_timestamp(start_date) if start_date else None
+        end_timestamp = day_end_timestamp(end_date) if end_date else None
         prompts_query = supabase.client.table("prompts").select("*").eq("brand_id", brand_id)
-        if start_date:
-            prompts_query = prompts_query.gte("created_at", f"{start_date}T00:00:00Z")
-        if end_date:
-            prompts_query = prompts_query.lte("created_at", f"{end_date}T23:59:59Z")
+        if start_timestamp:
+            prompts_query = prompts_query.gte("created_at", start_timestamp)
+        if end_timestamp:
+            prompts_query = prompts_query.lte("created_at", end_timestamp)
         prompts_result = prompts_query.execute()
-        prompts = prompts_result.data if hasattr(prompts_result, 'data') else []
+        prompts = result_rows(prompts_result)
         
         responses_query = supabase.client.table("responses").select("*").eq("brand_id", brand_id)
-        if start_date:
-            responses_query = responses_query.gte("created_at", f"{start_date}T00:00:00Z")
-        if end_date:
-            responses_query = responses_query.lte("created_at", f"{end_date}T23:59:59Z")
+        if start_timestamp:
+            responses_query = responses_query.gte("created_at", start_timestamp)
+        if end_timestamp:
+            responses_query = responses_query.lte("created_at", end_timestamp)
         responses_result = responses_query.execute()
-        responses = responses_result.data if hasattr(responses_result, 'data') else []
+        responses = result_rows(responses_result)
         
         # Get previous period data for change calculation
         prev_responses = []
         if start_date and end_date:
             try:
-                start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-                end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-                period_duration = (end_dt - start_dt).days + 1
-                prev_end = (start_dt - timedelta(days=1)).strftime("%Y-%m-%d")
-                prev_start = (start_dt - timedelta(days=period_duration)).strftime("%Y-%m-%d")
+                prev_start, prev_end = previous_period(
+                    datetime.strptime(start_date, "%Y-%m-%d"), datetime.strptime(end_date, "%Y-%m-%d")
+                )
                 
                 prev_responses_query = supabase.client.table("responses").select("*").eq("brand_id", brand_id)
-                prev_responses_query = prev_responses_query.gte("created_at", f"{prev_start}T00:00:00Z")
-                prev_responses_query = prev_responses_query.lte("created_at", f"{prev_end}T23:59:59Z")
+                prev_responses_query = prev_responses_query.gte("created_at", day_start_timestamp(prev_start))
+                prev_responses_query = prev_responses_query.lte("created_at", day_end_timestamp(prev_end))
                 prev_responses_result = prev_responses_query.execute()
-                prev_responses = prev_responses_result.data if hasattr(prev_responses_result, 'data') else []
+                prev_responses = result_rows(prev_responses_result)
             except:
                 pass
         
+        # Index both periods' responses by prompt in a single pass each, so grouping and the
+        # per-group metrics read only their prompts' responses instead of scanning them all
+        responses_by_prompt = defaultdict(list)
+        for r in responses:
+            responses_by_prompt[r.get("prompt_id")].append(r)
+        prev_responses_by_prompt = defaultdict(list)
+        for r in prev_responses:
+            prev_responses_by_prompt[r.get("prompt_id")].append(r)
+        
         # Group data based on group_by parameter
-        grouped_data = {}
+        grouped_data = defaultdict(lambda: {"prompts": [], "prompt_ids": set()})
+        
+        def add_to_group(group_key, prompt):
+            group = grouped_data[group_key]
+            if prompt["id"] not in group["prompt_ids"]:
+                group["prompts"].append(prompt)
+                group["prompt_ids"].add(prompt["id"])
         
         if group_by == "tags":
             # Group by tags
             for prompt in prompts:
-                tags = prompt.get("tags", []) or []
-                for tag in tags:
+                for tag in prompt.get("tags", []) or []:
                     if tag:
-                        if tag not in grouped_data:
-                            grouped_data[tag] = {"prompts": [], "prompt_ids": set()}
-                        if prompt["id"] not in grouped_data[tag]["prompt_ids"]:
-                            grouped_data[tag]["prompts"].append(prompt)
-                            grouped_data[tag]["prompt_ids"].add(prompt["id"])
+                        add_to_group(tag, prompt)
         
         elif group_by == "topics":
             # Group by topics
             for prompt in prompts:
-                topics = prompt.get("topics", []) or []
-                for topic in topics:
+                for topic in prompt.get("topics", []) or []:
                     if topic:
-                        if topic not in grouped_data:
-                            grouped_data[topic] = {"prompts": [], "prompt_ids": set()}
-                        if prompt["id"] not in grouped_data[topic]["prompt_ids"]:
-                            grouped_data[topic]["prompts"].append(prompt)
-                            grouped_data[topic]["prompt_ids"].add(prompt["id"])
+                        add_to_group(topic, prompt)
         
         elif group_by == "prompt_variants":
-            # Group by prompt text + platform + persona
+            # Group by prompt text + platform + persona; a variant belongs to the first prompt
+            # that produces it
             for prompt in prompts:
                 prompt_text = prompt.get("text", "")
                 # Get responses for this prompt to get platform/persona combinations
-                prompt_responses = [r for r in responses if r.get("prompt_id") == prompt.get("id")]
-                if not prompt_responses:
-                    # If no responses, still create a variant
-                    key = f"{prompt_text}|||unknown|||unknown"
-                    if key not in grouped_data:
-                        grouped_data[key] = {"prompts": [prompt], "prompt_ids": {prompt["id"]}}
+                prompt_responses = responses_by_prompt.get(prompt.get("id"), [])
+                if prompt_responses:
+                    variant_keys = {
+                        f"{prompt_text}|||{resp.get('platform', 'unknown')}|||{resp.get('persona_name', 'unknown')}"
+                        for resp in prompt_responses
+                    }
                 else:
-                    # Group by platform + persona combinations
-                    variant_map = {}
-                    for resp in prompt_responses:
-                        platform = resp.get("platform", "unknown")
-                        persona = resp.get("persona_name", "unknown")
-                        variant_key = f"{prompt_text}|||{platform}|||{persona}"
-                        if variant_key not in variant_map:
-                            variant_map[variant_key] = []
-                        variant_map[variant_key].append(resp)
-                    
-                    for variant_key in variant_map:
-                        if variant_key not in grouped_data:
-                            grouped_data[variant_key] = {"prompts": [prompt], "prompt_ids": {prompt["id"]}}
+                    # If no responses, still create a variant
+                    variant_keys = {f"{prompt_text}|||unknown|||unknown"}
+                for variant_key in variant_keys:
+                    if variant_key not in grouped_data:
+                        add_to_group(variant_key, prompt)
         
         elif group_by == "stage":
             # Group by stage
             for prompt in prompts:
-                stage = prompt.get("stage") or "Other"
-                if stage not in grouped_data:
-                    grouped_data[stage] = {"prompts": [], "prompt_ids": set()}
-                if prompt["id"] not in grouped_data[stage]["prompt_ids"]:
-                    grouped_data[stage]["prompts"].append(prompt)
-                    grouped_data[stage]["prompt_ids"].add(prompt["id"])
+                add_to_group(prompt.get("stage") or "Other", prompt)
         
         elif group_by == "seed_prompts":
             # Group by unique prompt text
             for prompt in prompts:
                 prompt_text = prompt.get("text", "")
                 if prompt_text:
-                    if prompt_text not in grouped_data:
-                        grouped_data[prompt_text] = {"prompts": [], "prompt_ids": set()}
-                    if prompt["id"] not in grouped_data[prompt_text]["prompt_ids"]:
-                        grouped_data[prompt_text]["prompts"].append(prompt)
-                        grouped_data[prompt_text]["prompt_ids"].add(prompt["id"])
+                    add_to_group(prompt_text, prompt)
         
         else:
             raise HTTPException(status_code=400, detail=f"Invalid group_by parameter: {group_by}")
         
+        # Lowercase the search term once rather than per group
+        search_lower = search.strip().lower() if search and search.strip() else None
+        
         # Calculate metrics for each group
         items = []
         for group_key, group_info in grouped_data.items():
+            # Apply search filter before scanning responses for the group
+            if search_lower:
+                if group_by == "prompt_variants":
+                    # Search in prompt text, platform, or persona
+                    if search_lower not in group_key.replace("|||", "\n").lower():
+                        continue
+                elif search_lower not in group_key.lower():
+                    continue
+            
             prompt_ids = list(group_info["prompt_ids"]) if isinstance(group_info["prompt_ids"], set) else [p["id"] for p in group_info["prompts"]]
+            group_responses = [r for prompt_id in prompt_ids for r in responses_by_prompt.get(prompt_id, [])]
+            group_prev_responses = [r for prompt_id in prompt_ids for r in prev_responses_by_prompt.get(prompt_id, [])]
             
-            # For prompt_variants, filter responses by platform and persona
+            # For prompt_variants, keep only the variant's platform and persona
             if group_by == "prompt_variants":
                 parts = group_key.split("|||")
                 if len(parts) >= 3:
                     prompt_text, platform, persona = parts[0], parts[1], parts[2]
                     group_responses = [
-                        r for r in responses 
-                        if r.get("prompt_id") in prompt_ids 
-                        and r.get("platform", "unknown") == platform
+                        r for r in group_responses
+                        if r.get("platform", "unknown") == platform
                         and r.get("persona_name", "unknown") == persona
                     ]
                     group_prev_responses = [
-                        r for r in prev_responses 
-                        if r.get("prompt_id") in prompt_ids 
-                        and r.get("platform", "unknown") == platform
+                        r for r in group_prev_responses
+                        if r.get("platform", "unknown") == platform
                         and r.get("persona_name", "unknown") == persona
                     ]
-                else:
-                    group_responses = [r for r in responses if r.get("prompt_id") in prompt_ids]
-                    group_prev_responses = [r for r in prev_responses if r.get("prompt_id") in prompt_ids]
-            else:
-                group_responses = [r for r in responses if r.get("prompt_id") in prompt_ids]
-                group_prev_responses = [r for r in prev_responses if r.get("prompt_id") in prompt_ids]
-            
-            # Apply search filter if provided
-            if search and search.strip():
-                search_lower = search.strip().lower()
-                if group_by == "prompt_variants":
-                    # Search in prompt text, platform, or persona
-                    parts = group_key.split("|||")
-                    if len(parts) >= 3:
-                        prompt_text, platform, persona = parts[0], parts[1], parts[2]
-                        if search_lower not in prompt_text.lower() and search_lower not in platform.lower() and search_lower not in persona.lower():
-                            continue
-                else:
-                    if search_lower not in group_key.lower():
-                        continue
             
             # Calculate metrics
             presence_metrics = calculate_presence_metrics(group_responses)
@@ -5702,13 +5101,8 @@ async def get_prompts_analytics(
             
             items.append(item)
         
-        # Apply search filter for non-variant groups (already filtered above for variants)
-        if search and search.strip() and group_by != "prompt_variants":
-            search_lower = search.strip().lower()
-            items = [item for item in items if search_lower in item["display_name"].lower()]
-        
         # Sort by responses count descending
-        items.sort(key=lambda x: x["responses_count"], reverse=True)
+        items.sort(key=itemgetter("responses_count"), reverse=True)
         
         # Apply pagination
         total_count = len(items)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from typing import Optional
 import logging
-from app.services.supabase_service import SupabaseService
+from app.services.supabase_service import get_supabase_service
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -12,7 +12,7 @@ router = APIRouter()
 async def add_brand_id_columns():
     """Add brand_id columns to prompts and responses tables via Supabase API"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Note: Supabase REST API doesn't support ALTER TABLE directly
         # This endpoint will update existing records with brand_id
@@ -39,7 +39,7 @@ async def update_brand_ids(
 ):
     """Update existing prompts and responses with brand_id"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         brand_id_to_use = brand_id or settings.BRAND_ID
         
         if not brand_id_to_use:
@@ -98,7 +98,7 @@ async def update_brand_ids(
 async def verify_database():
     """Verify database schema and brand_id columns"""
     try:
-        supabase = SupabaseService()
+        supabase = get_supabase_service()
         
         # Check if brand_id column exists in prompts
         prompts_result = supabase.client.table("prompts").select("brand_id").limit(1).execute()
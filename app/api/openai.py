@@ -188,12 +188,14 @@ async def generate_metric_review(
         
         # Import the dashboard function to fetch KPIs
         from app.api.data import get_reporting_dashboard
+        from app.services.supabase_service import get_supabase_service
         
         # Fetch dashboard data to get KPIs
         dashboard_data = await get_reporting_dashboard(
             request.brand_id,
             request.start_date,
-            request.end_date
+            request.end_date,
+            supabase=get_supabase_service()
         )
         
         # Filter KPIs by data source
@@ -315,6 +317,7 @@ async def generate_overall_overview(
         
         # Import the dashboard function to fetch KPIs
         from app.api.data import get_reporting_dashboard, get_reporting_dashboard_by_client
+        from app.services.supabase_service import get_supabase_service
         
         # Fetch dashboard data to get all KPIs
         if request.client_id:
@@ -329,7 +332,8 @@ async def generate_overall_overview(
             dashboard_data = await get_reporting_dashboard(
                 request.brand_id,
                 request.start_date,
-                request.end_date
+                request.end_date,
+                supabase=get_supabase_service()
             )
         
         if not dashboard_data.get("kpis"):
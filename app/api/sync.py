@@ -3,7 +3,7 @@ from typing import Optional
 import logging
 from datetime import datetime, timedelta
 from app.services.scrunch_client import ScrunchAPIClient
-from app.services.supabase_service import SupabaseService
+from app.services.supabase_service import get_supabase_service
 from app.services.ga4_client import GA4APIClient
 from app.services.agency_analytics_client import AgencyAnalyticsClient
 from app.services.audit_logger import audit_logger
@@ -32,7 +32,7 @@ async def sync_brands(
     from app.db.models import AuditLogAction
     
     client = ScrunchAPIClient()
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     try:
         brands = await client.get_brands()
@@ -78,7 +78,7 @@ async def sync_prompts(
     from app.db.models import AuditLogAction
     
     client = ScrunchAPIClient()
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     try:
         total_count = 0
@@ -156,6 +156,9 @@ async def sync_prompts(
             request=request
         )
         raise
+    finally:
+        # Stored reporting dashboard payloads include Scrunch KPIs; brand_id None clears every brand
+        supabase.clear_reporting_dashboard_snapshots(brand_id)
 
 @router.post("/sync/responses")
 @handle_api_errors(context="syncing responses")
@@ -172,7 +175,7 @@ async def sync_responses(
     from app.db.models import AuditLogAction
     
     client = ScrunchAPIClient()
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     try:
         total_count = 0
@@ -257,6 +260,9 @@ async def sync_responses(
             request=request
         )
         raise
+    finally:
+        # Stored reporting dashboard payloads include Scrunch KPIs; brand_id None clears every brand
+        supabase.clear_reporting_dashboard_snapshots(brand_id)
 
 @router.post("/sync/all")
 @handle_api_errors(context="syncing all data")
@@ -288,7 +294,7 @@ async def sync_all(
 @handle_api_errors(context="fetching sync status")
 async def sync_status():
     """Get sync status from database"""
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     # Get counts from database
     brands_result = supabase.client.table("brands").select("id", count="exact").execute()
@@ -378,7 +384,7 @@ async def sync_ga4(
 @handle_api_errors(context="fetching sync status")
 async def sync_status():
     """Get sync status from database"""
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
 
     try:
         result = supabase.client.table("sync_status").select("*").order("last_sync_at", desc=True).limit(1).execute()
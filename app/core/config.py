@@ -7,6 +7,7 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
     DEBUG: bool = True
+    LOG_LEVEL: str = "INFO"  # Set to DEBUG for per-request diagnostic logs
     
     # Scrunch AI API Settings
     SCRUNCH_API_BASE_URL: str = "https://api.scrunchai.com/v1"
@@ -1,4 +1,5 @@
 from supabase import create_client, Client
+from supabase.lib.client_options import ClientOptions
 from app.core.config import settings
 import logging
 import httpx
@@ -7,6 +8,9 @@ logger = logging.getLogger(__name__)
 
 supabase: Client = None
 
+# PostgREST request timeouts: fail fast on connect/pool waits, allow slower reads for large selects
+POSTGREST_TIMEOUT = httpx.Timeout(connect=5.0, read=30.0, write=10.0, pool=5.0)
+
 def get_supabase_client() -> Client:
     """Get or create Supabase client with extended timeout for storage operations"""
     global supabase
@@ -25,10 +29,11 @@ def get_supabase_client() -> Client:
             raise ValueError(error_msg)
         
         # Create Supabase client
-        # Note: The supabase-py library uses httpx internally, but timeout configuration
-        # may need to be set via environment variables or client options
+        # Note: supabase-py 2.0.x builds its own httpx client and doesn't accept a custom
+        # one, so connection pooling comes from keeping this single client for the process;
+        # only the PostgREST timeouts can be configured through client options
         try:
-            supabase = create_client(url, key)
+            supabase = create_client(url, key, options=ClientOptions(postgrest_client_timeout=POSTGREST_TIMEOUT))
         except Exception as e:
             logger.error(f"Failed to create Supabase client: {e}")
             raise
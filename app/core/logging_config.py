@@ -1,10 +1,11 @@
 import logging
 import sys
+from app.core.config import settings
 
 def setup_logging():
     """Configure logging for the application"""
     logging.basicConfig(
-        level=logging.INFO,
+        level=getattr(logging, settings.LOG_LEVEL.upper(), logging.INFO),
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         handlers=[
             logging.StreamHandler(sys.stdout)
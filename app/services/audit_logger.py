@@ -4,7 +4,7 @@ Audit logging service for tracking user actions and data syncs
 import logging
 from typing import Optional, Dict, Any
 from datetime import datetime
-from app.services.supabase_service import SupabaseService
+from app.services.supabase_service import get_supabase_service
 from app.db.models import AuditLogAction
 from app.core.config import settings
 
@@ -15,7 +15,7 @@ class AuditLogger:
     """Service for logging audit events"""
     
     def __init__(self):
-        self.supabase = SupabaseService()
+        self.supabase = get_supabase_service()
     
     def _get_client_ip(self, request) -> Optional[str]:
         """Extract client IP address from request"""
@@ -4,7 +4,7 @@ Background sync functions that run async
 import logging
 from typing import Dict, Any, Optional
 from app.services.scrunch_client import ScrunchAPIClient
-from app.services.supabase_service import SupabaseService
+from app.services.supabase_service import get_supabase_service
 from app.services.ga4_client import GA4APIClient
 from app.services.agency_analytics_client import AgencyAnalyticsClient
 from app.services.sync_job_service import sync_job_service
@@ -23,7 +23,7 @@ async def sync_all_background(
 ):
     """Background task to sync all Scrunch AI data"""
     client = ScrunchAPIClient()
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     try:
         # Check for cancellation before starting
@@ -192,6 +192,9 @@ async def sync_all_background(
             request=request
         )
         raise
+    finally:
+        # The reporting dashboard is assembled from the synced data, so drop stored payloads
+        supabase.clear_reporting_dashboard_snapshots()
 
 
 async def sync_ga4_background(
@@ -206,7 +209,7 @@ async def sync_ga4_background(
 ):
     """Background task to sync GA4 data - now iterates over Clients instead of Brands"""
     ga4_client = GA4APIClient()
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     try:
         # Get date range
@@ -694,6 +697,10 @@ async def sync_ga4_background(
             request=request
         )
         raise
+    finally:
+        # Stored GA4 data may have changed, so don't keep serving cached dashboard reads
+        supabase.clear_ga4_read_cache()
+        supabase.clear_reporting_dashboard_snapshots()
 
 
 async def sync_agency_analytics_background(
@@ -706,7 +713,7 @@ async def sync_agency_analytics_background(
 ):
     """Background task to sync Agency Analytics data"""
     client = AgencyAnalyticsClient()
-    supabase = SupabaseService()
+    supabase = get_supabase_service()
     
     try:
         # Check for cancellation before starting
@@ -1039,4 +1046,7 @@ async def sync_agency_analytics_background(
             request=request
         )
         raise
+    finally:
+        # The reporting dashboard is assembled from the synced data, so drop stored payloads
+        supabase.clear_reporting_dashboard_snapshots()
 
@@ -2,6 +2,7 @@
 Google Analytics 4 API Client
 Handles all GA4 API interactions for multi-property reporting
 """
+import asyncio
 import httpx
 import logging
 from typing import Dict, List, Optional, Any
@@ -19,6 +20,7 @@ from google.analytics.data_v1beta.types import (
 )
 from google.analytics.admin_v1beta import AnalyticsAdminServiceClient
 from google.analytics.admin_v1beta.types import ListPropertiesRequest
+from google.api_core import exceptions as google_exceptions
 from google.auth import default
 from google.oauth2 import service_account
 from google.auth.credentials import Credentials as GoogleCredentials
@@ -29,6 +31,18 @@ from app.services.ga4_token_service import GA4TokenService
 
 logger = logging.getLogger(__name__)
 
+# Bound concurrent Data API calls across all requests so dashboard bursts don't exhaust the quota
+GA4_MAX_CONCURRENT_REQUESTS = 10
+GA4_MAX_ATTEMPTS = 3
+GA4_BACKOFF_BASE_SECONDS = 1
+GA4_BACKOFF_MAX_SECONDS = 30
+GA4_RETRYABLE_ERRORS = (
+    google_exceptions.ResourceExhausted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ServiceUnavailable,
+)
+_ga4_semaphore = asyncio.Semaphore(GA4_MAX_CONCURRENT_REQUESTS)
+
 class AccessTokenCredentials(GoogleCredentials):
     """Custom credentials class that uses a stored access token"""
     
@@ -91,6 +105,27 @@ class GA4APIClient:
             self._admin_client = AnalyticsAdminServiceClient(credentials=credentials)
         return self._admin_client
     
+    async def _call_data_api(self, method, request):
+        """Call a blocking Data API method with bounded concurrency and backoff on rate limits"""
+        for attempt in range(1, GA4_MAX_ATTEMPTS + 1):
+            try:
+                async with _ga4_semaphore:
+                    return await asyncio.to_thread(method, request)
+            except GA4_RETRYABLE_ERRORS as e:
+                if attempt == GA4_MAX_ATTEMPTS:
+                    raise
+                delay = min(GA4_BACKOFF_BASE_SECONDS * 2 ** (attempt - 1), GA4_BACKOFF_MAX_SECONDS)
+                logger.warning(f"GA4 API rate limited ({type(e).__name__}), retrying in {delay}s (attempt {attempt}/{GA4_MAX_ATTEMPTS})")
+                await asyncio.sleep(delay)
+    
+    async def _run_report(self, request: RunReportRequest):
+        """Run a Data API report"""
+        return await self._call_data_api(self._get_data_client().run_report, request)
+    
+    async def _run_realtime_report(self, request: RunRealtimeReportRequest):
+        """Run a Data API realtime report"""
+        return await self._call_data_api(self._get_data_client().run_realtime_report, request)
+    
     # 1. Website Traffic Overview API
     async def get_traffic_overview(
         self,
@@ -105,8 +140,6 @@ class GA4APIClient:
             if not end_date:
                 end_date = datetime.now().strftime("%Y-%m-%d")
             
-            client = self._get_data_client()
-            
             request = RunReportRequest(
                 property=f"properties/{property_id}",
                 date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
@@ -124,7 +157,7 @@ class GA4APIClient:
                 ],
             )
             
-            response = client.run_report(request)
+            response = await self._run_report(request)
             
             # Aggregate totals
             totals = {
@@ -227,7 +260,7 @@ class GA4APIClient:
                         Metric(name="engagementRate"),
                     ],
                 )
-                prev_response = client.run_report(prev_request)
+                prev_response = await self._run_report(prev_request)
                 logger.info(f"[GA4 CLIENT] Previous period API response received")
                 
                 prev_totals = {
@@ -310,8 +343,6 @@ class GA4APIClient:
             if not end_date:
                 end_date = datetime.now().strftime("%Y-%m-%d")
             
-            client = self._get_data_client()
-            
             request = RunReportRequest(
                 property=f"properties/{property_id}",
                 date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
@@ -330,7 +361,7 @@ class GA4APIClient:
                 ],
             )
             
-            response = client.run_report(request)
+            response = await self._run_report(request)
             
             pages = []
             for row in response.rows:
@@ -360,8 +391,6 @@ class GA4APIClient:
             if not end_date:
                 end_date = datetime.now().strftime("%Y-%m-%d")
             
-            client = self._get_data_client()
-            
             request = RunReportRequest(
                 property=f"properties/{property_id}",
                 date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
@@ -380,7 +409,7 @@ class GA4APIClient:
                 ],
             )
             
-            response = client.run_report(request)
+            response = await self._run_report(request)
             
             sources = []
             for row in response.rows:
@@ -417,8 +446,6 @@ class GA4APIClient:
             if not end_date:
                 end_date = datetime.now().strftime("%Y-%m-%d")
             
-            client = self._get_data_client()
-            
             request = RunReportRequest(
                 property=f"properties/{property_id}",
                 date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
@@ -437,7 +464,7 @@ class GA4APIClient:
                 ],
             )
             
-            response = client.run_report(request)
+            response = await self._run_report(request)
             
             countries = []
             for row in response.rows:
@@ -467,8 +494,6 @@ class GA4APIClient:
             if not end_date:
                 end_date = datetime.now().strftime("%Y-%m-%d")
             
-            client = self._get_data_client()
-            
             request = RunReportRequest(
                 property=f"properties/{property_id}",
                 date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
@@ -483,7 +508,7 @@ class GA4APIClient:
                 ],
             )
             
-            response = client.run_report(request)
+            response = await self._run_report(request)
             
             devices = []
             for row in response.rows:
@@ -514,8 +539,6 @@ class GA4APIClient:
             if not end_date:
                 end_date = datetime.now().strftime("%Y-%m-%d")
             
-            client = self._get_data_client()
-            
             request = RunReportRequest(
                 property=f"properties/{property_id}",
                 date_ranges=[DateRange(start_date=start_date, end_date=end_date)],
@@ -535,7 +558,7 @@ class GA4APIClient:
                 ),
             )
             
-            response = client.run_report(request)
+            response = await self._run_report(request)
             
             conversions = []
             for row in response.rows:
@@ -554,8 +577,6 @@ class GA4APIClient:
     async def get_realtime_snapshot(self, property_id: str) -> Dict:
         """Get realtime data snapshot"""
         try:
-            client = self._get_data_client()
-            
             # Realtime API doesn't support pagePath dimension, use city or other supported dimensions
             request = RunRealtimeReportRequest(
                 property=f"properties/{property_id}",
@@ -565,7 +586,7 @@ class GA4APIClient:
                 ],
             )
             
-            response = client.run_realtime_report(request)
+            response = await self._run_realtime_report(request)
             
             active_users = 0
             active_pages = []
@@ -583,7 +604,7 @@ class GA4APIClient:
                     metrics=[Metric(name="activeUsers")],
                     limit=10
                 )
-                page_response = client.run_realtime_report(page_request)
+                page_response = await self._run_realtime_report(page_request)
                 
                 for row in page_response.rows:
                     if row.dimension_values[0].value:
@@ -7,7 +7,7 @@ import json
 import time
 import logging
 from typing import Optional
-from app.services.supabase_service import SupabaseService
+from app.services.supabase_service import get_supabase_service
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +38,7 @@ class GA4TokenService:
     def get_token_from_db() -> Optional[str]:
         """Get token from database if valid"""
         try:
-            supabase = SupabaseService()
+            supabase = get_supabase_service()
             result = supabase.client.table("ga4_tokens").select("*").order("expires_at", desc=True).limit(1).execute()
             
             if result.data:
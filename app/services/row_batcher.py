@@ -0,0 +1,90 @@
+"""
+Coalesces concurrent single-row lookups into one PostgREST in_() query
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set
+from app.services.supabase_service import get_supabase_service, execute_async, result_rows
+
+logger = logging.getLogger(__name__)
+
+
+class RowBatcher:
+    """
+    Batches lookups of rows by a key column that arrive within a short window.
+
+    Concurrent requests for the same table (e.g. dashboard widgets loading several
+    keywords at once) are served by a single select ... in_(key_column, keys) query
+    instead of one round trip each.
+
+    Usage:
+        keyword_summaries = RowBatcher("agency_analytics_keyword_ranking_summaries", "keyword_id")
+        summary = await keyword_summaries.load(keyword_id)
+    """
+
+    def __init__(self, table: str, key_column: str, columns: str = "*", window_seconds: float = 0.005, max_batch_size: int = 200):
+        self.table = table
+        self.key_column = key_column
+        self.columns = columns
+        self.window_seconds = window_seconds
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[Any, List[asyncio.Future]] = {}
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # The event loop only holds weak references to tasks, so in-flight flushes are kept here
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    async def load(self, key: Any) -> Optional[Dict]:
+        """Return the row whose key column equals key, or None if there is none"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+
+        if len(self._pending) >= self.max_batch_size:
+            self._schedule_flush(loop, delay=0)
+        elif self._flush_handle is None:
+            self._schedule_flush(loop, delay=self.window_seconds)
+
+        return await future
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop, delay: float) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if delay:
+            self._flush_handle = loop.call_later(delay, self._start_flush, loop)
+        else:
+            self._start_flush(loop)
+
+    def _start_flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        pending, self._pending = self._pending, {}
+        self._flush_handle = None
+        task = loop.create_task(self._flush(pending))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, pending: Dict[Any, List[asyncio.Future]]) -> None:
+        if not pending:
+            return
+        try:
+            supabase = get_supabase_service()
+            result = await execute_async(
+                supabase.client.table(self.table).select(self.columns).in_(self.key_column, list(pending.keys()))
+            )
+            rows = result_rows(result)
+            # Keep the first row for a repeated key, as the single-row lookups did with data[0]
+            rows_by_key = {}
+            for row in rows:
+                rows_by_key.setdefault(row.get(self.key_column), row)
+        except Exception as e:
+            logger.error(f"Error loading batched rows from {self.table}: {str(e)}")
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, futures in pending.items():
+            row = rows_by_key.get(key)
+            for future in futures:
+                if not future.done():
+                    future.set_result(row)
@@ -1,5 +1,9 @@
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
 from app.core.database import get_supabase_client
+from app.core.cache import TTLCache
 import logging
 import re
 import unicodedata
@@ -9,6 +13,29 @@ from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Read-through cache for the stored GA4 aggregates the reporting dashboard reads on every load.
+# Traffic overview may still be filling in while a sync runs, so it expires quickly; KPI
+# snapshots are immutable for a period. Both are cleared when a GA4 sync finishes or a live
+# GA4 endpoint stores a fresh traffic overview.
+GA4_TRAFFIC_OVERVIEW_CACHE_TTL_SECONDS = 300
+GA4_KPI_SNAPSHOT_CACHE_TTL_SECONDS = 24 * 60 * 60
+# A missing snapshot may be written by the next sync, so misses are only cached briefly
+GA4_KPI_SNAPSHOT_MISS_CACHE_TTL_SECONDS = 60
+ga4_read_cache = TTLCache(maxsize=1024, ttl=GA4_TRAFFIC_OVERVIEW_CACHE_TTL_SECONDS)
+_CACHE_MISS = object()
+
+# Assembled Scrunch dashboard responses per brand and date range. Scrunch data only changes
+# when prompts or responses are synced, and those upserts clear the cache.
+SCRUNCH_DASHBOARD_CACHE_TTL_SECONDS = 30 * 60
+scrunch_dashboard_cache = TTLCache(maxsize=256, ttl=SCRUNCH_DASHBOARD_CACHE_TTL_SECONDS)
+
+# When stored reporting dashboard payloads were last cleared, per brand (None for all brands).
+# A dashboard request that read its data before a clear must not store or serve that payload.
+dashboard_snapshots_cleared_at: Dict[Optional[int], datetime] = {}
+
+# Daily traffic overview columns the aggregated overview is computed from
+GA4_TRAFFIC_OVERVIEW_AGG_COLUMNS = "date,users,sessions,new_users,engaged_sessions,conversions,revenue,average_session_duration,engagement_rate"
+
 class SupabaseService:
     """Service for interacting with Supabase database"""
     
@@ -73,6 +100,7 @@ class SupabaseService:
         try:
             result = self.client.table("prompts").upsert(records).execute()
             logger.info(f"Upserted {len(records)} prompts")
+            scrunch_dashboard_cache.clear()
             return len(records)
         except Exception as e:
             logger.error(f"Error upserting prompts: {str(e)}")
@@ -134,6 +162,7 @@ class SupabaseService:
                 logger.info(f"Upserted batch {i//batch_size + 1}: {len(batch)} responses")
             
             logger.info(f"Total upserted {total_upserted} responses")
+            scrunch_dashboard_cache.clear()
             return total_upserted
         except Exception as e:
             logger.error(f"Error upserting responses: {str(e)}")
@@ -174,52 +203,101 @@ class SupabaseService:
     # GA4 Data Sync Methods
     # =====================================================
     
+    def _aggregate_ga4_traffic_overview(self, records: List[Dict]) -> Optional[Dict]:
+        """Aggregate daily GA4 traffic overview records into one overview, or None if there are none"""
+        if not records:
+            return None
+        
+        # Aggregate the daily data
+        total_users = sum(int(r.get("users", 0) or 0) for r in records)
+        total_sessions = sum(int(r.get("sessions", 0) or 0) for r in records)
+        total_new_users = sum(int(r.get("new_users", 0) or 0) for r in records)
+        total_engaged_sessions = sum(int(r.get("engaged_sessions", 0) or 0) for r in records)
+        total_conversions = sum(float(r.get("conversions", 0) or 0) for r in records)
+        total_revenue = sum(float(r.get("revenue", 0) or 0) for r in records)
+        
+        # Calculate weighted averages for rates
+        total_session_duration = sum(float(r.get("average_session_duration", 0) or 0) * int(r.get("sessions", 0) or 0) for r in records)
+        avg_session_duration = total_session_duration / total_sessions if total_sessions > 0 else 0
+        
+        # Calculate bounce rate (weighted average)
+        total_bounce_sessions = sum((1 - float(r.get("engagement_rate", 0) or 0)) * int(r.get("sessions", 0) or 0) for r in records)
+        bounce_rate = total_bounce_sessions / total_sessions if total_sessions > 0 else 0
+        
+        # Calculate engagement rate (weighted average)
+        total_engagement_weight = sum(float(r.get("engagement_rate", 0) or 0) * int(r.get("sessions", 0) or 0) for r in records)
+        engagement_rate = total_engagement_weight / total_sessions if total_sessions > 0 else 0
+        
+        return {
+            "users": total_users,
+            "sessions": total_sessions,
+            "newUsers": total_new_users,
+            "engagedSessions": total_engaged_sessions,
+            "averageSessionDuration": avg_session_duration,
+            "bounceRate": bounce_rate,
+            "engagementRate": engagement_rate,
+            "conversions": total_conversions,
+            "revenue": total_revenue
+        }
+    
     def get_ga4_traffic_overview_by_date_range(self, brand_id: int, property_id: str, start_date: str, end_date: str) -> Optional[Dict]:
         """Get aggregated GA4 traffic overview data from stored daily records for a date range"""
+        cache_key = ("traffic_overview", brand_id, property_id, start_date, end_date)
+        cached = ga4_read_cache.get(cache_key, _CACHE_MISS)
+        if cached is not _CACHE_MISS:
+            return cached
+        
         try:
             # Get all daily records for the date range
-            result = self.client.table("ga4_traffic_overview").select("*").eq("brand_id", brand_id).eq("property_id", property_id).gte("date", start_date).lte("date", end_date).order("date", desc=False).execute()
+            result = self.client.table("ga4_traffic_overview").select(GA4_TRAFFIC_OVERVIEW_AGG_COLUMNS).eq("brand_id", brand_id).eq("property_id", property_id).gte("date", start_date).lte("date", end_date).order("date", desc=False).execute()
             
             records = result.data if hasattr(result, 'data') else []
-            
-            if not records:
-                return None
-            
-            # Aggregate the daily data
-            total_users = sum(int(r.get("users", 0) or 0) for r in records)
-            total_sessions = sum(int(r.get("sessions", 0) or 0) for r in records)
-            total_new_users = sum(int(r.get("new_users", 0) or 0) for r in records)
-            total_engaged_sessions = sum(int(r.get("engaged_sessions", 0) or 0) for r in records)
-            total_conversions = sum(float(r.get("conversions", 0) or 0) for r in records)
-            total_revenue = sum(float(r.get("revenue", 0) or 0) for r in records)
-            
-            # Calculate weighted averages for rates
-            total_session_duration = sum(float(r.get("average_session_duration", 0) or 0) * int(r.get("sessions", 0) or 0) for r in records)
-            avg_session_duration = total_session_duration / total_sessions if total_sessions > 0 else 0
-            
-            # Calculate bounce rate (weighted average)
-            total_bounce_sessions = sum((1 - float(r.get("engagement_rate", 0) or 0)) * int(r.get("sessions", 0) or 0) for r in records)
-            bounce_rate = total_bounce_sessions / total_sessions if total_sessions > 0 else 0
-            
-            # Calculate engagement rate (weighted average)
-            total_engagement_weight = sum(float(r.get("engagement_rate", 0) or 0) * int(r.get("sessions", 0) or 0) for r in records)
-            engagement_rate = total_engagement_weight / total_sessions if total_sessions > 0 else 0
-            
-            return {
-                "users": total_users,
-                "sessions": total_sessions,
-                "newUsers": total_new_users,
-                "engagedSessions": total_engaged_sessions,
-                "averageSessionDuration": avg_session_duration,
-                "bounceRate": bounce_rate,
-                "engagementRate": engagement_rate,
-                "conversions": total_conversions,
-                "revenue": total_revenue
-            }
+            overview = self._aggregate_ga4_traffic_overview(records)
+            ga4_read_cache.set(cache_key, overview)
+            return overview
         except Exception as e:
             logger.error(f"Error getting GA4 traffic overview from stored data: {str(e)}")
             return None
     
+    def get_ga4_traffic_overview_two_periods(
+        self,
+        brand_id: int,
+        property_id: str,
+        prev_start_date: str,
+        prev_end_date: str,
+        start_date: str,
+        end_date: str
+    ) -> Tuple[Optional[Dict], Optional[Dict]]:
+        """Get aggregated GA4 traffic overviews for a date range and its previous period.
+        
+        Both periods are read with one query spanning prev_start_date..end_date and split by
+        date, instead of one round trip per period. Returns (current, previous).
+        """
+        cache_key = ("traffic_overview", brand_id, property_id, start_date, end_date)
+        prev_cache_key = ("traffic_overview", brand_id, property_id, prev_start_date, prev_end_date)
+        cached = ga4_read_cache.get(cache_key, _CACHE_MISS)
+        prev_cached = ga4_read_cache.get(prev_cache_key, _CACHE_MISS)
+        if cached is not _CACHE_MISS and prev_cached is not _CACHE_MISS:
+            return cached, prev_cached
+        
+        try:
+            result = self.client.table("ga4_traffic_overview").select(GA4_TRAFFIC_OVERVIEW_AGG_COLUMNS).eq("brand_id", brand_id).eq("property_id", property_id).gte("date", min(prev_start_date, start_date)).lte("date", max(prev_end_date, end_date)).order("date", desc=False).execute()
+            
+            records = result.data if hasattr(result, 'data') else []
+            # Dates are ISO YYYY-MM-DD strings, so they compare in calendar order
+            overview = self._aggregate_ga4_traffic_overview(
+                [r for r in records if start_date <= r.get("date", "") <= end_date]
+            )
+            prev_overview = self._aggregate_ga4_traffic_overview(
+                [r for r in records if prev_start_date <= r.get("date", "") <= prev_end_date]
+            )
+            ga4_read_cache.set(cache_key, overview)
+            ga4_read_cache.set(prev_cache_key, prev_overview)
+            return overview, prev_overview
+        except Exception as e:
+            logger.error(f"Error getting GA4 traffic overview for two periods from stored data: {str(e)}")
+            return None, None
+    
     def upsert_ga4_traffic_overview(self, property_id: str, date: str, data: Dict, client_id: Optional[int] = None, brand_id: Optional[int] = None) -> int:
         """Upsert GA4 traffic overview data - now uses client_id (with brand_id for backward compatibility)"""
         if client_id is None and brand_id is None:
@@ -297,6 +375,21 @@ class SupabaseService:
             logger.error(f"Error upserting GA4 traffic overview: {error_str}")
             raise
     
+    def _upsert_ga4_records(self, table: str, records: List[Dict], key_columns: str, brand_id: Optional[int] = None) -> int:
+        """Write a list of GA4 rows in a single upsert request.
+
+        Rows carrying brand_id are upserted against the (brand_id, property_id, date, <key>)
+        unique constraint, client-only rows against the (client_id, property_id, date, <key>)
+        unique index from migration v31, so duplicates are resolved server-side. Postgres
+        rejects an upsert that touches the same row twice, so repeated keys within the batch
+        are collapsed first, the last row winning as the old row-by-row fallback did.
+        """
+        scope_column = "brand_id" if brand_id is not None else "client_id"
+        conflict_columns = [scope_column, "property_id", "date", *key_columns.split(",")]
+        unique_records = {tuple(record.get(column) for column in conflict_columns): record for record in records}
+        self.client.table(table).upsert(list(unique_records.values()), on_conflict=",".join(conflict_columns)).execute()
+        return len(unique_records)
+
     def upsert_ga4_top_pages(self, property_id: str, date: str, pages: List[Dict], client_id: Optional[int] = None, brand_id: Optional[int] = None) -> int:
         """Upsert GA4 top pages data - now uses client_id (with brand_id for backward compatibility)"""
         if client_id is None and brand_id is None:
@@ -338,46 +431,11 @@ class SupabaseService:
             records.append(record)
         
         try:
-            # Insert in batches
-            batch_size = 50
-            total_inserted = 0
-            for i in range(0, len(records), batch_size):
-                batch = records[i:i + batch_size]
-                result = self.client.table("ga4_top_pages").insert(batch).execute()
-                total_inserted += len(batch)
-            
-            logger.info(f"Upserted {total_inserted} GA4 top pages for {entity_type} {entity_id}, property {property_id}, date {date}")
-            return total_inserted
+            total_upserted = self._upsert_ga4_records("ga4_top_pages", records, "page_path", brand_id)
+            logger.info(f"Upserted {total_upserted} GA4 top pages for {entity_type} {entity_id}, property {property_id}, date {date}")
+            return total_upserted
         except Exception as e:
-            error_str = str(e)
-            if "23505" in error_str or "duplicate key" in error_str.lower():
-                # If duplicates exist, try individual upserts
-                total_upserted = 0
-                for record in records:
-                    try:
-                        query = self.client.table("ga4_top_pages").select("id").eq("property_id", property_id).eq("date", date).eq("page_path", record["page_path"])
-                        if client_id is not None:
-                            query = query.eq("client_id", client_id)
-                        else:
-                            query = query.eq("brand_id", brand_id)
-                        existing = query.limit(1).execute()
-                        
-                        update_query = self.client.table("ga4_top_pages").update(record).eq("property_id", property_id).eq("date", date).eq("page_path", record["page_path"])
-                        if client_id is not None:
-                            update_query = update_query.eq("client_id", client_id)
-                        else:
-                            update_query = update_query.eq("brand_id", brand_id)
-                        
-                        if existing.data:
-                            update_query.execute()
-                        else:
-                            self.client.table("ga4_top_pages").insert(record).execute()
-                        total_upserted += 1
-                    except Exception:
-                        pass
-                logger.info(f"Upserted {total_upserted} GA4 top pages (individual) for {entity_type} {entity_id}, property {property_id}, date {date}")
-                return total_upserted
-            logger.error(f"Error upserting GA4 top pages: {error_str}")
+            logger.error(f"Error upserting GA4 top pages: {str(e)}")
             raise
     
     def upsert_ga4_traffic_sources(self, property_id: str, date: str, sources: List[Dict], client_id: Optional[int] = None, brand_id: Optional[int] = None) -> int:
@@ -419,39 +477,11 @@ class SupabaseService:
             records.append(record)
         
         try:
-            result = self.client.table("ga4_traffic_sources").insert(records).execute()
-            logger.info(f"Upserted {len(records)} GA4 traffic sources for {entity_type} {entity_id}, property {property_id}, date {date}")
-            return len(records)
+            total_upserted = self._upsert_ga4_records("ga4_traffic_sources", records, "source", brand_id)
+            logger.info(f"Upserted {total_upserted} GA4 traffic sources for {entity_type} {entity_id}, property {property_id}, date {date}")
+            return total_upserted
         except Exception as e:
-            error_str = str(e)
-            if "23505" in error_str or "duplicate key" in error_str.lower():
-                # If duplicates exist, try individual upserts
-                total_upserted = 0
-                for record in records:
-                    try:
-                        query = self.client.table("ga4_traffic_sources").select("id").eq("property_id", property_id).eq("date", date).eq("source", record["source"])
-                        if client_id is not None:
-                            query = query.eq("client_id", client_id)
-                        else:
-                            query = query.eq("brand_id", brand_id)
-                        existing = query.limit(1).execute()
-                        
-                        update_query = self.client.table("ga4_traffic_sources").update(record).eq("property_id", property_id).eq("date", date).eq("source", record["source"])
-                        if client_id is not None:
-                            update_query = update_query.eq("client_id", client_id)
-                        else:
-                            update_query = update_query.eq("brand_id", brand_id)
-                        
-                        if existing.data:
-                            update_query.execute()
-                        else:
-                            self.client.table("ga4_traffic_sources").insert(record).execute()
-                        total_upserted += 1
-                    except Exception:
-                        pass
-                logger.info(f"Upserted {total_upserted} GA4 traffic sources (individual) for {entity_type} {entity_id}, property {property_id}, date {date}")
-                return total_upserted
-            logger.error(f"Error upserting GA4 traffic sources: {error_str}")
+            logger.error(f"Error upserting GA4 traffic sources: {str(e)}")
             raise
     
     def upsert_ga4_geographic(self, property_id: str, date: str, geographic: List[Dict], client_id: Optional[int] = None, brand_id: Optional[int] = None) -> int:
@@ -492,39 +522,11 @@ class SupabaseService:
             records.append(record)
         
         try:
-            result = self.client.table("ga4_geographic").insert(records).execute()
-            logger.info(f"Upserted {len(records)} GA4 geographic records for {entity_type} {entity_id}, property {property_id}, date {date}")
-            return len(records)
+            total_upserted = self._upsert_ga4_records("ga4_geographic", records, "country", brand_id)
+            logger.info(f"Upserted {total_upserted} GA4 geographic records for {entity_type} {entity_id}, property {property_id}, date {date}")
+            return total_upserted
         except Exception as e:
-            error_str = str(e)
-            if "23505" in error_str or "duplicate key" in error_str.lower():
-                # If duplicates exist, try individual upserts
-                total_upserted = 0
-                for record in records:
-                    try:
-                        query = self.client.table("ga4_geographic").select("id").eq("property_id", property_id).eq("date", date).eq("country", record["country"])
-                        if client_id is not None:
-                            query = query.eq("client_id", client_id)
-                        else:
-                            query = query.eq("brand_id", brand_id)
-                        existing = query.limit(1).execute()
-                        
-                        update_query = self.client.table("ga4_geographic").update(record).eq("property_id", property_id).eq("date", date).eq("country", record["country"])
-                        if client_id is not None:
-                            update_query = update_query.eq("client_id", client_id)
-                        else:
-                            update_query = update_query.eq("brand_id", brand_id)
-                        
-                        if existing.data:
-                            update_query.execute()
-                        else:
-                            self.client.table("ga4_geographic").insert(record).execute()
-                        total_upserted += 1
-                    except Exception:
-                        pass
-                logger.info(f"Upserted {total_upserted} GA4 geographic records (individual) for {entity_type} {entity_id}, property {property_id}, date {date}")
-                return total_upserted
-            logger.error(f"Error upserting GA4 geographic: {error_str}")
+            logger.error(f"Error upserting GA4 geographic: {str(e)}")
             raise
     
     def upsert_ga4_devices(self, property_id: str, date: str, devices: List[Dict], client_id: Optional[int] = None, brand_id: Optional[int] = None) -> int:
@@ -567,39 +569,11 @@ class SupabaseService:
             records.append(record)
         
         try:
-            result = self.client.table("ga4_devices").insert(records).execute()
-            logger.info(f"Upserted {len(records)} GA4 devices for {entity_type} {entity_id}, property {property_id}, date {date}")
-            return len(records)
+            total_upserted = self._upsert_ga4_records("ga4_devices", records, "device_category,operating_system", brand_id)
+            logger.info(f"Upserted {total_upserted} GA4 devices for {entity_type} {entity_id}, property {property_id}, date {date}")
+            return total_upserted
         except Exception as e:
-            error_str = str(e)
-            if "23505" in error_str or "duplicate key" in error_str.lower():
-                # If duplicates exist, try individual upserts
-                total_upserted = 0
-                for record in records:
-                    try:
-                        query = self.client.table("ga4_devices").select("id").eq("property_id", property_id).eq("date", date).eq("device_category", record["device_category"]).eq("operating_system", record["operating_system"])
-                        if client_id is not None:
-                            query = query.eq("client_id", client_id)
-                        else:
-                            query = query.eq("brand_id", brand_id)
-                        existing = query.limit(1).execute()
-                        
-                        update_query = self.client.table("ga4_devices").update(record).eq("property_id", property_id).eq("date", date).eq("device_category", record["device_category"]).eq("operating_system", record["operating_system"])
-                        if client_id is not None:
-                            update_query = update_query.eq("client_id", client_id)
-                        else:
-                            update_query = update_query.eq("brand_id", brand_id)
-                        
-                        if existing.data:
-                            update_query.execute()
-                        else:
-                            self.client.table("ga4_devices").insert(record).execute()
-                        total_upserted += 1
-                    except Exception:
-                        pass
-                logger.info(f"Upserted {total_upserted} GA4 devices (individual) for {entity_type} {entity_id}, property {property_id}, date {date}")
-                return total_upserted
-            logger.error(f"Error upserting GA4 devices: {error_str}")
+            logger.error(f"Error upserting GA4 devices: {str(e)}")
             raise
     
     def upsert_ga4_conversions(self, property_id: str, date: str, conversions: List[Dict], client_id: Optional[int] = None, brand_id: Optional[int] = None) -> int:
@@ -640,39 +614,11 @@ class SupabaseService:
             records.append(record)
         
         try:
-            result = self.client.table("ga4_conversions").insert(records).execute()
-            logger.info(f"Upserted {len(records)} GA4 conversions for {entity_type} {entity_id}, property {property_id}, date {date}")
-            return len(records)
+            total_upserted = self._upsert_ga4_records("ga4_conversions", records, "event_name", brand_id)
+            logger.info(f"Upserted {total_upserted} GA4 conversions for {entity_type} {entity_id}, property {property_id}, date {date}")
+            return total_upserted
         except Exception as e:
-            error_str = str(e)
-            if "23505" in error_str or "duplicate key" in error_str.lower():
-                # If duplicates exist, try individual upserts
-                total_upserted = 0
-                for record in records:
-                    try:
-                        query = self.client.table("ga4_conversions").select("id").eq("property_id", property_id).eq("date", date).eq("event_name", record["event_name"])
-                        if client_id is not None:
-                            query = query.eq("client_id", client_id)
-                        else:
-                            query = query.eq("brand_id", brand_id)
-                        existing = query.limit(1).execute()
-                        
-                        update_query = self.client.table("ga4_conversions").update(record).eq("property_id", property_id).eq("date", date).eq("event_name", record["event_name"])
-                        if client_id is not None:
-                            update_query = update_query.eq("client_id", client_id)
-                        else:
-                            update_query = update_query.eq("brand_id", brand_id)
-                        
-                        if existing.data:
-                            update_query.execute()
-                        else:
-                            self.client.table("ga4_conversions").insert(record).execute()
-                        total_upserted += 1
-                    except Exception:
-                        pass
-                logger.info(f"Upserted {total_upserted} GA4 conversions (individual) for {entity_type} {entity_id}, property {property_id}, date {date}")
-                return total_upserted
-            logger.error(f"Error upserting GA4 conversions: {error_str}")
+            logger.error(f"Error upserting GA4 conversions: {str(e)}")
             raise
     
     def upsert_ga4_realtime(self, property_id: str, realtime_data: Dict, client_id: Optional[int] = None, brand_id: Optional[int] = None) -> int:
@@ -1014,11 +960,16 @@ class SupabaseService:
     
     def get_latest_ga4_kpi_snapshot(self, brand_id: int) -> Optional[Dict]:
         """Get the latest GA4 KPI snapshot for a brand"""
+        cache_key = ("latest_kpi_snapshot", brand_id)
+        cached = ga4_read_cache.get(cache_key, _CACHE_MISS)
+        if cached is not _CACHE_MISS:
+            return cached
+        
         try:
             result = self.client.table("ga4_kpi_snapshots").select("*").eq("brand_id", brand_id).order("period_end_date", desc=True).limit(1).execute()
-            if result.data and len(result.data) > 0:
-                return result.data[0]
-            return None
+            snapshot = result.data[0] if result.data else None
+            ga4_read_cache.set(cache_key, snapshot, ttl=GA4_KPI_SNAPSHOT_CACHE_TTL_SECONDS if snapshot else GA4_KPI_SNAPSHOT_MISS_CACHE_TTL_SECONDS)
+            return snapshot
         except Exception as e:
             logger.error(f"Error getting latest GA4 KPI snapshot for brand {brand_id}: {str(e)}")
             return None
@@ -1036,6 +987,11 @@ class SupabaseService:
     
     def get_ga4_kpi_snapshot_by_date_range(self, brand_id: int, start_date: str, end_date: str) -> Optional[Dict]:
         """Get GA4 KPI snapshot that matches the requested date range (within 1 day tolerance)"""
+        cache_key = ("kpi_snapshot", brand_id, start_date, end_date)
+        cached = ga4_read_cache.get(cache_key, _CACHE_MISS)
+        if cached is not _CACHE_MISS:
+            return cached
+        
         try:
             # Convert dates to datetime for comparison
             end_dt = datetime.strptime(end_date, "%Y-%m-%d")
@@ -1057,13 +1013,89 @@ class SupabaseService:
                 end_diff = abs((snapshot_end - requested_end).days)
                 
                 if start_diff <= 2 and end_diff <= 2:
+                    ga4_read_cache.set(cache_key, snapshot, ttl=GA4_KPI_SNAPSHOT_CACHE_TTL_SECONDS)
                     return snapshot
             
+            ga4_read_cache.set(cache_key, None, ttl=GA4_KPI_SNAPSHOT_MISS_CACHE_TTL_SECONDS)
             return None
         except Exception as e:
             logger.error(f"Error getting GA4 KPI snapshot for brand {brand_id}, date range {start_date} to {end_date}: {str(e)}")
             return None
     
+    def clear_ga4_read_cache(self):
+        """Drop cached GA4 traffic overviews and KPI snapshots so the next read sees freshly synced data"""
+        ga4_read_cache.clear()
+    
+    # =====================================================
+    # Reporting Dashboard Snapshots
+    # =====================================================
+    
+    def get_reporting_dashboard_snapshot(self, brand_id: int, start_date: str, end_date: str, max_age_seconds: int = 3600) -> Optional[Dict]:
+        """Get the stored reporting dashboard payload for a brand and date range, if it is recent enough"""
+        try:
+            # Payloads assembled from data read before the last clear are stale
+            cutoff = max(
+                datetime.now() - timedelta(seconds=max_age_seconds),
+                dashboard_snapshots_cleared_at.get(None, datetime.min),
+                dashboard_snapshots_cleared_at.get(brand_id, datetime.min)
+            ).isoformat()
+            result = self.client.table("reporting_dashboard_snapshots").select("payload").eq("brand_id", brand_id).eq("start_date", start_date).eq("end_date", end_date).gte("updated_at", cutoff).limit(1).execute()
+            return result.data[0]["payload"] if result.data else None
+        except Exception as e:
+            error_str = str(e)
+            if "Could not find the table" in error_str or "does not exist" in error_str:
+                logger.warning("Table 'reporting_dashboard_snapshots' does not exist yet. Please run the SQL script to create it.")
+                return None
+            logger.error(f"Error getting reporting dashboard snapshot for brand {brand_id}: {error_str}")
+            return None
+    
+    def upsert_reporting_dashboard_snapshot(self, brand_id: int, start_date: str, end_date: str, payload: Dict, data_read_at: datetime) -> int:
+        """Store the assembled reporting dashboard payload for a brand and date range.
+
+        data_read_at is when the request began reading the data the payload was built from.
+        It is stored as updated_at, and the payload is dropped if the brand's payloads were
+        cleared since then, so a request racing a sync never stores pre-sync data.
+        """
+        cleared_at = max(
+            dashboard_snapshots_cleared_at.get(None, datetime.min),
+            dashboard_snapshots_cleared_at.get(brand_id, datetime.min)
+        )
+        if data_read_at < cleared_at:
+            return 0
+        try:
+            record = {
+                "brand_id": brand_id,
+                "start_date": start_date,
+                "end_date": end_date,
+                "payload": payload,
+                "updated_at": data_read_at.isoformat()
+            }
+            self.client.table("reporting_dashboard_snapshots").upsert(record, on_conflict="brand_id,start_date,end_date").execute()
+            return 1
+        except Exception as e:
+            error_str = str(e)
+            if "Could not find the table" in error_str or "does not exist" in error_str:
+                logger.warning("Table 'reporting_dashboard_snapshots' does not exist yet. Please run the SQL script to create it.")
+                return 0
+            logger.error(f"Error storing reporting dashboard snapshot for brand {brand_id}: {error_str}")
+            return 0
+    
+    def clear_reporting_dashboard_snapshots(self, brand_id: Optional[int] = None) -> None:
+        """Drop stored reporting dashboard payloads for a brand (or all brands) after their data changed"""
+        dashboard_snapshots_cleared_at[brand_id] = datetime.now()
+        try:
+            query = self.client.table("reporting_dashboard_snapshots").delete()
+            if brand_id is not None:
+                query = query.eq("brand_id", brand_id)
+            else:
+                query = query.gte("brand_id", 0)  # PostgREST requires a filter on delete
+            query.execute()
+        except Exception as e:
+            error_str = str(e)
+            if "Could not find the table" in error_str or "does not exist" in error_str:
+                return
+            logger.error(f"Error clearing reporting dashboard snapshots: {error_str}")
+    
     def get_ga4_top_pages_by_date_range(self, brand_id: int, property_id: str, start_date: str, end_date: str, limit: int = 10) -> List[Dict]:
         """Get aggregated GA4 top pages data from stored daily records for a date range"""
         try:
@@ -1103,7 +1135,7 @@ class SupabaseService:
                 pages.append(data)
             
             # Sort by views descending and limit
-            pages.sort(key=lambda x: x["views"], reverse=True)
+            pages.sort(key=itemgetter("views"), reverse=True)
             return pages[:limit]
         except Exception as e:
             logger.error(f"Error getting GA4 top pages for date range: {str(e)}")
@@ -1151,7 +1183,7 @@ class SupabaseService:
                 sources.append(data)
             
             # Sort by sessions descending
-            sources.sort(key=lambda x: x["sessions"], reverse=True)
+            sources.sort(key=itemgetter("sessions"), reverse=True)
             return sources
         except Exception as e:
             logger.error(f"Error getting GA4 traffic sources for date range: {str(e)}")
@@ -1191,7 +1223,7 @@ class SupabaseService:
                 countries.append(data)
             
             # Sort by users descending and limit
-            countries.sort(key=lambda x: x["users"], reverse=True)
+            countries.sort(key=itemgetter("users"), reverse=True)
             return countries[:limit]
         except Exception as e:
             logger.error(f"Error getting GA4 geographic data for date range: {str(e)}")
@@ -1236,7 +1268,7 @@ class SupabaseService:
                 devices.append(data)
             
             # Sort by users descending
-            devices.sort(key=lambda x: x["users"], reverse=True)
+            devices.sort(key=itemgetter("users"), reverse=True)
             return devices
         except Exception as e:
             logger.error(f"Error getting GA4 devices data for date range: {str(e)}")
@@ -2004,3 +2036,42 @@ class SupabaseService:
             logger.error(f"Error upserting keyword ranking summaries: {error_str}")
             raise
 
+
+_supabase_service: Optional[SupabaseService] = None
+
+def get_supabase_service() -> SupabaseService:
+    """Get or create the shared SupabaseService instance used by request handlers"""
+    global _supabase_service
+    if _supabase_service is None:
+        _supabase_service = SupabaseService()
+    return _supabase_service
+
+
+def result_rows(result) -> List[Dict]:
+    """Rows returned by an executed PostgREST query, or an empty list"""
+    return getattr(result, "data", None) or []
+
+
+def result_count(result, default: int = 0) -> int:
+    """Count returned by an executed PostgREST query made with count=..., or default"""
+    count = getattr(result, "count", None)
+    return default if count is None else count
+
+
+async def execute_async(query):
+    """Run a blocking PostgREST query builder's execute() in a worker thread.
+
+    The supabase client is synchronous, so awaiting queries this way keeps the event
+    loop free and lets independent queries run concurrently with asyncio.gather.
+    """
+    return await asyncio.to_thread(query.execute)
+
+
+def run_all(*calls) -> List:
+    """Run several blocking zero-argument calls at once and return their results in order.
+
+    The synchronous counterpart of asyncio.gather, for code that already runs in a worker
+    thread; pass query.execute to run PostgREST queries concurrently.
+    """
+    with ThreadPoolExecutor(max_workers=len(calls)) as pool:
+        return list(pool.map(lambda call: call(), calls))
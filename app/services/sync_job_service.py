@@ -6,7 +6,7 @@ import asyncio
 import logging
 from typing import Optional, Dict, Any
 from datetime import datetime
-from app.services.supabase_service import SupabaseService
+from app.services.supabase_service import get_supabase_service
 from app.services.audit_logger import audit_logger
 from app.db.models import AuditLogAction
 
@@ -17,7 +17,7 @@ class SyncJobService:
     """Service for managing async sync jobs"""
     
     def __init__(self):
-        self.supabase = SupabaseService()
+        self.supabase = get_supabase_service()
         self.running_jobs: Dict[str, asyncio.Task] = {}
         self.cancelled_jobs: set = set()  # Track cancelled job IDs
     
@@ -30,7 +30,10 @@ async def lifespan(app: FastAPI):
     # Check REST API connection first
     try:
         from app.core.database import get_supabase_client
+        from app.services.supabase_service import get_supabase_service
         client = get_supabase_client()
+        # Build the shared service singleton at startup so the first request doesn't pay for it
+        get_supabase_service()
         logger.info("REST API connection: SUCCESS")
     except Exception as e:
         logger.error(f"REST API connection failed: {e}")
@@ -0,0 +1,13 @@
+-- Migration: Add trigram indexes for Agency Analytics campaign search
+-- The campaigns endpoint filters with ILIKE '%term%' on company and url,
+-- which cannot use a btree index. Trigram GIN indexes keep these lookups fast.
+-- Run this in your Supabase SQL Editor
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX IF NOT EXISTS idx_aa_campaigns_company_trgm ON agency_analytics_campaigns USING gin (company gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_aa_campaigns_url_trgm ON agency_analytics_campaigns USING gin (url gin_trgm_ops);
+
+-- Comments
+COMMENT ON INDEX idx_aa_campaigns_company_trgm IS 'Trigram index for ILIKE search on campaign company name';
+COMMENT ON INDEX idx_aa_campaigns_url_trgm IS 'Trigram index for ILIKE search on campaign URL';
@@ -0,0 +1,19 @@
+-- Migration: Add composite (id, date) indexes for Agency Analytics rankings queries
+-- Campaign and keyword ranking endpoints filter by campaign_id/keyword_id and
+-- order or range by date. Composite indexes let Postgres read rows in date order
+-- instead of scanning the single-column index and sorting.
+-- Run this in your Supabase SQL Editor
+
+-- Campaign rankings by campaign, ordered by date
+CREATE INDEX IF NOT EXISTS idx_aa_campaign_rankings_campaign_date ON agency_analytics_campaign_rankings(campaign_id, date DESC);
+
+-- Keyword rankings by keyword, ordered by date
+CREATE INDEX IF NOT EXISTS idx_aa_keyword_rankings_keyword_date ON agency_analytics_keyword_rankings(keyword_id, date DESC);
+
+-- Keyword rankings by campaign, ordered by date
+CREATE INDEX IF NOT EXISTS idx_aa_keyword_rankings_campaign_date ON agency_analytics_keyword_rankings(campaign_id, date DESC);
+
+-- Comments
+COMMENT ON INDEX idx_aa_campaign_rankings_campaign_date IS 'Composite index for campaign rankings filtered by campaign_id and ordered by date';
+COMMENT ON INDEX idx_aa_keyword_rankings_keyword_date IS 'Composite index for keyword rankings filtered by keyword_id and ordered by date';
+COMMENT ON INDEX idx_aa_keyword_rankings_campaign_date IS 'Composite index for keyword rankings filtered by campaign_id and ordered by date';
@@ -0,0 +1,9 @@
+-- Migration: Add composite index for keyword ranking summaries by campaign
+-- The campaign keyword-ranking-summaries endpoint filters by campaign_id and
+-- orders by keyword_id DESC; this index serves both without a sort step.
+-- Run this in your Supabase SQL Editor
+
+CREATE INDEX IF NOT EXISTS idx_aa_keyword_summaries_campaign_keyword ON agency_analytics_keyword_ranking_summaries(campaign_id, keyword_id DESC);
+
+-- Comments
+COMMENT ON INDEX idx_aa_keyword_summaries_campaign_keyword IS 'Composite index for campaign keyword summaries ordered by keyword_id';
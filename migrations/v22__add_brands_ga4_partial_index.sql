@@ -0,0 +1,9 @@
+-- Migration: Add partial index for brands with a GA4 property configured
+-- Speeds up the brands-with-ga4 lookup (ga4_property_id IS NOT NULL) without
+-- indexing the brands that have no GA4 property.
+-- Run this in your Supabase SQL Editor
+
+CREATE INDEX IF NOT EXISTS idx_brands_ga4_property_id_not_null ON brands(id) WHERE ga4_property_id IS NOT NULL;
+
+-- Comments
+COMMENT ON INDEX idx_brands_ga4_property_id_not_null IS 'Partial index for brands that have a GA4 property ID';
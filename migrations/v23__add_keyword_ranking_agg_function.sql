@@ -0,0 +1,41 @@
+-- Migration: Add keyword ranking aggregation function
+-- Computes the reporting dashboard's Agency Analytics keyword totals in Postgres so
+-- only one row of scalars is returned instead of every keyword summary row.
+-- Run this in your Supabase SQL Editor
+
+-- A keyword's ranking is its Google ranking, falling back to the mobile ranking
+-- (0 and NULL both mean "not ranked"), and 999 when neither is set. Only keywords
+-- ranking in the top 100 count towards the ranked totals; the all_* columns cover
+-- every keyword and are used for the previous-period comparison.
+CREATE OR REPLACE FUNCTION get_keyword_ranking_agg(p_campaign_ids INTEGER[])
+RETURNS TABLE (
+    total_rankings BIGINT,
+    ranking_sum BIGINT,
+    total_search_volume BIGINT,
+    total_ranking_change BIGINT,
+    ranking_change_count BIGINT,
+    all_search_volume BIGINT,
+    all_ranking_change BIGINT,
+    all_ranking_change_count BIGINT
+) AS $$
+    SELECT
+        COUNT(*) FILTER (WHERE ranked.ranking <= 100),
+        COALESCE(SUM(ranked.ranking) FILTER (WHERE ranked.ranking <= 100), 0),
+        COALESCE(SUM(ranked.search_volume) FILTER (WHERE ranked.ranking <= 100), 0),
+        COALESCE(SUM(ranked.ranking_change) FILTER (WHERE ranked.ranking <= 100), 0),
+        COUNT(ranked.ranking_change) FILTER (WHERE ranked.ranking <= 100),
+        COALESCE(SUM(ranked.search_volume), 0),
+        COALESCE(SUM(ranked.ranking_change), 0),
+        COUNT(ranked.ranking_change)
+    FROM (
+        SELECT
+            COALESCE(NULLIF(google_ranking, 0), NULLIF(google_mobile_ranking, 0), 999) AS ranking,
+            COALESCE(search_volume, 0) AS search_volume,
+            ranking_change
+        FROM agency_analytics_keyword_ranking_summaries
+        WHERE campaign_id = ANY(p_campaign_ids)
+    ) AS ranked;
+$$ LANGUAGE sql STABLE;
+
+-- Comments
+COMMENT ON FUNCTION get_keyword_ranking_agg(INTEGER[]) IS 'Aggregates keyword ranking summaries for the reporting dashboard Agency Analytics KPIs';
@@ -0,0 +1,20 @@
+-- Migration: Create reporting dashboard snapshots table
+-- Stores the assembled reporting dashboard response per brand and date range so repeat
+-- loads are served by a single lookup instead of re-running every source query.
+-- Snapshots are cleared whenever a sync or a brand/campaign link change alters the data.
+-- Run this in your Supabase SQL Editor
+
+CREATE TABLE IF NOT EXISTS reporting_dashboard_snapshots (
+    id SERIAL PRIMARY KEY,
+    brand_id INTEGER NOT NULL REFERENCES brands(id) ON DELETE CASCADE,
+    start_date DATE NOT NULL,
+    end_date DATE NOT NULL,
+    payload JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    UNIQUE(brand_id, start_date, end_date)
+);
+
+-- Comments
+COMMENT ON TABLE reporting_dashboard_snapshots IS 'Materialized reporting dashboard responses per brand and date range';
+COMMENT ON COLUMN reporting_dashboard_snapshots.payload IS 'Full /data/reporting-dashboard/{brand_id} response body';
@@ -0,0 +1,17 @@
+-- Migration: Add covering indexes for the reporting dashboard range and aggregate reads
+-- The dashboard reads daily GA4 traffic by brand, property and date range, and aggregates
+-- keyword ranking summaries by campaign. INCLUDE-ing the columns those reads use lets
+-- Postgres answer them with index-only scans instead of visiting the table rows.
+-- Run this in your Supabase SQL Editor
+
+-- Daily traffic overview by brand and property, ranged by date
+CREATE INDEX IF NOT EXISTS idx_ga4_traffic_brand_property_date ON ga4_traffic_overview(brand_id, property_id, date)
+    INCLUDE (users, sessions, new_users, engaged_sessions, conversions, revenue, average_session_duration, engagement_rate);
+
+-- Keyword ranking summaries by campaign, with the columns get_keyword_ranking_agg reads
+CREATE INDEX IF NOT EXISTS idx_aa_keyword_summaries_campaign_rank ON agency_analytics_keyword_ranking_summaries(campaign_id)
+    INCLUDE (google_ranking, google_mobile_ranking, search_volume, ranking_change);
+
+-- Comments
+COMMENT ON INDEX idx_ga4_traffic_brand_property_date IS 'Covering index for reporting dashboard traffic overview date range reads';
+COMMENT ON INDEX idx_aa_keyword_summaries_campaign_rank IS 'Covering index for reporting dashboard keyword ranking aggregates by campaign';
@@ -0,0 +1,50 @@
+-- Migration: Add an optional date range to the keyword ranking aggregation function
+-- The reporting dashboard's keyword chart totals only cover summaries dated within the
+-- selected range. Accepting the range lets Postgres compute those totals too, so the
+-- chart only needs to fetch the top 100 keyword rows instead of every summary.
+-- Run this in your Supabase SQL Editor
+
+-- Replace the one-argument version so calls that omit the dates stay unambiguous
+DROP FUNCTION IF EXISTS get_keyword_ranking_agg(INTEGER[]);
+
+-- Same ranking rule as v23: the Google ranking, falling back to the mobile ranking
+-- (0 and NULL both mean "not ranked"), and 999 when neither is set. NULL dates mean
+-- the range is open on that side.
+CREATE OR REPLACE FUNCTION get_keyword_ranking_agg(
+    p_campaign_ids INTEGER[],
+    p_start_date DATE DEFAULT NULL,
+    p_end_date DATE DEFAULT NULL
+)
+RETURNS TABLE (
+    total_rankings BIGINT,
+    ranking_sum BIGINT,
+    total_search_volume BIGINT,
+    total_ranking_change BIGINT,
+    ranking_change_count BIGINT,
+    all_search_volume BIGINT,
+    all_ranking_change BIGINT,
+    all_ranking_change_count BIGINT
+) AS $$
+    SELECT
+        COUNT(*) FILTER (WHERE ranked.ranking <= 100),
+        COALESCE(SUM(ranked.ranking) FILTER (WHERE ranked.ranking <= 100), 0),
+        COALESCE(SUM(ranked.search_volume) FILTER (WHERE ranked.ranking <= 100), 0),
+        COALESCE(SUM(ranked.ranking_change) FILTER (WHERE ranked.ranking <= 100), 0),
+        COUNT(ranked.ranking_change) FILTER (WHERE ranked.ranking <= 100),
+        COALESCE(SUM(ranked.search_volume), 0),
+        COALESCE(SUM(ranked.ranking_change), 0),
+        COUNT(ranked.ranking_change)
+    FROM (
+        SELECT
+            COALESCE(NULLIF(google_ranking, 0), NULLIF(google_mobile_ranking, 0), 999) AS ranking,
+            COALESCE(search_volume, 0) AS search_volume,
+            ranking_change
+        FROM agency_analytics_keyword_ranking_summaries
+        WHERE campaign_id = ANY(p_campaign_ids)
+          AND (p_start_date IS NULL OR date >= p_start_date)
+          AND (p_end_date IS NULL OR date <= p_end_date)
+    ) AS ranked;
+$$ LANGUAGE sql STABLE;
+
+-- Comments
+COMMENT ON FUNCTION get_keyword_ranking_agg(INTEGER[], DATE, DATE) IS 'Aggregates keyword ranking summaries, optionally within a date range, for the reporting dashboard Agency Analytics KPIs and charts';
@@ -0,0 +1,14 @@
+-- Migration: Add a generated citation count to responses
+-- The Scrunch metrics only need how many citations each response has. A stored generated
+-- column lets the dashboards read that integer instead of transferring and parsing the
+-- citations JSONB array for every response.
+-- Run this in your Supabase SQL Editor
+
+-- Non-array citations (NULL or any other JSON type) count as 0
+ALTER TABLE responses ADD COLUMN IF NOT EXISTS citation_count INTEGER
+    GENERATED ALWAYS AS (
+        CASE WHEN jsonb_typeof(citations) = 'array' THEN jsonb_array_length(citations) ELSE 0 END
+    ) STORED;
+
+-- Comments
+COMMENT ON COLUMN responses.citation_count IS 'Number of entries in the citations array, maintained by Postgres';
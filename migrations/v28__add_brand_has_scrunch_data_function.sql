@@ -0,0 +1,14 @@
+-- Migration: Add a Scrunch data existence check function
+-- The reporting dashboards show the Scrunch section for any brand with Scrunch data, even
+-- when the selected date range has none. This answers "does the brand have any responses
+-- or prompts" in one round trip instead of one existence query per table.
+-- Run this in your Supabase SQL Editor
+
+CREATE OR REPLACE FUNCTION brand_has_scrunch_data(p_brand_id INTEGER)
+RETURNS BOOLEAN AS $$
+    SELECT EXISTS (SELECT 1 FROM responses WHERE brand_id = p_brand_id)
+        OR EXISTS (SELECT 1 FROM prompts WHERE brand_id = p_brand_id);
+$$ LANGUAGE sql STABLE;
+
+-- Comments
+COMMENT ON FUNCTION brand_has_scrunch_data(INTEGER) IS 'Whether a brand has any Scrunch responses or prompts, regardless of date';
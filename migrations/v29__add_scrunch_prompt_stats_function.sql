@@ -0,0 +1,49 @@
+-- Migration: Add per-prompt Scrunch response stats function
+-- The dashboards' top performing prompts and Scrunch AI insights only need per-prompt
+-- counts. Grouping in Postgres returns one row per prompt instead of every response row.
+-- Run this in your Supabase SQL Editor
+
+-- Stats cover the brand's responses created between p_start and p_end (inclusive) that
+-- have a prompt. platform_count and competitor_count are distinct non-empty values.
+-- Rows are ordered by response count, highest first.
+CREATE OR REPLACE FUNCTION get_scrunch_prompt_stats(
+    p_brand_id INTEGER,
+    p_start TIMESTAMPTZ,
+    p_end TIMESTAMPTZ
+)
+RETURNS TABLE (
+    prompt_id INTEGER,
+    response_count BIGINT,
+    brand_present_count BIGINT,
+    citation_count BIGINT,
+    platform_count BIGINT,
+    competitor_count BIGINT
+) AS $$
+    WITH period AS (
+        SELECT r.prompt_id, r.brand_present, r.citation_count, r.platform, r.competitors_present
+        FROM responses r
+        WHERE r.brand_id = p_brand_id
+          AND r.prompt_id IS NOT NULL
+          AND r.created_at BETWEEN p_start AND p_end
+    ),
+    competitors AS (
+        SELECT period.prompt_id, COUNT(DISTINCT competitor) AS competitor_count
+        FROM period, unnest(period.competitors_present) AS competitor
+        WHERE competitor <> ''
+        GROUP BY period.prompt_id
+    )
+    SELECT
+        period.prompt_id,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE period.brand_present),
+        COALESCE(SUM(period.citation_count), 0),
+        COUNT(DISTINCT NULLIF(period.platform, '')),
+        COALESCE(MAX(competitors.competitor_count), 0)
+    FROM period
+    LEFT JOIN competitors ON competitors.prompt_id = period.prompt_id
+    GROUP BY period.prompt_id
+    ORDER BY COUNT(*) DESC;
+$$ LANGUAGE sql STABLE;
+
+-- Comments
+COMMENT ON FUNCTION get_scrunch_prompt_stats(INTEGER, TIMESTAMPTZ, TIMESTAMPTZ) IS 'Per-prompt Scrunch response counts for a brand and date range, for top prompts and AI insights';
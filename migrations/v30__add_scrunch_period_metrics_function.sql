@@ -0,0 +1,100 @@
+-- Migration: Add Scrunch KPI totals function for the current and previous periods
+-- The dashboards' Scrunch KPIs compare a date range with the period before it. Computing
+-- both periods' totals in Postgres returns at most two rows instead of every response row
+-- from both periods.
+-- Run this in your Supabase SQL Editor
+
+-- Returns one row per period ('current' or 'previous') that has responses. The totals
+-- mirror the dashboard's KPI rules:
+--   * sentiment: a non-empty brand_sentiment counts as positive if it contains "positive",
+--     otherwise negative if it contains "negative", otherwise neutral (case-insensitive)
+--   * competitors: responses listing any competitor, and how many non-empty names they list
+--   * prompts: distinct prompts answered, those with the brand present in any response,
+--     and how many responses the 10 most answered prompts account for
+CREATE OR REPLACE FUNCTION get_scrunch_period_metrics(
+    p_brand_id INTEGER,
+    p_start TIMESTAMPTZ,
+    p_end TIMESTAMPTZ,
+    p_prev_start TIMESTAMPTZ,
+    p_prev_end TIMESTAMPTZ
+)
+RETURNS TABLE (
+    period TEXT,
+    response_count BIGINT,
+    total_citations BIGINT,
+    brand_present_count BIGINT,
+    sentiment_count BIGINT,
+    positive_count BIGINT,
+    negative_count BIGINT,
+    responses_with_competitors BIGINT,
+    competitor_appearances BIGINT,
+    prompts_tracked BIGINT,
+    prompts_with_brand BIGINT,
+    top10_response_count BIGINT
+) AS $$
+    WITH period_responses AS (
+        SELECT
+            CASE WHEN r.created_at BETWEEN p_start AND p_end THEN 'current' ELSE 'previous' END AS period,
+            r.prompt_id,
+            COALESCE(r.brand_present, FALSE) AS brand_present,
+            r.citation_count,
+            lower(r.brand_sentiment) AS sentiment,
+            COALESCE(cardinality(r.competitors_present), 0) AS competitors_listed,
+            (SELECT COUNT(*) FROM unnest(r.competitors_present) AS competitor WHERE competitor <> '') AS competitor_appearances
+        FROM responses r
+        WHERE r.brand_id = p_brand_id
+          AND (r.created_at BETWEEN p_start AND p_end OR r.created_at BETWEEN p_prev_start AND p_prev_end)
+    ),
+    prompt_counts AS (
+        SELECT
+            pr.period,
+            pr.prompt_id,
+            COUNT(*) AS response_count,
+            BOOL_OR(pr.brand_present) AS brand_present,
+            ROW_NUMBER() OVER (PARTITION BY pr.period ORDER BY COUNT(*) DESC) AS prompt_rank
+        FROM period_responses pr
+        WHERE pr.prompt_id IS NOT NULL
+        GROUP BY pr.period, pr.prompt_id
+    ),
+    prompt_totals AS (
+        SELECT
+            pc.period,
+            COUNT(*) AS prompts_tracked,
+            COUNT(*) FILTER (WHERE pc.brand_present) AS prompts_with_brand,
+            COALESCE(SUM(pc.response_count) FILTER (WHERE pc.prompt_rank <= 10), 0) AS top10_response_count
+        FROM prompt_counts pc
+        GROUP BY pc.period
+    ),
+    response_totals AS (
+        SELECT
+            pr.period,
+            COUNT(*) AS response_count,
+            COALESCE(SUM(pr.citation_count), 0) AS total_citations,
+            COUNT(*) FILTER (WHERE pr.brand_present) AS brand_present_count,
+            COUNT(*) FILTER (WHERE pr.sentiment <> '') AS sentiment_count,
+            COUNT(*) FILTER (WHERE pr.sentiment LIKE '%positive%') AS positive_count,
+            COUNT(*) FILTER (WHERE pr.sentiment NOT LIKE '%positive%' AND pr.sentiment LIKE '%negative%') AS negative_count,
+            COUNT(*) FILTER (WHERE pr.competitors_listed > 0) AS responses_with_competitors,
+            COALESCE(SUM(pr.competitor_appearances), 0) AS competitor_appearances
+        FROM period_responses pr
+        GROUP BY pr.period
+    )
+    SELECT
+        rt.period,
+        rt.response_count,
+        rt.total_citations,
+        rt.brand_present_count,
+        rt.sentiment_count,
+        rt.positive_count,
+        rt.negative_count,
+        rt.responses_with_competitors,
+        rt.competitor_appearances,
+        COALESCE(pt.prompts_tracked, 0),
+        COALESCE(pt.prompts_with_brand, 0),
+        COALESCE(pt.top10_response_count, 0)
+    FROM response_totals rt
+    LEFT JOIN prompt_totals pt ON pt.period = rt.period;
+$$ LANGUAGE sql STABLE;
+
+-- Comments
+COMMENT ON FUNCTION get_scrunch_period_metrics(INTEGER, TIMESTAMPTZ, TIMESTAMPTZ, TIMESTAMPTZ, TIMESTAMPTZ) IS 'Scrunch KPI totals for a brand over a date range and its previous period, one row per period';
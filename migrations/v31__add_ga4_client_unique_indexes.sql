@@ -0,0 +1,40 @@
+-- Migration: Add client-scoped unique indexes to the GA4 list tables
+-- GA4 rows synced for a client without a brand are upserted against
+-- (client_id, property_id, date, <key>), which needs a matching unique index for
+-- ON CONFLICT. Brand rows keep using the v2 brand-scoped unique constraints.
+-- Run this in your Supabase SQL Editor
+
+-- Remove duplicate client rows first, keeping the most recently inserted one
+DELETE FROM ga4_top_pages a USING ga4_top_pages b
+WHERE a.client_id = b.client_id AND a.property_id = b.property_id AND a.date = b.date
+  AND a.page_path = b.page_path AND a.id < b.id;
+
+DELETE FROM ga4_traffic_sources a USING ga4_traffic_sources b
+WHERE a.client_id = b.client_id AND a.property_id = b.property_id AND a.date = b.date
+  AND a.source = b.source AND a.id < b.id;
+
+DELETE FROM ga4_geographic a USING ga4_geographic b
+WHERE a.client_id = b.client_id AND a.property_id = b.property_id AND a.date = b.date
+  AND a.country = b.country AND a.id < b.id;
+
+DELETE FROM ga4_devices a USING ga4_devices b
+WHERE a.client_id = b.client_id AND a.property_id = b.property_id AND a.date = b.date
+  AND a.device_category = b.device_category AND a.operating_system = b.operating_system AND a.id < b.id;
+
+DELETE FROM ga4_conversions a USING ga4_conversions b
+WHERE a.client_id = b.client_id AND a.property_id = b.property_id AND a.date = b.date
+  AND a.event_name = b.event_name AND a.id < b.id;
+
+-- Rows without a client_id never conflict (NULLs are distinct), so brand rows are unaffected
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ga4_pages_client_unique ON ga4_top_pages(client_id, property_id, date, page_path);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ga4_sources_client_unique ON ga4_traffic_sources(client_id, property_id, date, source);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ga4_geo_client_unique ON ga4_geographic(client_id, property_id, date, country);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ga4_devices_client_unique ON ga4_devices(client_id, property_id, date, device_category, operating_system);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_ga4_conversions_client_unique ON ga4_conversions(client_id, property_id, date, event_name);
+
+-- Comments
+COMMENT ON INDEX idx_ga4_pages_client_unique IS 'Conflict target for client-scoped GA4 top pages upserts';
+COMMENT ON INDEX idx_ga4_sources_client_unique IS 'Conflict target for client-scoped GA4 traffic sources upserts';
+COMMENT ON INDEX idx_ga4_geo_client_unique IS 'Conflict target for client-scoped GA4 geographic upserts';
+COMMENT ON INDEX idx_ga4_devices_client_unique IS 'Conflict target for client-scoped GA4 devices upserts';
+COMMENT ON INDEX idx_ga4_conversions_client_unique IS 'Conflict target for client-scoped GA4 conversions upserts';